@@ -16,6 +16,7 @@ NAME_OVERRIDES_FILE = os.path.join(CACHE_DIR, "name_overrides.json")
 ODDS_CACHE_FILE = os.path.join(CACHE_DIR, "odds_today.json")
 INJURIES_CACHE_FILE = os.path.join(CACHE_DIR, "injuries_cache_v44.json")
 MOMENTUM_CACHE_FILE = os.path.join(CACHE_DIR, "momentum_cache.json")
+MOMENTUM_FAST_CACHE_FILE = os.path.join(CACHE_DIR, "momentum_cache.pkl")
 TESES_CACHE_FILE = os.path.join(CACHE_DIR, "teses_cache.json")
 DVP_CACHE_FILE = os.path.join(CACHE_DIR, "dvp_cache.json")
 
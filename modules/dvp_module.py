@@ -1,8 +1,14 @@
 # modules/dvp_module.py
 import os
+import re
 import json
 from datetime import datetime
 
+import numpy as np
+
+# Tudo que não é dígito ASCII, ponto ou sinal (usado pelo safe_float local)
+_NUMCLEAN_RE = re.compile(r"[^0-9.\-]")
+
 # IMPORTAR FUNÇÕES DE UTILS DIRETAMENTE
 try:
     # Tentar importar do módulo utils
@@ -56,10 +62,19 @@ except ImportError:
             try:
                 if value is None:
                     return default
+                # Caminho rápido pelo tipo exato (float/int são a maioria das chamadas)
+                value_type = type(value)
+                if value_type is float:
+                    return value
+                if value_type is int:
+                    return float(value)
                 if isinstance(value, (int, float)):
                     return float(value)
                 if isinstance(value, str):
-                    cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
+                    if value.isascii():
+                        cleaned = _NUMCLEAN_RE.sub("", value)
+                    else:  # isdigit() aceita dígitos unicode que a classe 0-9 não cobre
+                        cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
                     return float(cleaned) if cleaned else default
                 return float(value)
             except:
@@ -71,6 +86,31 @@ from modules.config import *
 # DvP MODULE - CORRIGIDO
 # ============================================================================
 
+# Posição do jogador (texto livre) -> abreviação usada nas tabelas de defesa
+DVP_POSITION_MAP = {
+    "point guard": "PG", "pg": "PG", "guard": "PG",
+    "shooting guard": "SG", "sg": "SG", "g": "SG",
+    "small forward": "SF", "sf": "SF", "forward": "SF",
+    "power forward": "PF", "pf": "PF", "f": "PF",
+    "center": "C", "c": "C"
+}
+
+# Categoria de stat -> métrica de defesa
+DVP_METRIC_MAP = {
+    "pts": "points", "points": "points", "scoring": "points",
+    "reb": "rebounds", "rebounds": "rebounds", "boards": "rebounds",
+    "ast": "assists", "assists": "assists", "dimes": "assists",
+    "fg%": "points", "fgp": "points",
+    "ft%": "points", "ftp": "points",
+    "3pm": "points", "threes": "points",
+    "stl": "assists",
+    "blk": "rebounds",
+    "to": "assists"
+}
+
+# Ordem das métricas em get_dvp_vector
+DVP_VECTOR_METRICS = ("points", "rebounds", "assists")
+
 class DefenseDataFetcher:
     def __init__(self):
         self.safety = SafetyUtils()
@@ -248,43 +288,20 @@ class DvPAnalyzer:
         
         return 15
 
-    def get_dvp_multiplier(self, opponent_team, player_position, stat_category):
-        if not opponent_team or not player_position:
-            return 1.0
-        
-        pos_map = {
-            "point guard": "PG", "pg": "PG", "guard": "PG",
-            "shooting guard": "SG", "sg": "SG", "g": "SG",
-            "small forward": "SF", "sf": "SF", "forward": "SF",
-            "power forward": "PF", "pf": "PF", "f": "PF",
-            "center": "C", "c": "C"
-        }
-        
+    def _resolve_position(self, player_position):
+        """Abreviação da posição (PG/SG/SF/PF/C) ou None se não reconhecida"""
         pos_key = player_position.lower().strip()
-        pos_abbr = pos_map.get(pos_key, None)
+        pos_abbr = DVP_POSITION_MAP.get(pos_key, None)
         
         if not pos_abbr:
-            for k, v in pos_map.items():
+            for k, v in DVP_POSITION_MAP.items():
                 if k in pos_key:
                     pos_abbr = v
                     break
-            if not pos_abbr:
-                return 1.0
-        
-        metric_map = {
-            "pts": "points", "points": "points", "scoring": "points",
-            "reb": "rebounds", "rebounds": "rebounds", "boards": "rebounds",
-            "ast": "assists", "assists": "assists", "dimes": "assists",
-            "fg%": "points", "fgp": "points",
-            "ft%": "points", "ftp": "points",
-            "3pm": "points", "threes": "points",
-            "stl": "assists",
-            "blk": "rebounds",
-            "to": "assists"
-        }
-        
-        metric = metric_map.get(stat_category.lower(), "points")
-        
+        return pos_abbr
+    
+    def _metric_multiplier(self, opponent_team, pos_abbr, metric):
+        """Multiplicador pela faixa de rank do adversário na métrica"""
         rank = self.get_position_rank(opponent_team, pos_abbr, metric)
         
         if rank <= 5:
@@ -298,6 +315,36 @@ class DvPAnalyzer:
         else:
             return 1.0
     
+    def get_dvp_vector(self, opponent_team, player_position):
+        """
+        Multiplicadores DvP de pontos, rebotes e assistências em uma única chamada
+        (posição resolvida uma vez).
+        
+        Returns:
+            np.ndarray [pts, reb, ast]; uns quando o matchup não é reconhecido
+        """
+        if not opponent_team or not player_position:
+            return np.ones(len(DVP_VECTOR_METRICS))
+        
+        pos_abbr = self._resolve_position(player_position)
+        if not pos_abbr:
+            return np.ones(len(DVP_VECTOR_METRICS))
+        
+        return np.array([self._metric_multiplier(opponent_team, pos_abbr, metric)
+                         for metric in DVP_VECTOR_METRICS])
+    
+    def get_dvp_multiplier(self, opponent_team, player_position, stat_category):
+        if not opponent_team or not player_position:
+            return 1.0
+        
+        pos_abbr = self._resolve_position(player_position)
+        if not pos_abbr:
+            return 1.0
+        
+        metric = DVP_METRIC_MAP.get(stat_category.lower(), "points")
+        
+        return self._metric_multiplier(opponent_team, pos_abbr, metric)
+    
     def get_matchup_analysis(self, opponent_team, player_position):
         analysis = {
             "team": opponent_team,
@@ -314,11 +361,13 @@ class DvPAnalyzer:
                 "tier": self._rank_to_tier(rank)
             }
         
+        # Uma consulta por métrica; as categorias derivadas reaproveitam o vetor
         categories = ["pts", "reb", "ast", "stl", "blk", "to"]
+        by_metric = dict(zip(DVP_VECTOR_METRICS, self.get_dvp_vector(opponent_team, player_position).tolist()))
         multipliers = []
         
         for category in categories:
-            mult = self.get_dvp_multiplier(opponent_team, player_position, category)
+            mult = by_metric[DVP_METRIC_MAP[category]]
             analysis["multipliers"][category] = mult
             multipliers.append(mult)
         
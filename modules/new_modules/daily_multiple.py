@@ -4,6 +4,7 @@ Seleciona as melhores recomendações das estratégias para formar bilhetes múl
 """
 
 import random
+from collections import Counter
 from typing import List, Dict, Any, Tuple
 import streamlit as st
 
@@ -80,7 +81,7 @@ class DailyMultipleEngine:
         """
         selected = []
         used_players = set()
-        used_teams = {}
+        used_teams = Counter()
         used_markets = set()
         
         for rec in candidates:
@@ -96,13 +97,13 @@ class DailyMultipleEngine:
                 continue
             
             # Verificar limite por time
-            if used_teams.get(team, 0) >= max_per_team:
+            if used_teams[team] >= max_per_team:
                 continue
             
             # Adicionar à seleção
             selected.append(rec)
             used_players.add(player_id)
-            used_teams[team] = used_teams.get(team, 0) + 1
+            used_teams[team] += 1
             used_markets.add(market)
         
         return selected
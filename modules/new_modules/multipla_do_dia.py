@@ -7,10 +7,14 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Tuple, Any, Optional
 import logging
+from collections import Counter
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Categorias do StrategyEngine que alimentam a versão ousada, nesta ordem
+OUSADA_SOURCE_CATEGORIES = ('ousada', 'banco', 'explosao')
+
 class MultiplaDoDia:
     """
     Sistema para geração de múltiplas diárias com duas versões:
@@ -54,6 +58,9 @@ class MultiplaDoDia:
             logger.warning("StrategyEngine não disponível para Múltipla do Dia")
             return {"conservadora": conservadora, "ousada": ousada}
         
+        if not game_data_list:
+            return {"conservadora": conservadora, "ousada": ousada}
+        
         try:
             # Processar cada jogo
             for game_data in game_data_list:
@@ -75,25 +82,15 @@ class MultiplaDoDia:
                     players_data, matchup_context
                 )
                 
-                # Converter para lista plana e adicionar informações de categoria
-                all_recommendations = []
+                # Marcar a categoria de origem (as listas já vêm separadas por categoria)
                 for category, recs in recommendations_dict.items():
                     for rec in recs:
                         rec['strategy'] = category
-                        all_recommendations.append(rec)
-                
-                if not all_recommendations:
-                    continue
-                
-                # Filtrar por categoria
-                conservadora_recs = [rec for rec in all_recommendations if rec['strategy'] == 'conservadora']
-                ousada_recs = [rec for rec in all_recommendations if rec['strategy'] == 'ousada']
-                banco_recs = [rec for rec in all_recommendations if rec['strategy'] == 'banco']
-                explosao_recs = [rec for rec in all_recommendations if rec['strategy'] == 'explosao']
                 
                 # Adicionar à múltipla consolidada
-                conservadora.extend(conservadora_recs)
-                ousada.extend(ousada_recs + banco_recs + explosao_recs)
+                conservadora.extend(recommendations_dict.get('conservadora', []))
+                for category in OUSADA_SOURCE_CATEGORIES:
+                    ousada.extend(recommendations_dict.get(category, []))
             
             # Aplicar diversificação final
             conservadora = self._apply_diversification(conservadora, self.max_legs_conservadora)
@@ -128,22 +125,24 @@ class MultiplaDoDia:
         
         # Aplicar limites
         selected = []
-        team_counts = {}
+        selected_ids = set()
+        team_counts = Counter()
         
         for rec in recommendations:
             player_id = rec.get('player_id')
             team = rec.get('team')
             
             # Verificar se jogador já foi selecionado
-            if player_id in [r.get('player_id') for r in selected]:
+            if player_id in selected_ids:
                 continue
                 
             # Verificar limite por time
-            if team_counts.get(team, 0) >= self.max_players_per_team:
+            if team_counts[team] >= self.max_players_per_team:
                 continue
             
             selected.append(rec)
-            team_counts[team] = team_counts.get(team, 0) + 1
+            selected_ids.add(player_id)
+            team_counts[team] += 1
             
             # Parar quando atingir o máximo
             if len(selected) >= max_legs:
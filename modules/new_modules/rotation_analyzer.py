@@ -10,12 +10,237 @@ from typing import Dict, List, Tuple, Optional, Any
 import json
 import logging
 import os
+import pickle
+import atexit
+import threading
+import time
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+import functools
+import heapq
+import io
 import math
 
+# Numba é opcional: acelera a varredura de eventos do play-by-play quando disponível
+try:
+    import numba as nb
+    _NUMBA_AVAILABLE = True
+except Exception:
+    nb = None
+    _NUMBA_AVAILABLE = False
+
+# zstandard é opcional: comprime o cache de sinais em disco quando disponível
+try:
+    import zstandard as zstd
+    _ZSTD_AVAILABLE = True
+except Exception:
+    zstd = None
+    _ZSTD_AVAILABLE = False
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"  # início de um frame zstd
+
 logger = logging.getLogger(__name__)
 
+# Códigos inteiros de role e faixas de projeção de minutos, indexados pelo código
+# (starter, rotation, bench, deep_bench)
+ROLE_CODES = {"starter": 0, "rotation": 1, "bench": 2, "deep_bench": 3}
+ROLE_MINUTES_MIN = np.array([28.0, 18.0, 10.0, 5.0])
+ROLE_MINUTES_MAX = np.array([36.0, 28.0, 18.0, 10.0])
+ROLE_MINUTES_MULT = np.array([1.05, 1.0, 0.95, 0.9])
+
+# Índices inteiros dos lados da quadra usados nos snapshots de lineup
+HOME, AWAY = 0, 1
+TEAM_SIDES = {"home": HOME, "away": AWAY}
+
+# Códigos inteiros dos eventos do play-by-play (0 = ignorado; >= EV_SHOT gera snapshot)
+EV_SUBSTITUTION, EV_SHOT = 1, 2
+EVENT_CODES = {"substitution": EV_SUBSTITUTION, "shot": 2, "free_throw": 3, "turnover": 4, "rebound": 5}
+EVENT_DTYPE = np.dtype([
+    ("event_code", "i1"), ("period", "i2"), ("team_code", "i1"), ("p_out", "i4"), ("p_in", "i4")
+])
+LINEUP_CAP = 16  # capacidade do buffer ordenado de jogadores em quadra por lado
+
+@functools.lru_cache(maxsize=256)
+def _build_cache_key(game_id: str, away: str, home: str) -> str:
+    """Chave de rotation_signals de um confronto (mesmo formato de process_game_lineups)."""
+    return f"{game_id}_{away}_{home}"
+
+
+# Último minuto formatado como "%H:%M" ([minuto epoch, texto]), reaproveitado entre renders
+_minute_label_cache = [-1, ""]
+
+
+def _current_minute_label() -> str:
+    """Hora atual no formato "%H:%M", recalculada apenas quando o minuto muda."""
+    now = time.time()
+    minute = int(now // 60)
+    if minute != _minute_label_cache[0]:
+        _minute_label_cache[1] = datetime.fromtimestamp(now).strftime("%H:%M")
+        _minute_label_cache[0] = minute
+    return _minute_label_cache[1]
+
+
+# Templates das linhas de get_lineup_insights (cada linha já termina em "\n")
+_STABLE_LINEUPS_FMT = "✅ **Formações estáveis identificadas:** {} lineups com consistência\n"
+_LINEUP_ROW_FMT = "  • {players}: {minutes:.1f} minutos juntos, rating +{rating:.1f}\n"
+_ROLES_FMT = "📊 **Roles definidos:** {} titulares, {} rotação\n"
+_SHOCKS_FMT = "⚠️ **Atenção:** {} shocks de rotação detectados\n"
+_SHOCK_ROW_FMT = "  • {description}\n"
+
+
+# Chave de jogador "TIME_resto" já decomposta, com o time como índice inteiro
+PlayerKey = namedtuple("PlayerKey", "team num team_id")
+
+
+def _diversity_bonus(n_teams: int, n_roles: int) -> float:
+    """Bônus por diversidade de times e roles (limite máximo de 20%)."""
+    bonus = 1.0
+    
+    # Bônus por diversidade de times
+    if n_teams >= 2:
+        bonus *= 1.05
+    if n_teams >= 3:
+        bonus *= 1.05
+    
+    # Bônus por diversidade de roles
+    if n_roles >= 3:
+        bonus *= 1.08
+    elif n_roles >= 2:
+        bonus *= 1.03
+    
+    return min(bonus, 1.2)
+
+
+# Tabela [nº de times distintos][nº de roles distintas], saturada em 3
+DIVERSITY_BONUS_TABLE = tuple(
+    tuple(_diversity_bonus(n_teams, n_roles) for n_roles in range(4)) for n_teams in range(4)
+)
+
+
+def _intern_player(name, player_ids: Dict, player_names: List) -> int:
+    """Retorna o id inteiro do jogador na tabela do jogo, registrando-o se necessário."""
+    pid = player_ids.get(name)
+    if pid is None:
+        pid = player_ids[name] = len(player_names)
+        player_names.append(name)
+    return pid
+
+
+def _walk_events(codes, periods, sides, p_out, p_in, out_keys, out_mask):
+    """
+    Percorre os eventos codificados mantendo os lineups como buffers ordenados de ids.
+    
+    Marca em `out_mask` os eventos que geram snapshot (5 x 5 em quadra) e grava em
+    `out_keys[i]` as chaves canônicas (home, away) desses eventos.
+    """
+    lineup = np.full((2, LINEUP_CAP), -1, np.int32)
+    counts = np.zeros(2, np.int32)
+    current_period = 1
+    
+    for i in range(codes.shape[0]):
+        # Resetar lineup no início de cada período
+        if periods[i] != current_period:
+            counts[0] = 0
+            counts[1] = 0
+            current_period = periods[i]
+        
+        code = codes[i]
+        if code == EV_SUBSTITUTION:
+            side = sides[i]
+            if side >= 0 and p_out[i] >= 0 and p_in[i] >= 0:
+                n = counts[side]
+                # Remover quem sai (se estiver em quadra)
+                j = 0
+                while j < n and lineup[side, j] != p_out[i]:
+                    j += 1
+                if j < n:
+                    for k in range(j, n - 1):
+                        lineup[side, k] = lineup[side, k + 1]
+                    n -= 1
+                # Inserir quem entra na posição ordenada (se ainda não estiver)
+                j = 0
+                while j < n and lineup[side, j] < p_in[i]:
+                    j += 1
+                if (j == n or lineup[side, j] != p_in[i]) and n < LINEUP_CAP:
+                    for k in range(n, j, -1):
+                        lineup[side, k] = lineup[side, k - 1]
+                    lineup[side, j] = p_in[i]
+                    n += 1
+                counts[side] = n
+        elif code >= EV_SHOT:
+            # Capturar snapshot do lineup atual
+            if counts[0] == 5 and counts[1] == 5:
+                out_mask[i] = True
+                for k in range(5):
+                    out_keys[i, 0, k] = lineup[0, k]
+                    out_keys[i, 1, k] = lineup[1, k]
+
+
+if _NUMBA_AVAILABLE:
+    _walk_events = nb.njit(cache=True)(_walk_events)
+
+
+# Gravação dos caches de sinais: uma única thread de fundo para o processo inteiro.
+# Guarda só os snapshots pendentes (arquivo -> snapshot mais recente, o que coalesce
+# gravações em sequência), nunca os analisadores, então nada fica preso até o exit.
+_writer_cv = threading.Condition()
+_pending_writes = {}
+_writes_in_progress = 0
+_writer_thread = None
+
+
+def _write_cache_file(cache_file: str, cache_data: Dict) -> None:
+    """Salva um snapshot dos sinais de rotação (arquivo temporário + replace atômico)."""
+    try:
+        blob = pickle.dumps(cache_data, protocol=5)
+        if _ZSTD_AVAILABLE:
+            blob = zstd.ZstdCompressor(level=3).compress(blob)
+        tmp_file = cache_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_file, cache_file)
+        logger.info("Cache de lineups salvo com sucesso")
+    except Exception as e:
+        logger.error(f"Erro ao salvar cache de lineups: {e}")
+
+
+def _cache_writer_loop() -> None:
+    """Loop da thread de gravação: grava o snapshot pendente mais recente de cada arquivo."""
+    global _writes_in_progress
+    while True:
+        with _writer_cv:
+            while not _pending_writes:
+                _writer_cv.wait()
+            cache_file, cache_data = _pending_writes.popitem()
+            _writes_in_progress += 1
+        try:
+            _write_cache_file(cache_file, cache_data)
+        finally:
+            with _writer_cv:
+                _writes_in_progress -= 1
+                _writer_cv.notify_all()
+
+
+def _schedule_cache_write(cache_file: str, cache_data: Dict) -> None:
+    """Entrega um snapshot à thread de gravação (iniciada no primeiro uso) sem bloquear."""
+    global _writer_thread
+    with _writer_cv:
+        _pending_writes[cache_file] = cache_data
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_cache_writer_loop, name="rotation-cache-writer", daemon=True)
+            _writer_thread.start()
+        _writer_cv.notify_all()
+
+
+def flush_cache_writes() -> None:
+    """Aguarda a gravação de todos os snapshots pendentes (também registrado no atexit)."""
+    with _writer_cv:
+        while _pending_writes or _writes_in_progress:
+            _writer_cv.wait()
+
+
+atexit.register(flush_cache_writes)
+
 class RotationAnalyzer:
     def __init__(self, cache_dir="cache"):
         """
@@ -26,7 +251,8 @@ class RotationAnalyzer:
         """
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
-        self.lineup_cache_file = os.path.join(cache_dir, "lineup_signals.json")
+        self.lineup_cache_file = os.path.join(cache_dir, "lineup_signals.pkl")
+        self.legacy_cache_file = os.path.join(cache_dir, "lineup_signals.json")
         self.rotation_signals = self._load_cache()
         
         # Configurações ajustáveis
@@ -39,33 +265,57 @@ class RotationAnalyzer:
         }
         self.LINEUP_STABILITY_WINDOW = 10  # dias para analisar estabilidade de formações
         
+        # Memo das matrizes de compatibilidade por trixie, invalidado pela versão dos sinais
+        self._signals_version = 0
+        self._pair_matrix = functools.lru_cache(maxsize=4096)(self._pair_matrix_for_key)
+        
+        # Índices derivados dos sinais por cache_key (em memória, não persistidos)
+        self._signal_indexes = {}
+        self._team_idx = {}
+        self._role_idx = {}
+        self._player_keys = {}  # jogador -> PlayerKey (parse feito uma única vez)
+        
+        # Protege rotation_signals enquanto o snapshot para a gravação é copiado
+        self._signals_lock = threading.Lock()
+        
     def _load_cache(self) -> Dict:
-        """Carrega sinais de rotação do cache, se disponível."""
+        """Carrega sinais de rotação do cache (pickle, opcionalmente zstd; ou JSON legado)."""
         try:
+            cache_data = None
             if os.path.exists(self.lineup_cache_file):
-                with open(self.lineup_cache_file, 'r') as f:
+                with open(self.lineup_cache_file, 'rb') as f:
+                    blob = f.read()
+                if blob.startswith(_ZSTD_MAGIC):
+                    if not _ZSTD_AVAILABLE:
+                        raise RuntimeError("cache comprimido com zstd, mas zstandard não está instalado")
+                    blob = zstd.ZstdDecompressor().decompress(blob)
+                cache_data = pickle.loads(blob)
+            elif os.path.exists(self.legacy_cache_file):
+                with open(self.legacy_cache_file, 'r') as f:
                     cache_data = json.load(f)
-                    # Verificar se o cache não está muito antigo (menos de 24h)
-                    cache_time = datetime.fromisoformat(cache_data.get("timestamp", "1970-01-01"))
-                    if (datetime.now() - cache_time).total_seconds() < 86400:  # 24 horas
-                        logger.info(f"Cache de lineups carregado com {len(cache_data.get('data', {}))} entradas")
-                        return cache_data.get('data', {})
+            
+            if cache_data:
+                # Verificar se o cache não está muito antigo (menos de 24h)
+                cache_time = datetime.fromisoformat(cache_data.get("timestamp", "1970-01-01"))
+                if (datetime.now() - cache_time).total_seconds() < 86400:  # 24 horas
+                    logger.info(f"Cache de lineups carregado com {len(cache_data.get('data', {}))} entradas")
+                    return cache_data.get('data', {})
         except Exception as e:
             logger.warning(f"Erro ao carregar cache de lineups: {e}")
         return {}
     
     def _save_cache(self):
-        """Salva sinais de rotação no cache."""
-        try:
+        """Agenda a gravação do cache de sinais sem bloquear o chamador."""
+        with self._signals_lock:
             cache_data = {
                 "timestamp": datetime.now().isoformat(),
-                "data": self.rotation_signals
+                "data": dict(self.rotation_signals)
             }
-            with open(self.lineup_cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
-            logger.info("Cache de lineups salvo com sucesso")
-        except Exception as e:
-            logger.error(f"Erro ao salvar cache de lineups: {e}")
+        _schedule_cache_write(self.lineup_cache_file, cache_data)
+    
+    def flush_cache(self):
+        """Aguarda a conclusão das gravações de cache pendentes."""
+        flush_cache_writes()
     
     def extract_lineup_snapshots(self, game_data: Dict) -> List[Dict]:
         """
@@ -78,56 +328,103 @@ class RotationAnalyzer:
             Lista de snapshots com dados de minutos, posses, pontos
         """
         pbp_data = game_data.get("play_by_play", [])
-        snapshots = []
         
-        current_lineup = {
-            "home": set(),
-            "away": set()
-        }
+        # Tabela por jogo: nome do jogador -> id inteiro (e o inverso para decodificar)
+        player_ids = {}
+        player_names = []
+        
+        if _NUMBA_AVAILABLE and pbp_data:
+            snapshots = self._extract_snapshots_compiled(pbp_data, player_ids, player_names)
+        else:
+            snapshots = self._extract_snapshots_python(pbp_data, player_ids, player_names)
+        
+        logger.info("Extraídos %d snapshots de lineup para o jogo", len(snapshots))
+        return snapshots
+    
+    def _extract_snapshots_compiled(self, pbp_data: List[Dict], player_ids: Dict, player_names: List) -> List[Dict]:
+        """Varredura dos eventos via kernel Numba sobre um array estruturado."""
+        def _pid(name):
+            return _intern_player(name, player_ids, player_names) if name else -1
+        
+        events = np.array([
+            (
+                EVENT_CODES.get(event.get("event_type"), 0),
+                event.get("period", 1),
+                TEAM_SIDES.get(event.get("team"), -1),
+                _pid(event.get("player_out")),
+                _pid(event.get("player_in"))
+            )
+            for event in pbp_data
+        ], dtype=EVENT_DTYPE)
+        
+        out_keys = np.zeros((len(events), 2, 5), np.int32)
+        out_mask = np.zeros(len(events), np.bool_)
+        _walk_events(
+            events["event_code"], events["period"], events["team_code"],
+            events["p_out"], events["p_in"], out_keys, out_mask
+        )
+        
+        snapshots = []
+        for i in np.flatnonzero(out_mask).tolist():
+            home_key, away_key = (tuple(row) for row in out_keys[i].tolist())
+            snapshots.append(self._build_snapshot(pbp_data[i], home_key, away_key, player_names))
+        return snapshots
+    
+    def _extract_snapshots_python(self, pbp_data: List[Dict], player_ids: Dict, player_names: List) -> List[Dict]:
+        """Varredura dos eventos em Python puro (fallback sem Numba)."""
+        snapshots = []
+        current_lineup = (set(), set())
+        # Chaves canônicas (tuplas ordenadas de ids), recalculadas só nas substituições
+        lineup_keys = [(), ()]
         
         current_period = 1
-        last_event_time = None
         
         for event in pbp_data:
             event_type = event.get("event_type")
             period = event.get("period", 1)
-            clock = event.get("clock", "12:00")
             
             # Resetar lineup no início de cada período
             if period != current_period:
-                current_lineup = {"home": set(), "away": set()}
+                current_lineup = (set(), set())
+                lineup_keys = [(), ()]
                 current_period = period
             
             # Substituições
             if event_type == "substitution":
-                team = event.get("team")
+                side = TEAM_SIDES.get(event.get("team"))
                 player_out = event.get("player_out")
                 player_in = event.get("player_in")
                 
-                if team and player_out and player_in:
-                    if player_out in current_lineup[team]:
-                        current_lineup[team].remove(player_out)
-                    current_lineup[team].add(player_in)
+                if side is not None and player_out and player_in:
+                    lineup = current_lineup[side]
+                    lineup.discard(_intern_player(player_out, player_ids, player_names))
+                    lineup.add(_intern_player(player_in, player_ids, player_names))
+                    lineup_keys[side] = tuple(sorted(lineup))
             
             # Eventos de pontuação ou posse
             elif event_type in ["shot", "free_throw", "turnover", "rebound"]:
                 # Capturar snapshot do lineup atual
-                if len(current_lineup["home"]) == 5 and len(current_lineup["away"]) == 5:
-                    snapshot = {
-                        "timestamp": event.get("timestamp"),
-                        "period": period,
-                        "clock": clock,
-                        "home_lineup": frozenset(current_lineup["home"]),
-                        "away_lineup": frozenset(current_lineup["away"]),
-                        "event_type": event_type,
-                        "team": event.get("team"),
-                        "points_scored": event.get("points", 0)
-                    }
-                    snapshots.append(snapshot)
-        
-        logger.info(f"Extraídos {len(snapshots)} snapshots de lineup para o jogo")
+                if len(current_lineup[HOME]) == 5 and len(current_lineup[AWAY]) == 5:
+                    snapshots.append(
+                        self._build_snapshot(event, lineup_keys[HOME], lineup_keys[AWAY], player_names)
+                    )
+        
         return snapshots
     
+    def _build_snapshot(self, event: Dict, home_key: Tuple, away_key: Tuple, player_names: List) -> Dict:
+        """Monta o snapshot de um evento a partir das chaves canônicas dos lineups."""
+        return {
+            "timestamp": event.get("timestamp"),
+            "period": event.get("period", 1),
+            "clock": event.get("clock", "12:00"),
+            "lineup_keys": (home_key, away_key),
+            "player_names": player_names,
+            "event_type": event.get("event_type"),
+            "team": event.get("team"),
+            "team_id": TEAM_SIDES.get(event.get("team")),
+            "points_scored": event.get("points", 0)
+        }
+    
     def _aggregate_lineup_data(self, snapshots: List[Dict]) -> Dict:
         """
         Agrega dados de snapshots para calcular métricas por lineup.
@@ -147,37 +444,43 @@ class RotationAnalyzer:
             "players": set()
         })
         
-        # Processar snapshots para calcular tempo juntos
+        # Processar snapshots para calcular tempo juntos (lineups como tuplas de ids inteiros)
         for i in range(len(snapshots) - 1):
             current = snapshots[i]
             next_event = snapshots[i + 1]
+            lineup_keys = current["lineup_keys"]
             
             # Calcular tempo entre eventos
             time_diff = self._calculate_time_between_events(current, next_event)
             
             # Adicionar minutos para cada lineup
-            for team in ["home", "away"]:
-                lineup_key = tuple(sorted(current[f"{team}_lineup"]))
+            for side in (HOME, AWAY):
+                lineup_key = lineup_keys[side]
                 if len(lineup_key) == 5:
                     lineup_data[lineup_key]["minutes_together"] += time_diff
-                    lineup_data[lineup_key]["players"].update(lineup_key)
                     lineup_data[lineup_key]["games"].add(current.get("game_id", "unknown"))
             
             # Calcular posses e pontos
             if current.get("event_type") in ["shot", "free_throw", "turnover"]:
-                for team in ["home", "away"]:
-                    lineup_key = tuple(sorted(current[f"{team}_lineup"]))
+                points = current.get("points", 0)
+                for side in (HOME, AWAY):
+                    lineup_key = lineup_keys[side]
                     if len(lineup_key) == 5:
                         lineup_data[lineup_key]["possessions"] += 1
                         # Pontos para o time que fez a cesta
-                        if current.get("points", 0) > 0 and current.get("team") == team:
-                            lineup_data[lineup_key]["points_for"] += current.get("points", 0)
+                        if points > 0 and current.get("team_id") == side:
+                            lineup_data[lineup_key]["points_for"] += points
                         # Pontos contra quando o outro time pontua
-                        elif current.get("points", 0) > 0 and current.get("team") != team:
-                            lineup_data[lineup_key]["points_against"] += current.get("points", 0)
-        
-        # Calcular métricas derivadas
-        for lineup_key, data in lineup_data.items():
+                        elif points > 0 and current.get("team_id") != side:
+                            lineup_data[lineup_key]["points_against"] += points
+        
+        # Decodificar ids para nomes e calcular métricas derivadas
+        player_names = snapshots[0]["player_names"] if snapshots else []
+        named_data = {}
+        for id_key, data in lineup_data.items():
+            lineup_key = tuple(sorted(player_names[pid] for pid in id_key))
+            data["players"].update(lineup_key)
+            
             if data["possessions"] > 0:
                 data["points_per_100"] = (data["points_for"] / data["possessions"]) * 100
                 data["points_against_per_100"] = (data["points_against"] / data["possessions"]) * 100
@@ -185,9 +488,11 @@ class RotationAnalyzer:
             
             data["games_count"] = len(data["games"])
             data["cv_minutes"] = self._calculate_cv(data["minutes_together"]) if data["games_count"] > 1 else 1.0
+            named_data[lineup_key] = data
         
-        logger.info(f"Agregados dados para {len(lineup_data)} lineups únicos")
-        return lineup_data
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Agregados dados para %d lineups únicos", len(named_data))
+        return named_data
     
     def _calculate_time_between_events(self, current_event: Dict, next_event: Dict) -> float:
         """
@@ -222,7 +527,7 @@ class RotationAnalyzer:
             return time_diff_seconds / 60.0
             
         except Exception as e:
-            logger.warning(f"Erro ao calcular tempo entre eventos: {e}")
+            logger.warning("Erro ao calcular tempo entre eventos: %s", e)
             return 0.0
     
     def _calculate_cv(self, values: float) -> float:
@@ -252,7 +557,7 @@ class RotationAnalyzer:
         home_team = game_data.get("home_team")
         away_team = game_data.get("away_team")
         
-        logger.info(f"Analisando lineups para jogo {game_id}: {away_team} @ {home_team}")
+        logger.info("Analisando lineups para jogo %s: %s @ %s", game_id, away_team, home_team)
         
         # Extrair snapshots de lineups do play-by-play
         lineup_snapshots = self.extract_lineup_snapshots(game_data)
@@ -268,16 +573,19 @@ class RotationAnalyzer:
         
         # Armazenar no cache
         cache_key = f"{game_id}_{away_team}_{home_team}"
-        self.rotation_signals[cache_key] = {
-            "timestamp": datetime.now().isoformat(),
-            "signals": rotation_signals,
-            "game_info": {
-                "game_id": game_id,
-                "home_team": home_team,
-                "away_team": away_team,
-                "date": game_data.get("date")
+        with self._signals_lock:
+            self.rotation_signals[cache_key] = {
+                "timestamp": datetime.now().isoformat(),
+                "signals": rotation_signals,
+                "game_info": {
+                    "game_id": game_id,
+                    "home_team": home_team,
+                    "away_team": away_team,
+                    "date": game_data.get("date")
+                }
             }
-        }
+        self._signals_version += 1
+        self._signal_indexes.pop(cache_key, None)
         
         # Atualizar cache
         self._save_cache()
@@ -312,68 +620,88 @@ class RotationAnalyzer:
                 (lineup, data) for lineup, data in lineup_aggregates.items()
                 if any(player.startswith(f"{team}_") for player in lineup)
             ]
-            
-            # Identificar lineups estáveis
-            stable_lineups = [
-                (lineup, data) for lineup, data in team_lineups
-                if data["minutes_together"] >= self.MIN_MINUTES_TOGETHER and
-                   data["games_count"] >= self.MIN_GAMES_SAMPLE and
-                   data["cv_minutes"] <= 0.3
-            ]
-            
-            # Ordenar por minutos juntos
-            stable_lineups.sort(key=lambda x: x[1]["minutes_together"], reverse=True)
-            
-            # Adicionar top 3 lineups estáveis
-            for lineup, data in stable_lineups[:3]:
-                signals["stable_lineups"].append({
-                    "team": team,
-                    "lineup": lineup,
-                    "minutes_together": data["minutes_together"],
-                    "games_count": data["games_count"],
-                    "net_rating": data.get("net_rating", 0),
-                    "confidence": self._calculate_lineup_confidence(data)
-                })
-            
-            # Definir roles dos jogadores
-            self._define_player_roles(team, team_lineups, signals)
-            
-            # Projetar minutos
-            self._project_player_minutes(team, team_lineups, signals)
-            
-            # Calcular indicadores de teto
-            self._calculate_ceiling_indicators(team, team_lineups, signals)
+            self._compute_team_signals(team, team_lineups, signals)
         
-        logger.info(f"Gerados sinais de rotação para {home_team} @ {away_team}")
+        logger.info("Gerados sinais de rotação para %s @ %s", home_team, away_team)
         return signals
     
-    def _define_player_roles(self, team: str, team_lineups: List, signals: Dict):
+    def _compute_team_signals(self, team: str, team_lineups: List, signals: Dict):
         """
-        Define os roles dos jogadores com base nos lineups.
+        Calcula lineups estáveis, roles, projeção de minutos e indicadores de teto
+        de um time com uma única passada sobre seus lineups.
         
         Args:
             team: Time a ser analisado
             team_lineups: Dados dos lineups do time
             signals: Dicionário de sinais a ser atualizado
         """
+        team_prefix = f"{team}_"
         player_minutes = defaultdict(float)
         player_starts = defaultdict(int)
         player_games = defaultdict(set)
+        best_lineups = {}  # jogador -> (lineup, data) com maior net_rating
+        stable_candidates = []
         
         for lineup, data in team_lineups:
             minutes = data["minutes_together"]
             games = data["games"]
+            is_start = data.get("first_quarter_start", False)
+            
+            # Lineups estáveis
+            if (minutes >= self.MIN_MINUTES_TOGETHER and
+                    data["games_count"] >= self.MIN_GAMES_SAMPLE and
+                    data["cv_minutes"] <= 0.3):
+                stable_candidates.append((lineup, data))
+            
+            # Lineups elegíveis para teto (boa amostra e produção ofensiva)
+            ceiling_eligible = data["possessions"] > 10 and data.get("points_per_100", 0) > 0
+            net_rating = data.get("net_rating", 0)
             
             for player in lineup:
-                if player.startswith(f"{team}_"):
-                    player_minutes[player] += minutes
-                    player_games[player].update(games)
-                    
-                    # Verificar se é starter (presente nos primeiros minutos do 1º quarto)
-                    if data.get("first_quarter_start", False):
-                        player_starts[player] += 1
+                if not player.startswith(team_prefix):
+                    continue
+                player_minutes[player] += minutes
+                player_games[player].update(games)
+                
+                # Verificar se é starter (presente nos primeiros minutos do 1º quarto)
+                if is_start:
+                    player_starts[player] += 1
+                
+                if ceiling_eligible:
+                    best = best_lineups.get(player)
+                    if best is None or net_rating > best[1].get("net_rating", 0):
+                        best_lineups[player] = (lineup, data)
+        
+        # Adicionar top 3 lineups estáveis (por minutos juntos)
+        for lineup, data in heapq.nlargest(3, stable_candidates, key=lambda x: x[1]["minutes_together"]):
+            signals["stable_lineups"].append({
+                "team": team,
+                "lineup": lineup,
+                "minutes_together": data["minutes_together"],
+                "games_count": data["games_count"],
+                "net_rating": data.get("net_rating", 0),
+                "confidence": self._calculate_lineup_confidence(data)
+            })
+        
+        team_players = self._define_player_roles(player_minutes, player_starts, player_games, signals)
+        self._project_player_minutes(team_players, signals)
+        self._calculate_ceiling_indicators(best_lineups, signals)
+    
+    def _define_player_roles(self, player_minutes: Dict, player_starts: Dict,
+                             player_games: Dict, signals: Dict) -> List[Tuple[str, Dict]]:
+        """
+        Define os roles dos jogadores a partir dos minutos acumulados nos lineups.
         
-        # Classificar roles
+        Args:
+            player_minutes: Minutos totais por jogador
+            player_starts: Número de lineups iniciais por jogador
+            player_games: Jogos disputados por jogador
+            signals: Dicionário de sinais a ser atualizado
+            
+        Returns:
+            Lista de (jogador, role_data) do time, na ordem de inserção
+        """
+        team_players = []
         for player, minutes in player_minutes.items():
             games_count = len(player_games[player])
             avg_minutes = minutes / max(games_count, 1)
@@ -390,101 +718,83 @@ class RotationAnalyzer:
             if player_starts[player] >= games_count * 0.8 and games_count > 2:
                 role = "starter"
             
-            signals["role_definitions"][player] = {
+            role_data = {
                 "role": role,
                 "avg_minutes": avg_minutes,
                 "games_played": games_count,
                 "total_minutes": minutes,
                 "starter_confidence": player_starts[player] / max(games_count, 1)
             }
+            signals["role_definitions"][player] = role_data
+            team_players.append((player, role_data))
+        return team_players
     
-    def _project_player_minutes(self, team: str, team_lineups: List, signals: Dict):
+    def _project_player_minutes(self, team_players: List[Tuple[str, Dict]], signals: Dict):
         """
         Projeta minutos esperados para cada jogador.
         
         Args:
-            team: Time a ser analisado
-            team_lineups: Dados dos lineups do time
+            team_players: Lista de (jogador, role_data) do time
             signals: Dicionário de sinais a ser atualizado
         """
-        # Projeção simples baseada no histórico recente
-        for player, role_data in signals["role_definitions"].items():
-            if not player.startswith(f"{team}_"):
-                continue
-            
-            base_minutes = role_data["avg_minutes"]
-            role = role_data["role"]
-            
-            # Ajustes por role
-            if role == "starter":
-                projected = max(28, min(36, base_minutes * 1.05))
-            elif role == "rotation":
-                projected = max(18, min(28, base_minutes * 1.0))
-            elif role == "bench":
-                projected = max(10, min(18, base_minutes * 0.95))
-            else:
-                projected = max(5, min(10, base_minutes * 0.9))
-            
+        # Projeção simples baseada no histórico recente (vetorizada por time)
+        if not team_players:
+            return
+        
+        roles = np.array([ROLE_CODES.get(r["role"], 3) for _, r in team_players])
+        base = np.array([r["avg_minutes"] for _, r in team_players], dtype=float)
+        
+        # Ajustes por role: multiplicador e clamp [mín, máx] em uma única passada
+        projected = np.clip(base * ROLE_MINUTES_MULT[roles], ROLE_MINUTES_MIN[roles], ROLE_MINUTES_MAX[roles])
+        confidence = np.where(
+            roles <= 1,
+            self.CONFIDENCE_THRESHOLDS["high"],
+            self.CONFIDENCE_THRESHOLDS["medium"]
+        )
+        
+        for (player, role_data), proj, conf in zip(team_players, projected.tolist(), confidence.tolist()):
             signals["minutes_projections"][player] = {
-                "projected_minutes": round(projected, 1),
-                "base_minutes": base_minutes,
-                "role": role,
-                "confidence": self.CONFIDENCE_THRESHOLDS["high"] if role in ["starter", "rotation"] else self.CONFIDENCE_THRESHOLDS["medium"]
+                "projected_minutes": round(proj, 1),
+                "base_minutes": role_data["avg_minutes"],
+                "role": role_data["role"],
+                "confidence": conf
             }
     
-    def _calculate_ceiling_indicators(self, team: str, team_lineups: List, signals: Dict):
+    def _calculate_ceiling_indicators(self, best_lineups: Dict, signals: Dict):
         """
-        Calcula indicadores de teto estatístico com base nos lineups.
+        Calcula indicadores de teto estatístico com base no melhor lineup de cada jogador.
         
         Args:
-            team: Time a ser analisado
-            team_lineups: Dados dos lineups do time
+            best_lineups: Jogador -> (lineup, data) com maior net_rating
             signals: Dicionário de sinais a ser atualizado
         """
-        # Para cada jogador, analisar seu melhor lineup
-        for player, role_data in signals["role_definitions"].items():
-            if not player.startswith(f"{team}_"):
-                continue
-            
-            # Encontrar lineups onde o jogador tem melhor performance
-            best_lineups = []
-            for lineup, data in team_lineups:
-                if player in lineup and data["possessions"] > 10:
-                    points_per_100 = data.get("points_per_100", 0)
-                    if points_per_100 > 0:
-                        best_lineups.append((lineup, data))
-            
-            if best_lineups:
-                # Ordenar pelo melhor rating
-                best_lineups.sort(key=lambda x: x[1].get("net_rating", 0), reverse=True)
-                best_lineup, best_data = best_lineups[0]
-                
-                # Calcular indicadores de teto
-                ceiling_factor = 1.0
-                
-                # Fator de minutos: lineups com mais minutos juntos
-                if best_data["minutes_together"] > 15:
-                    ceiling_factor *= 1.15
-                elif best_data["minutes_together"] > 10:
-                    ceiling_factor *= 1.1
-                
-                # Fator de performance: lineups com bom rating
-                if best_data.get("net_rating", 0) > 5:
-                    ceiling_factor *= 1.2
-                elif best_data.get("net_rating", 0) > 2:
-                    ceiling_factor *= 1.1
-                
-                # Fator de consistência: baixo CV
-                if best_data["cv_minutes"] < 0.2:
-                    ceiling_factor *= 1.1
-                
-                signals["ceiling_indicators"][player] = {
-                    "best_lineup": best_lineup,
-                    "minutes_together": best_data["minutes_together"],
-                    "net_rating": best_data.get("net_rating", 0),
-                    "ceiling_factor": round(ceiling_factor, 2),
-                    "confidence": self._calculate_lineup_confidence(best_data)
-                }
+        for player, (best_lineup, best_data) in best_lineups.items():
+            # Calcular indicadores de teto
+            ceiling_factor = 1.0
+            
+            # Fator de minutos: lineups com mais minutos juntos
+            if best_data["minutes_together"] > 15:
+                ceiling_factor *= 1.15
+            elif best_data["minutes_together"] > 10:
+                ceiling_factor *= 1.1
+            
+            # Fator de performance: lineups com bom rating
+            if best_data.get("net_rating", 0) > 5:
+                ceiling_factor *= 1.2
+            elif best_data.get("net_rating", 0) > 2:
+                ceiling_factor *= 1.1
+            
+            # Fator de consistência: baixo CV
+            if best_data["cv_minutes"] < 0.2:
+                ceiling_factor *= 1.1
+            
+            signals["ceiling_indicators"][player] = {
+                "best_lineup": best_lineup,
+                "minutes_together": best_data["minutes_together"],
+                "net_rating": best_data.get("net_rating", 0),
+                "ceiling_factor": round(ceiling_factor, 2),
+                "confidence": self._calculate_lineup_confidence(best_data)
+            }
     
     def _calculate_lineup_confidence(self, data: Dict) -> float:
         """
@@ -578,7 +888,7 @@ class RotationAnalyzer:
                                 "description": f"{player} com aumento significativo de minutos recentemente"
                             })
         
-        logger.info(f"Detectados {len(shocks)} shocks de rotação")
+        logger.info("Detectados %d shocks de rotação", len(shocks))
         return shocks
     
     def enhance_player_context(self, player_ctx: Dict, matchup_context: Dict) -> Dict:
@@ -705,91 +1015,93 @@ class RotationAnalyzer:
             # Encontrar player no contexto (simplificado para este exemplo)
             player_map[player_id] = f"player_{player_id}"
         
-        # Verificar pares de jogadores
-        for i in range(len(player_ids)):
-            for j in range(i + 1, len(player_ids)):
-                player1 = player_map[player_ids[i]]
-                player2 = player_map[player_ids[j]]
-                
-                compatibility = self._check_player_pair_compatibility(player1, player2, signals)
+        # Verificar pares de jogadores (matriz de ajustes calculada uma vez por trixie)
+        players = tuple(player_map[player_id] for player_id in player_ids)
+        adjustments, reasons = self._pair_matrix(players, cache_key, self._signals_version)
+        for i in range(len(players)):
+            for j in range(i + 1, len(players)):
+                adjustment = adjustments[i][j]
                 
-                if not compatibility["compatible"]:
+                if adjustment < 1.0:
                     validation["compatible"] = False
-                    validation["problematic_pairs"].append((player1, player2))
-                    validation["score_adjustment"] *= compatibility["adjustment"]
+                    validation["problematic_pairs"].append((players[i], players[j]))
+                    validation["score_adjustment"] *= adjustment
                     validation["reasons"].append(
-                        f"{player1} e {player2}: {compatibility['reason']}"
+                        f"{players[i]} e {players[j]}: {reasons[i][j]}"
                     )
         
         # Aplicar bônus por diversidade de times/roles
         if validation["compatible"]:
-            diversity_bonus = self._calculate_diversity_bonus(player_ids, signals)
+            diversity_bonus = self._calculate_diversity_bonus(player_ids, cache_key)
             validation["score_adjustment"] *= diversity_bonus
             if diversity_bonus > 1.0:
                 validation["reasons"].append(f"Bônus por diversidade: {diversity_bonus:.2f}x")
         
         return validation
     
-    def _check_player_pair_compatibility(self, player1: str, player2: str, signals: Dict) -> Dict:
+    def _pair_matrix_for_key(self, players: Tuple[str, ...], cache_key: str, signals_version: int) -> Tuple:
+        """
+        Matriz de compatibilidade da trixie para os sinais de `cache_key` (memoizada via `self._pair_matrix`).
+        
+        `signals_version` só entra na chave do memo; é incrementado a cada escrita
+        em `rotation_signals` para descartar resultados antigos.
+        """
+        signals = self.rotation_signals[cache_key]["signals"]
+        adjustments, position_conflict, positions = self._precompute_pair_matrix(players, signals)
+        
+        reasons = [
+            [
+                f"Competição por minutos na mesma posição ({positions[i]})" if position_conflict[i, j]
+                else "Canibalismo estatístico detectado" if adjustments[i, j] < 1.0
+                else "Jogadores compatíveis"
+                for j in range(len(players))
+            ]
+            for i in range(len(players))
+        ]
+        return adjustments.tolist(), reasons
+    
+    def _precompute_pair_matrix(self, players: Tuple[str, ...], signals: Dict) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """
-        Verifica compatibilidade entre dois jogadores baseado nos lineups.
+        Calcula a matriz NxN de ajustes de compatibilidade entre jogadores via broadcasting.
         
         Args:
-            player1: Primeiro jogador
-            player2: Segundo jogador
+            players: Jogadores da trixie
             signals: Sinais de rotação
             
         Returns:
-            Dicionário com resultado de compatibilidade
-        """
-        # Verificar se são do mesmo time e posição
-        if player1.split('_')[0] == player2.split('_')[0]:  # Mesmo time
-            team = player1.split('_')[0]
-            
-            # Obter posições (simplificado)
-            pos1 = self._get_player_position(player1, signals)
-            pos2 = self._get_player_position(player2, signals)
-            
-            # Verificar se são da mesma posição e competem por minutos
-            if pos1 == pos2:
-                # Verificar histórico de minutos juntos
-                minutes_together = self._get_minutes_together(player1, player2, signals)
-                if minutes_together < 5.0:  # Pouco tempo juntos
-                    return {
-                        "compatible": False,
-                        "adjustment": 0.6,
-                        "reason": f"Competição por minutos na mesma posição ({pos1})"
-                    }
-        
-        # Verificar canibalismo estatístico
-        stats1 = self._get_player_stats(player1, signals)
-        stats2 = self._get_player_stats(player2, signals)
-        
-        if stats1 and stats2:
-            # Verificar correlação negativa em pontos/rebotes/assistências
-            correlation = self._calculate_stat_correlation(stats1, stats2)
-            if correlation < -0.3:  # Correlação negativa forte
-                return {
-                    "compatible": False,
-                    "adjustment": 0.7,
-                    "reason": "Canibalismo estatístico detectado"
-                }
-        
-        return {
-            "compatible": True,
-            "adjustment": 1.0,
-            "reason": "Jogadores compatíveis"
-        }
+            (ajustes NxN, máscara de competição por posição NxN, posições dos jogadores)
+        """
+        team_ids = np.array([self._parse_player_key(player).team_id for player in players], dtype=int)
+        positions = [self._get_player_position(player, signals) for player in players]
+        stats = [self._get_player_stats(player, signals) for player in players]
+        
+        pos_ids = np.unique(positions, return_inverse=True)[1] if players else np.zeros(0, int)
+        has_stats = np.array([bool(s) for s in stats], dtype=bool)
+        
+        # Mesmo time e posição com pouco tempo juntos: competição por minutos
+        minutes_together = self._get_minutes_together_matrix(players, signals)
+        position_conflict = (
+            (team_ids[:, None] == team_ids[None, :]) &
+            (pos_ids[:, None] == pos_ids[None, :]) &
+            (minutes_together < 5.0)
+        )
+        
+        # Correlação negativa forte em pontos/rebotes/assistências: canibalismo estatístico
+        correlation = self._calculate_stat_correlation_matrix(stats)
+        cannibalism = has_stats[:, None] & has_stats[None, :] & (correlation < -0.3)
+        
+        adjustments = np.where(position_conflict, 0.6, np.where(cannibalism, 0.7, 1.0))
+        return adjustments, position_conflict, positions
     
     def _get_player_position(self, player: str, signals: Dict) -> str:
         """Obtém posição do jogador (placeholder para implementação real)"""
         # Em implementação real, buscaria dos dados do jogador
         return "PG"
     
-    def _get_minutes_together(self, player1: str, player2: str, signals: Dict) -> float:
-        """Calcula minutos que dois jogadores ficaram juntos em quadra"""
+    def _get_minutes_together_matrix(self, players: Tuple[str, ...], signals: Dict) -> np.ndarray:
+        """Calcula minutos que cada par de jogadores ficou junto em quadra (matriz NxN)"""
         # Placeholder - em implementação real calcularia dos lineups
-        return 15.0
+        return np.full((len(players), len(players)), 15.0)
     
     def _get_player_stats(self, player: str, signals: Dict) -> Dict:
         """Obtém estatísticas do jogador (placeholder)"""
@@ -799,48 +1111,86 @@ class RotationAnalyzer:
             "ast": 4.0
         }
     
-    def _calculate_stat_correlation(self, stats1: Dict, stats2: Dict) -> float:
-        """Calcula correlação entre estatísticas de dois jogadores"""
+    def _calculate_stat_correlation_matrix(self, stats: List[Dict]) -> np.ndarray:
+        """Calcula correlação entre estatísticas de cada par de jogadores (matriz NxN)"""
         # Placeholder - implementação simplificada
-        return 0.2
+        return np.full((len(stats), len(stats)), 0.2)
     
-    def _calculate_diversity_bonus(self, player_ids: List[str], signals: Dict) -> float:
+    def _get_signal_index(self, cache_key: str) -> Dict:
+        """Retorna (criando sob demanda) os índices derivados dos sinais de `cache_key`."""
+        index = self._signal_indexes.get(cache_key)
+        if index is None:
+            signals = self.rotation_signals[cache_key]["signals"]
+            stable_by_team = defaultdict(list)
+            for lineup in signals["stable_lineups"]:
+                stable_by_team[lineup["team"]].append(lineup)
+            shocks_by_team = defaultdict(list)
+            for shock in signals.get("lineup_shocks", []):
+                shocks_by_team[shock.get("team")].append(shock)
+            roles_by_team = defaultdict(dict)
+            for player, role in signals["role_definitions"].items():
+                roles_by_team[self._parse_player_key(player).team_id][player] = role
+            
+            index = self._signal_indexes[cache_key] = {
+                "diversity_bits": {},  # player_id -> (bit do time, bit da role)
+                "stable_lineups_by_team": dict(stable_by_team),
+                "lineup_shocks_by_team": dict(shocks_by_team),
+                "roles_by_team": dict(roles_by_team)  # team_id -> {player_id: role}
+            }
+        return index
+    
+    def _get_team_roles(self, cache_key: str, team: str) -> Dict[str, Dict]:
+        """Role definitions dos jogadores do time (agrupadas por team_id no índice dos sinais)."""
+        team_id = self._team_idx.get(team)
+        if team_id is None:
+            return {}
+        return self._get_signal_index(cache_key)["roles_by_team"].get(team_id, {})
+    
+    @staticmethod
+    def _label_index(labels: Dict, label: str) -> int:
+        """Índice inteiro do rótulo (time ou role), atribuído na primeira ocorrência."""
+        idx = labels.get(label)
+        if idx is None:
+            idx = labels[label] = len(labels)
+        return idx
+    
+    def _parse_player_key(self, player: str) -> PlayerKey:
+        """Decompõe a chave do jogador em time/resto uma única vez por jogador."""
+        key = self._player_keys.get(player)
+        if key is None:
+            team, _, num = player.partition('_')
+            key = self._player_keys[player] = PlayerKey(team, num, self._label_index(self._team_idx, team))
+        return key
+    
+    def _calculate_diversity_bonus(self, player_ids: List[str], cache_key: str) -> float:
         """
         Calcula bônus por diversidade de times e roles nos jogadores selecionados.
         
         Args:
             player_ids: Lista de IDs dos jogadores
-            signals: Sinais de rotação
+            cache_key: Chave dos sinais de rotação do confronto
             
         Returns:
             Fator de bônus (>= 1.0)
         """
-        teams = set()
-        roles = set()
+        diversity_bits = self._get_signal_index(cache_key)["diversity_bits"]
+        team_mask = 0
+        role_mask = 0
         
         for player_id in player_ids:
-            player = f"player_{player_id}"
-            team = player.split('_')[0]
-            role = signals["role_definitions"].get(player, {}).get("role", "unknown")
-            
-            teams.add(team)
-            roles.add(role)
-        
-        bonus = 1.0
-        
-        # Bônus por diversidade de times
-        if len(teams) >= 2:
-            bonus *= 1.05
-        if len(teams) >= 3:
-            bonus *= 1.05
-        
-        # Bônus por diversidade de roles
-        if len(roles) >= 3:
-            bonus *= 1.08
-        elif len(roles) >= 2:
-            bonus *= 1.03
+            bits = diversity_bits.get(player_id)
+            if bits is None:
+                player = f"player_{player_id}"
+                role_definitions = self.rotation_signals[cache_key]["signals"]["role_definitions"]
+                role = role_definitions.get(player, {}).get("role", "unknown")
+                bits = diversity_bits[player_id] = (
+                    1 << self._parse_player_key(player).team_id,
+                    1 << self._label_index(self._role_idx, role)
+                )
+            team_mask |= bits[0]
+            role_mask |= bits[1]
         
-        return min(bonus, 1.2)  # Limite máximo de 20% de bônus
+        return DIVERSITY_BONUS_TABLE[min(team_mask.bit_count(), 3)][min(role_mask.bit_count(), 3)]
     
     def get_lineup_insights(self, team: str, matchup_context: Dict) -> str:
         """
@@ -856,44 +1206,51 @@ class RotationAnalyzer:
         # Gerar cache_key corretamente
         cache_key = matchup_context.get("cache_key")
         if not cache_key:
-            away = matchup_context.get("away_team", "")
-            home = matchup_context.get("home_team", "")
-            game_id = matchup_context.get("gameId", "unknown")
-            cache_key = f"{game_id}_{away}_{home}"
+            cache_key = _build_cache_key(
+                matchup_context.get("gameId", "unknown"),
+                matchup_context.get("away_team", ""),
+                matchup_context.get("home_team", "")
+            )
             matchup_context["cache_key"] = cache_key
         
         if not cache_key or cache_key not in self.rotation_signals:
             return "Dados de rotação não disponíveis para este jogo."
         
-        signals = self.rotation_signals[cache_key]["signals"]
-        insights = []
+        buf = io.StringIO()
+        self._write_lineup_insights(buf, team, cache_key)
+        insights = buf.getvalue()
+        if not insights:
+            return "Análise de rotação completa disponível."
+        return insights[:-1]  # remove a quebra de linha final
+    
+    def _write_lineup_insights(self, buf: io.StringIO, team: str, cache_key: str) -> None:
+        """Escreve em `buf` as linhas de insight do time (lineups estáveis, roles e shocks)."""
+        index = self._get_signal_index(cache_key)
         
         # Lineups estáveis
-        team_lineups = [l for l in signals["stable_lineups"] if l["team"] == team]
+        team_lineups = index["stable_lineups_by_team"].get(team, ())
         if team_lineups:
-            insights.append(f"✅ **Formações estáveis identificadas:** {len(team_lineups)} lineups com consistência")
-            
+            buf.write(_STABLE_LINEUPS_FMT.format(len(team_lineups)))
             for lineup in team_lineups[:2]:  # Top 2 mais relevantes
-                players = ", ".join(lineup["lineup"])
-                minutes = lineup["minutes_together"]
-                rating = lineup["net_rating"]
-                insights.append(f"  • {players}: {minutes:.1f} minutos juntos, rating +{rating:.1f}")
+                buf.write(_LINEUP_ROW_FMT.format_map({
+                    "players": ", ".join(lineup["lineup"]),
+                    "minutes": lineup["minutes_together"],
+                    "rating": lineup["net_rating"]
+                }))
         
         # Roles definidos
-        team_roles = {p: r for p, r in signals["role_definitions"].items() if p.startswith(f"{team}_")}
+        team_roles = self._get_team_roles(cache_key, team)
         if team_roles:
             starter_count = sum(1 for r in team_roles.values() if r["role"] == "starter")
             rotation_count = sum(1 for r in team_roles.values() if r["role"] == "rotation")
-            insights.append(f"📊 **Roles definidos:** {starter_count} titulares, {rotation_count} rotação")
+            buf.write(_ROLES_FMT.format(starter_count, rotation_count))
         
         # Shocks detectados
-        shocks = [s for s in signals.get("lineup_shocks", []) if s["team"] == team]
+        shocks = index["lineup_shocks_by_team"].get(team, ())
         if shocks:
-            insights.append(f"⚠️ **Atenção:** {len(shocks)} shocks de rotação detectados")
+            buf.write(_SHOCKS_FMT.format(len(shocks)))
             for shock in shocks[:2]:
-                insights.append(f"  • {shock['description']}")
-        
-        return "\n".join(insights) if insights else "Análise de rotação completa disponível."
+                buf.write(_SHOCK_ROW_FMT.format_map(shock))
     
     def prepare_rotation_sidebar(self, matchup_context: Dict) -> Dict:
         """
@@ -908,10 +1265,11 @@ class RotationAnalyzer:
         # Gerar cache_key corretamente
         cache_key = matchup_context.get("cache_key")
         if not cache_key:
-            away = matchup_context.get("away_team", "")
-            home = matchup_context.get("home_team", "")
-            game_id = matchup_context.get("gameId", "unknown")
-            cache_key = f"{game_id}_{away}_{home}"
+            cache_key = _build_cache_key(
+                matchup_context.get("gameId", "unknown"),
+                matchup_context.get("away_team", ""),
+                matchup_context.get("home_team", "")
+            )
             matchup_context["cache_key"] = cache_key
         
         if not cache_key or cache_key not in self.rotation_signals:
@@ -920,7 +1278,7 @@ class RotationAnalyzer:
                 "message": "Sem dados de rotação disponíveis"
             }
         
-        signals = self.rotation_signals[cache_key]["signals"]
+        stable_by_team = self._get_signal_index(cache_key)["stable_lineups_by_team"]
         game_info = self.rotation_signals[cache_key]["game_info"]
         
         home_team = game_info["home_team"]
@@ -930,12 +1288,12 @@ class RotationAnalyzer:
             "status": "ready",
             "home_team": home_team,
             "away_team": away_team,
-            "last_updated": datetime.now().strftime("%H:%M"),
+            "last_updated": _current_minute_label(),
             "home_insights": self.get_lineup_insights(home_team, matchup_context),
             "away_insights": self.get_lineup_insights(away_team, matchup_context),
             "stable_lineups_count": {
-                "home": len([l for l in signals["stable_lineups"] if l["team"] == home_team]),
-                "away": len([l for l in signals["stable_lineups"] if l["team"] == away_team])
+                "home": len(stable_by_team.get(home_team, ())),
+                "away": len(stable_by_team.get(away_team, ()))
             }
         }
         
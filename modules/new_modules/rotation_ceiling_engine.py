@@ -11,6 +11,26 @@ Classe principal:
 from typing import Dict, Any, Tuple
 import math
 
+import numpy as np
+
+# Ordem fixa dos mercados (os ids STAT_* são usados nos ajustes de ritmo/blowout)
+CEILING_STATS = ("pts", "reb", "ast", "pra")
+STAT_PTS, STAT_REB, STAT_AST, STAT_PRA = range(4)
+_PCT_KEYS = tuple(f"{stat}_percentile90" for stat in CEILING_STATS)
+_PROB_KEYS = tuple(f"prob_ceiling_{stat}" for stat in CEILING_STATS)
+
+# Faixas de minutos esperados -> role de rotação (limites inferiores inclusivos)
+_ROLE_THRESHOLDS = np.array([12.0, 18.0, 25.0])
+_ROLE_NAMES = ("deep_bench", "bench", "rotation", "starter")
+
+
+def _rotation_role(expected_minutes: float) -> str:
+    """Role pelos minutos esperados; NaN falha todos os limites e fica em deep_bench"""
+    if expected_minutes != expected_minutes:
+        return _ROLE_NAMES[0]
+    return _ROLE_NAMES[int(np.searchsorted(_ROLE_THRESHOLDS, expected_minutes, side="right"))]
+
+
 class RotationCeilingEngine:
     # -------------------------
     # Configurações ajustáveis
@@ -20,6 +40,7 @@ class RotationCeilingEngine:
     MIN_GAMES_HISTORY = 8  # mínimo de jogos para confiar 100% no histórico
     CEILING_BASE_WEIGHT = 0.6  # peso do histórico na probabilidade final
     CONTEXT_WEIGHT = 0.4       # peso do contexto (pace, spread, injuries)
+    _TOTAL_WEIGHT = CEILING_BASE_WEIGHT + CONTEXT_WEIGHT  # ambos os pesos incidem sobre a mesma probabilidade
     MIN_PROB = 0.01
     MAX_PROB = 0.99
 
@@ -62,38 +83,27 @@ class RotationCeilingEngine:
         return 0.5
 
     @staticmethod
-    def _adjust_for_pace(base_prob: float, pace: float, stat_type: str) -> float:
-        """Ajusta a probabilidade com base no ritmo do jogo."""
-        if pace is None:
-            return base_prob
+    def _adjust_for_pace_fast(base_prob: float, pace: float, stat_id: int) -> float:
+        """Ajusta a probabilidade com base no ritmo do jogo (pace já validado pelo chamador)."""
         pace_factor = 1.0
         if pace > RotationCeilingEngine.DEFAULT_PACE_THRESHOLD:
-            if stat_type in ["pts", "ast", "pra"]:
+            if stat_id != STAT_REB:  # pts, ast, pra
                 pace_factor = 1.0 + (pace - RotationCeilingEngine.DEFAULT_PACE_THRESHOLD) * 0.01
-            elif stat_type == "reb":
+            else:
                 pace_factor = 1.0 - (pace - RotationCeilingEngine.DEFAULT_PACE_THRESHOLD) * 0.005
         return base_prob * min(pace_factor, 1.3)
 
     @staticmethod
-    def _adjust_for_blowout(base_prob: float, spread_abs: float, is_losing: bool, stat_type: str) -> float:
-        """Ajusta para risco de blowout."""
-        if spread_abs is None or spread_abs < RotationCeilingEngine.DEFAULT_SPREAD_BLOWOUT:
-            return base_prob
-        if is_losing and stat_type in ["pts", "ast", "reb"]:
+    def _adjust_for_blowout_fast(base_prob: float, is_losing: bool, stat_id: int) -> float:
+        """Ajusta para risco de blowout (chamado só quando o spread indica blowout)."""
+        if is_losing and stat_id != STAT_PRA:  # pts, ast, reb
             # Garbage time pode aumentar minutos para reservas
             return base_prob * 1.2
-        elif not is_losing and stat_type in ["pts", "ast"]:
+        elif not is_losing and (stat_id == STAT_PTS or stat_id == STAT_AST):
             # Favoritos em blowout podem ver minutos reduzidos
             return base_prob * 0.8
         return base_prob
 
-    @staticmethod
-    def _adjust_for_dvp(base_prob: float, dvp_multiplier: float) -> float:
-        """Ajusta com base no DvP."""
-        if dvp_multiplier is None:
-            return base_prob
-        return base_prob * dvp_multiplier
-
     # -------------------------
     # Métodos públicos
     # -------------------------
@@ -120,13 +130,8 @@ class RotationCeilingEngine:
         games_sample = player_stats.get("games_sample", 0)
         confidence_multiplier = RotationCeilingEngine._games_confidence(games_sample)
         
-        # Estatísticas base
-        stats_config = {
-            "pts": player_stats.get("pts_percentile90"),
-            "reb": player_stats.get("reb_percentile90"),
-            "ast": player_stats.get("ast_percentile90"),
-            "pra": player_stats.get("pra_percentile90")
-        }
+        # Estatísticas base (ordem de CEILING_STATS)
+        percentiles = [player_stats.get(key) for key in _PCT_KEYS]
         
         # Contexto do jogo
         pace = game_ctx.get("pace_expected")
@@ -140,10 +145,21 @@ class RotationCeilingEngine:
         role = player_stats.get("role", "rotation")
         expected_minutes = player_stats.get("expected_minutes", 0)
         
+        # Limiares de minutos da role e peso total (constantes no loop)
+        min_threshold = RotationCeilingEngine.ROLE_MINUTES_THRESHOLDS.get(role, 18)
+        mt_high = min_threshold * 1.2
+        total_weight = RotationCeilingEngine._TOTAL_WEIGHT
+        
+        # Ajustes contextuais aplicáveis (decididos uma vez, fora do loop)
+        apply_pace = pace is not None
+        apply_blowout = spread_abs is not None and spread_abs >= RotationCeilingEngine.DEFAULT_SPREAD_BLOWOUT
+        
         # Calcular probabilidades
         ceiling_probs = {}
         
-        for stat, base_percentile in stats_config.items():
+        for stat_id, stat in enumerate(CEILING_STATS):
+            base_percentile = percentiles[stat_id]
+            
             # Probabilidade base histórica
             base_prob = RotationCeilingEngine._percentile_to_prob(base_percentile)
             
@@ -153,29 +169,32 @@ class RotationCeilingEngine:
                 base_prob *= trend_factor
             
             # Ajuste por minutos esperados
-            min_threshold = RotationCeilingEngine.ROLE_MINUTES_THRESHOLDS.get(role, 18)
             if expected_minutes < min_threshold:
                 base_prob *= 0.7
-            elif expected_minutes > min_threshold * 1.2:
+            elif expected_minutes > mt_high:
                 base_prob *= 1.1
             
             # Ajuste contextual
-            base_prob = RotationCeilingEngine._adjust_for_pace(base_prob, pace, stat)
-            base_prob = RotationCeilingEngine._adjust_for_blowout(base_prob, spread_abs, is_losing, stat)
-            base_prob = RotationCeilingEngine._adjust_for_dvp(base_prob, dvp_adjust.get(stat, 1.0))
+            if apply_pace:
+                base_prob = RotationCeilingEngine._adjust_for_pace_fast(base_prob, pace, stat_id)
+            if apply_blowout:
+                base_prob = RotationCeilingEngine._adjust_for_blowout_fast(base_prob, is_losing, stat_id)
+            dvp_multiplier = dvp_adjust.get(stat, 1.0)
+            if dvp_multiplier is not None:
+                base_prob *= dvp_multiplier
             
             # Fator de lineup shock (aumenta volatilidade e teto)
             if lineup_shock:
                 base_prob *= 1.15
             
-            # Aplicar peso histórico vs contexto
-            final_prob = (base_prob * RotationCeilingEngine.CEILING_BASE_WEIGHT) + (base_prob * RotationCeilingEngine.CONTEXT_WEIGHT)
+            # Aplicar peso histórico vs contexto (soma pré-calculada em _TOTAL_WEIGHT)
+            final_prob = base_prob * total_weight
             
             # Aplicar confiança baseada em amostra
             final_prob *= confidence_multiplier
             
             # Clamp final
-            ceiling_probs[f"prob_ceiling_{stat}"] = RotationCeilingEngine._clamp(final_prob)
+            ceiling_probs[_PROB_KEYS[stat_id]] = RotationCeilingEngine._clamp(final_prob)
         
         return ceiling_probs
 
@@ -210,13 +229,20 @@ class RotationCeilingEngine:
         expected_minutes_from_lineup = player_data.get("expected_minutes", 0)
         minutes_together = 0
         lineup_shock = False
+        player_lineups = []
         
         if lineup_info:
             player_lineups = [l for l in lineup_info.get("stable_lineups", []) 
                              if player_name in l.get("lineup", [])]
             if player_lineups:
-                # Usar o lineup mais estável
-                best_lineup = max(player_lineups, key=lambda x: x.get("minutes_together", 0))
+                # Usar o lineup mais estável (primeiro com mais minutos juntos)
+                best_lineup = player_lineups[0]
+                best_minutes = best_lineup.get("minutes_together", 0)
+                for lineup in player_lineups:
+                    lineup_minutes = lineup.get("minutes_together", 0)
+                    if lineup_minutes > best_minutes:
+                        best_lineup = lineup
+                        best_minutes = lineup_minutes
                 minutes_together = best_lineup.get("minutes_together", 0)
                 lineup_confidence = best_lineup.get("confidence", 0.5)
                 expected_minutes_from_lineup = best_lineup.get("expected_minutes", expected_minutes_from_lineup)
@@ -226,13 +252,7 @@ class RotationCeilingEngine:
             lineup_shock = any(shock.get("team") == team for shock in lineup_shocks)
         
         # Determinar role baseado em minutos
-        role = "deep_bench"
-        if expected_minutes_from_lineup >= 25:
-            role = "starter"
-        elif expected_minutes_from_lineup >= 18:
-            role = "rotation"
-        elif expected_minutes_from_lineup >= 12:
-            role = "bench"
+        role = _rotation_role(expected_minutes_from_lineup)
         
         return {
             "rotation_role": role,
@@ -247,4 +267,26 @@ class RotationCeilingEngine:
                 "injury_impact": same_pos_injuries > 0,
                 "minutes_certainty": min(lineup_confidence, 1.0)
             }
-        }
\ No newline at end of file
+        }
+
+
+# Teste do módulo
+def test_rotation_role_thresholds():
+    """Limites inclusivos como no if/elif original; minutos NaN viram deep_bench"""
+    cases = {
+        float("nan"): "deep_bench", float("-inf"): "deep_bench", 0: "deep_bench", 11.9: "deep_bench",
+        12: "bench", 17.9: "bench", 18: "rotation", 24.9: "rotation", 25: "starter",
+        float("inf"): "starter"
+    }
+    for minutes, expected in cases.items():
+        assert _rotation_role(minutes) == expected, (minutes, expected)
+    
+    ctx = RotationCeilingEngine.evaluate_rotation_context(
+        {"team": "MIA", "expected_minutes": float("nan")}, {}, {}, {}
+    )
+    assert ctx["rotation_role"] == "deep_bench"
+    return cases
+
+
+if __name__ == "__main__":
+    test_rotation_role_thresholds()
@@ -5,11 +5,72 @@ sem repetição de jogadores entre categorias.
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Dict, List
 import logging
+import functools
+import heapq
+import operator
 
 logger = logging.getLogger(__name__)
 
+# Configuração fixa das categorias (montada uma vez no carregamento do módulo)
+
+# Conservadora: prioriza teses específicas
+CONSERVADORA_THESIS_WEIGHTS = {
+    'BigRebound': 1.2,
+    'AssistMatchup': 1.1,
+    'ScorerLine': 1.0,
+    'PaceBoost': 0.8,
+    'ValueHunter': 0.5
+}
+
+# Ousada: prioriza jogadores com PRA alto ou combinação REB+AST
+OUSADA_PRA_WEIGHTS = {
+    'PTS': 0.4,
+    'REB': 0.3,
+    'AST': 0.3
+}
+
+# Banco: prioriza ValueHunter entre reservas e rotação
+BANCO_ROLES = frozenset(('rotation', 'bench'))
+BANCO_VALUE_WEIGHTS = {
+    'ValueHunter': 1.5,
+    'PaceBoost': 1.2,
+    'ScorerLine': 0.8,
+    'AssistMatchup': 0.7
+}
+
+# Explosão: regras por jogador (coluna, [(comparação, limite, multiplicador), ...]);
+# em cada coluna vale a primeira regra satisfeita, na ordem
+EXPLOSION_PLAYER_RULES = (
+    ('dvp_advantage', ((operator.ge, 15, 1.4), (operator.le, -15, 0.7))),
+    ('form_last_5', ((operator.ge, 1.2, 1.2),))
+)
+
+# Categorias cujo score vem das teses ponderadas (calculadas juntas em _score_theses_by_category)
+CATEGORY_THESIS_WEIGHTS = {
+    'conservadora': CONSERVADORA_THESIS_WEIGHTS,
+    'banco': BANCO_VALUE_WEIGHTS
+}
+
+@functools.lru_cache(maxsize=1024)
+def _explosion_context_factor(injured_same_pos: float, pace: float) -> float:
+    """Fator de explosão vindo do contexto do jogo: lesionados na mesma posição e pace extremo."""
+    factor = 1.0
+    
+    # 1. Lineup shocks (lesionados na mesma posição)
+    if injured_same_pos > 0:
+        factor *= 1.0 + (injured_same_pos * 0.2)
+    
+    # 2. Pace extremo
+    if pace >= 110:
+        factor *= 1.3
+    elif pace <= 90:
+        factor *= 1.1
+    
+    return factor
+
+
 class StrategyEngine:
     def __init__(self, thesis_engine, correlation_validator, strategy_identifier):
         self.thesis_engine = thesis_engine
@@ -23,6 +84,11 @@ class StrategyEngine:
         }
         self.used_players = set()  # Para controle de não repetição
         
+        # Teses achatadas do último compose (ver _apply_theses_to_players)
+        self._theses_flat = pd.DataFrame(columns=['row', 'name', 'confidence'])
+        self._n_players = 0
+        self._thesis_scores = {}
+        
     def compose_recommendations(self, players_data: pd.DataFrame, matchup_context: Dict) -> Dict:
         """
         Compõe recomendações nas 4 categorias estratégicas.
@@ -40,6 +106,11 @@ class StrategyEngine:
         self.recommendations = {k: [] for k in self.recommendations}
         self.used_players = set()
         
+        # Sem jogadores não há o que compor (e um DataFrame vazio nem tem as colunas usadas)
+        if players_data.empty:
+            logger.info("Nenhum jogador recebido; composição vazia")
+            return self.recommendations
+        
         # 2. Gerar teses para todos os jogadores
         players_with_theses = self._apply_theses_to_players(players_data, matchup_context)
         
@@ -49,11 +120,10 @@ class StrategyEngine:
         self._compose_banco(players_with_theses, matchup_context)
         self._compose_explosao(players_with_theses, matchup_context)
         
-        # 4. Validar correlações dentro de cada categoria
-        self._validate_correlations()
-        
-        # 5. Identificar estratégias para cada categoria
-        self._identify_strategies()
+        # 4-5. Validar correlações e identificar estratégias, numa única passada por categoria
+        for category, recs in self.recommendations.items():
+            recs = self.recommendations[category] = self._validate_correlations(category, recs)
+            self._identify_strategies(recs)
         
         logger.info(f"Composição finalizada: { {k: len(v) for k, v in self.recommendations.items()} }")
         return self.recommendations
@@ -63,23 +133,67 @@ class StrategyEngine:
         players = players_data.copy()
         
         # Adicionar colunas de teses
-        thesis_results = []
-        for _, player in players.iterrows():
-            player_dict = player.to_dict()
-            player_theses = self.thesis_engine.evaluate_player(player_dict, context)
-            thesis_results.append(player_theses)
-        
-        # Combinar resultados
+        thesis_results = [
+            self.thesis_engine.evaluate_player(player, context) or []
+            for player in players.to_dict('records')
+        ]
         players['theses'] = thesis_results
-        players['max_confidence'] = players['theses'].apply(
-            lambda x: max([t['confidence'] for t in x]) if x else 0
-        )
-        players['primary_thesis'] = players['theses'].apply(
-            lambda x: max(x, key=lambda t: t['confidence'])['name'] if x else None
-        )
+        self._n_players = len(thesis_results)
+        
+        # Achatar todas as teses numa única varredura: (linha do jogador, nome, confiança)
+        counts = np.fromiter(map(len, thesis_results), dtype=np.intp, count=len(thesis_results))
+        flat = [(t['name'], t['confidence']) for theses in thesis_results for t in theses]
+        names, confidences = zip(*flat) if flat else ((), ())
+        self._theses_flat = pd.DataFrame({
+            'row': np.repeat(np.arange(len(thesis_results)), counts),
+            'name': list(names),
+            'confidence': np.array(confidences, dtype=float)
+        })
+        
+        # Confiança máxima e tese principal por jogador (primeira ocorrência em empates)
+        max_confidence = np.zeros(len(players))
+        primary_thesis = np.full(len(players), None, dtype=object)
+        if not self._theses_flat.empty:
+            best = self._theses_flat.loc[
+                self._theses_flat.groupby('row', sort=False)['confidence'].idxmax()
+            ]
+            max_confidence[best['row'].to_numpy()] = best['confidence'].to_numpy()
+            primary_thesis[best['row'].to_numpy()] = best['name'].to_numpy()
+        
+        players['max_confidence'] = max_confidence
+        players['primary_thesis'] = primary_thesis
+        self._thesis_scores = self._score_theses_by_category()
         
         return players
     
+    def _score_theses_by_category(self) -> Dict[str, np.ndarray]:
+        """
+        Score médio ponderado das teses de cada jogador para todas as categorias de uma vez.
+        
+        Cada tese contribui com confiança * peso da categoria (1.0 para teses sem peso
+        definido); jogadores sem teses ficam com 0.0. Linhas, confianças e contagens são
+        extraídas uma única vez e compartilhadas entre as categorias.
+        
+        Returns:
+            Dict categoria -> array posicional (alinhado a players) de scores
+        """
+        flat = self._theses_flat
+        n_players = self._n_players
+        if flat.empty:
+            return {category: np.zeros(n_players) for category in CATEGORY_THESIS_WEIGHTS}
+        
+        rows = flat['row'].to_numpy()
+        confidence = flat['confidence'].to_numpy()
+        names = flat['name']
+        counts = np.maximum(np.bincount(rows, minlength=n_players), 1)
+        
+        return {
+            category: np.bincount(
+                rows, weights=confidence * names.map(weights).fillna(1.0).to_numpy(), minlength=n_players
+            ) / counts
+            for category, weights in CATEGORY_THESIS_WEIGHTS.items()
+        }
+    
     def _compose_conservadora(self, players: pd.DataFrame, context: Dict):
         """Estratégia Conservadora: titulares com baixa volatilidade."""
         criteria = (
@@ -88,24 +202,13 @@ class StrategyEngine:
             (~players['player_id'].isin(self.used_players))
         )
         
-        candidates = players[criteria].copy()
+        positions = np.flatnonzero(criteria.to_numpy())
         
         # Priorizar teses específicas para conservadora
-        thesis_weights = {
-            'BigRebound': 1.2,
-            'AssistMatchup': 1.1,
-            'ScorerLine': 1.0,
-            'PaceBoost': 0.8,
-            'ValueHunter': 0.5
-        }
-        
-        candidates['strategy_score'] = candidates.apply(
-            lambda row: self._calculate_strategy_score(row, thesis_weights), 
-            axis=1
-        )
+        strategy_score = self._thesis_scores['conservadora'][positions]
         
         # Selecionar top 6 (máximo por confronto)
-        selected = candidates.nlargest(6, 'strategy_score')
+        selected = self._select_top(players, positions, strategy_score, 6)
         
         for _, player in selected.iterrows():
             self._add_to_recommendation('conservadora', player, context)
@@ -113,67 +216,44 @@ class StrategyEngine:
     def _compose_ousada(self, players: pd.DataFrame, context: Dict):
         """Estratégia Ousada: alto teto estatístico (PRA ou REB+AST)."""
         # Filtrar jogadores não usados
-        available = players[~players['player_id'].isin(self.used_players)].copy()
+        positions = np.flatnonzero(~players['player_id'].isin(self.used_players).to_numpy())
+        available = players.iloc[positions]
         
         # Calcular score de teto
-        available['ceiling_score'] = self._calculate_ceiling_score(available)
+        ceiling_score = self._calculate_ceiling_score(available).to_numpy()
         
         # Critérios para ousada
-        criteria = (
-            (available['ceiling_score'] >= 0.6) &
-            (available['max_confidence'] >= 0.5)
-        )
+        criteria = (ceiling_score >= 0.6) & (available['max_confidence'].to_numpy() >= 0.5)
+        positions = positions[criteria]
+        candidates = available[criteria]
         
-        candidates = available[criteria].copy()
-        
-        # Priorizar jogadores com PRA alto ou combinação REB+AST
-        pra_weights = {
-            'PTS': 0.4,
-            'REB': 0.3,
-            'AST': 0.3
-        }
-        
-        candidates['pra_score'] = candidates.apply(
-            lambda row: sum(row.get(stat, 0) * weight for stat, weight in pra_weights.items()),
-            axis=1
-        )
+        # Score de PRA ponderado (PTS/REB/AST)
+        pra_score = np.zeros(len(candidates))
+        for stat, weight in OUSADA_PRA_WEIGHTS.items():
+            pra_score = pra_score + self._column_or_zero(candidates, stat) * weight
         
         # Combinar scores
-        candidates['strategy_score'] = (
-            candidates['ceiling_score'] * 0.6 + 
-            candidates['pra_score'].rank(pct=True) * 0.4
-        )
+        strategy_score = ceiling_score[criteria] * 0.6 + pd.Series(pra_score).rank(pct=True).to_numpy() * 0.4
         
         # Selecionar top 4
-        selected = candidates.nlargest(4, 'strategy_score')
+        selected = self._select_top(players, positions, strategy_score, 4)
         
         for _, player in selected.iterrows():
             self._add_to_recommendation('ousada', player, context)
     
     def _compose_banco(self, players: pd.DataFrame, context: Dict):
         """Estratégia Banco: valor em reservas e garbage time."""
-        available = players[~players['player_id'].isin(self.used_players)].copy()
-        
         # Critérios para banco
         criteria = (
-            (available['role'].isin(['rotation', 'bench'])) &
-            (available['max_confidence'] >= 0.5)
+            (players['role'].isin(BANCO_ROLES)) &
+            (players['max_confidence'] >= 0.5) &
+            (~players['player_id'].isin(self.used_players))
         )
         
-        candidates = available[criteria].copy()
+        candidates = players[criteria].copy()
         
         # Priorizar ValueHunter
-        value_weights = {
-            'ValueHunter': 1.5,
-            'PaceBoost': 1.2,
-            'ScorerLine': 0.8,
-            'AssistMatchup': 0.7
-        }
-        
-        candidates['value_score'] = candidates.apply(
-            lambda row: self._calculate_strategy_score(row, value_weights), 
-            axis=1
-        )
+        candidates['value_score'] = self._thesis_scores['banco'][criteria.to_numpy()]
         
         # Adicionar fator de garbage time em blowouts
         spread = context.get('spread', 0)
@@ -193,91 +273,75 @@ class StrategyEngine:
     
     def _compose_explosao(self, players: pd.DataFrame, context: Dict):
         """Estratégia Explosão: contexto situacional e lineup shocks."""
-        available = players[~players['player_id'].isin(self.used_players)].copy()
+        positions = np.flatnonzero(~players['player_id'].isin(self.used_players).to_numpy())
+        available = players.iloc[positions]
         
         # Critérios para explosão
-        explosion_factors = []
-        
-        for _, player in available.iterrows():
-            factor = 1.0
-            
-            # 1. Check for lineup shocks (injuries in same position)
-            position = player['position']
-            team = player['team']
-            
-            # Verificar se há lesionados na mesma posição
-            injured_same_pos = context.get('injuries', {}).get(team, {}).get(position, 0)
-            if injured_same_pos > 0:
-                factor *= 1.0 + (injured_same_pos * 0.2)
-            
-            # 2. Pace extremo
-            pace = context.get('pace', 100)
-            if pace >= 110:
-                factor *= 1.3
-            elif pace <= 90:
-                factor *= 1.1
-            
-            # 3. Matchup extremamente favorável
-            dvp_advantage = player.get('dvp_advantage', 0)
-            if dvp_advantage >= 15:
-                factor *= 1.4
-            elif dvp_advantage <= -15:
-                factor *= 0.7
-            
-            # 4. Recent hot streak
-            recent_form = player.get('form_last_5', 0)
-            if recent_form >= 1.2:
-                factor *= 1.2
-            
-            explosion_factors.append(factor)
-        
-        available['explosion_factor'] = explosion_factors
-        available['strategy_score'] = available['max_confidence'] * available['explosion_factor']
+        # 1-2. Lineup shocks (lesionados na mesma posição) e pace extremo
+        injuries = context.get('injuries', {})
+        pace = context.get('pace', 100)
+        explosion_factors = np.array([
+            _explosion_context_factor(injuries.get(team, {}).get(position, 0), pace)
+            for team, position in zip(available['team'], available['position'])
+        ], dtype=float)
+        
+        # 3-4. Matchup extremamente favorável e recent hot streak (tabela de regras)
+        for column, rules in EXPLOSION_PLAYER_RULES:
+            values = self._column_or_zero(available, column)
+            explosion_factors = explosion_factors * np.select(
+                [compare(values, threshold) for compare, threshold, _ in rules],
+                [multiplier for _, _, multiplier in rules],
+                default=1.0
+            )
+        
+        strategy_score = available['max_confidence'].to_numpy() * explosion_factors
         
         # Selecionar top 3
-        selected = available.nlargest(3, 'strategy_score')
+        selected = self._select_top(players, positions, strategy_score, 3)
         
         for _, player in selected.iterrows():
             self._add_to_recommendation('explosao', player, context)
     
-    def _calculate_strategy_score(self, player: pd.Series, thesis_weights: Dict) -> float:
-        """Calcula score baseado em pesos de teses."""
-        if not isinstance(player['theses'], list):
-            return 0.0
-        
-        total_score = 0.0
-        max_weight = 0.0
-        
-        for thesis in player['theses']:
-            weight = thesis_weights.get(thesis['name'], 1.0)
-            score = thesis['confidence'] * weight
-            total_score += score
-            max_weight = max(max_weight, weight)
+    @staticmethod
+    def _select_top(players: pd.DataFrame, positions: np.ndarray, scores: np.ndarray, n: int) -> pd.DataFrame:
+        """
+        Linhas de `players` com os n maiores scores (empates mantêm a ordem original).
         
-        return total_score / max(len(player['theses']), 1) if max_weight > 0 else 0.0
+        Args:
+            players: DataFrame completo dos jogadores
+            positions: Posições (iloc) dos candidatos em `players`
+            scores: Score de cada candidato, alinhado a `positions`
+            n: Quantidade máxima de jogadores selecionados
+        """
+        scores = np.asarray(scores, dtype=float)
+        valid = np.flatnonzero(~np.isnan(scores)).tolist()  # NaN nunca é selecionado
+        top = heapq.nlargest(n, valid, key=scores.__getitem__)
+        return players.iloc[positions[top]]
+    
+    @staticmethod
+    def _column_or_zero(players: pd.DataFrame, column: str) -> np.ndarray:
+        """Coluna como array float; coluna ausente vale 0 para todos os jogadores."""
+        if column in players:
+            return players[column].to_numpy(dtype=float)
+        return np.zeros(len(players))
     
     def _calculate_ceiling_score(self, players: pd.DataFrame) -> pd.Series:
         """Calcula score de teto estatístico."""
-        scores = []
+        # Fatores de teto
+        factors = (
+            self._column_or_zero(players, 'usage_rate') / 30,  # Normalizado
+            np.minimum(self._column_or_zero(players, 'minutes_avg') / 35, 1.0),
+            self._column_or_zero(players, 'pra_per_min') * 2,  # Multiplicador
+            self._column_or_zero(players, 'ceiling_last_10') / 50  # Ex: 50 PRA máximo
+        )
         
-        for _, player in players.iterrows():
-            score = 0.0
-            
-            # Fatores de teto
-            factors = {
-                'usage_rate': player.get('usage_rate', 0) / 30,  # Normalizado
-                'minutes_avg': min(player.get('minutes_avg', 0) / 35, 1.0),
-                'pra_per_min': player.get('pra_per_min', 0) * 2,  # Multiplicador
-                'ceiling_last_10': player.get('ceiling_last_10', 0) / 50  # Ex: 50 PRA máximo
-            }
-            
-            # Média ponderada
-            weights = [0.3, 0.2, 0.3, 0.2]
-            score = sum(f * w for f, w in zip(factors.values(), weights))
-            
-            scores.append(min(score, 1.0))  # Cap em 1.0
+        # Média ponderada
+        weights = (0.3, 0.2, 0.3, 0.2)
+        score = np.zeros(len(players))
+        for factor, weight in zip(factors, weights):
+            score = score + factor * weight
         
-        return pd.Series(scores, index=players.index)
+        return pd.Series(np.minimum(score, 1.0), index=players.index)  # Cap em 1.0
     
     def _add_to_recommendation(self, category: str, player: pd.Series, context: Dict):
         """Adiciona jogador à recomendação da categoria."""
@@ -346,63 +410,69 @@ class StrategyEngine:
         evidence['theses'] = thesis_evidence
         return evidence
     
-    def _validate_correlations(self):
-        """Valida correlações dentro de cada categoria."""
-        for category, recs in self.recommendations.items():
-            if len(recs) < 2:
-                continue
+    def _validate_correlations(self, category: str, recs: List[Dict]) -> List[Dict]:
+        """Valida correlações dentro da categoria e retorna as recomendações mantidas."""
+        if len(recs) < 2:
+            return recs
+        
+        # Extrair player_ids
+        player_ids = [r['player_id'] for r in recs]
+        
+        # Validar com CorrelationValidator
+        try:
+            validated = self.correlation_validator.validate_group(
+                player_ids=player_ids,
+                category=category
+            )
             
-            # Extrair player_ids
-            player_ids = [r['player_id'] for r in recs]
-            
-            # Validar com CorrelationValidator
-            try:
-                validated = self.correlation_validator.validate_group(
-                    player_ids=player_ids,
-                    category=category
-                )
+            # Remover jogadores com correlação problemática
+            if 'problematic_pairs' in validated:
+                recs_by_id = {}
+                for r in recs:
+                    recs_by_id.setdefault(r['player_id'], r)
                 
-                # Remover jogadores com correlação problemática
-                if 'problematic_pairs' in validated:
-                    problematic = set()
-                    for pair in validated['problematic_pairs']:
-                        # Remover o jogador com menor confiança
-                        rec1 = next(r for r in recs if r['player_id'] == pair[0])
-                        rec2 = next(r for r in recs if r['player_id'] == pair[1])
-                        
-                        if rec1['confidence'] < rec2['confidence']:
-                            problematic.add(rec1['player_id'])
-                        else:
-                            problematic.add(rec2['player_id'])
-                    
-                    # Atualizar recomendações
-                    self.recommendations[category] = [
-                        r for r in recs if r['player_id'] not in problematic
-                    ]
-                    
-                    logger.info(f"Categoria {category}: Removidos {len(problematic)} jogadores por correlação")
+                problematic = set()
+                for pair in validated['problematic_pairs']:
+                    # Remover o jogador com menor confiança
+                    rec1 = recs_by_id[pair[0]]
+                    rec2 = recs_by_id[pair[1]]
                     
-            except Exception as e:
-                logger.error(f"Erro na validação de correlação ({category}): {e}")
+                    if rec1['confidence'] < rec2['confidence']:
+                        problematic.add(rec1['player_id'])
+                    else:
+                        problematic.add(rec2['player_id'])
+                
+                logger.info(f"Categoria {category}: Removidos {len(problematic)} jogadores por correlação")
+                
+                # Atualizar recomendações
+                return [r for r in recs if r['player_id'] not in problematic]
+                
+        except Exception as e:
+            logger.error(f"Erro na validação de correlação ({category}): {e}")
+        
+        return recs
     
-    def _identify_strategies(self):
-        """Identifica estratégias para cada categoria."""
-        for category, recs in self.recommendations.items():
-            if not recs:
-                continue
-            
-            player_ids = [r['player_id'] for r in recs]
-            strategies = self.strategy_identifier.identify(player_ids)
-            
-            # Adicionar identificação às recomendações
-            for rec in recs:
-                rec['strategy_tags'] = strategies.get(rec['player_id'], [])
+    def _identify_strategies(self, recs: List[Dict]):
+        """Identifica estratégias das recomendações de uma categoria."""
+        if not recs:
+            return
+        
+        player_ids = [r['player_id'] for r in recs]
+        strategies = self.strategy_identifier.identify(player_ids)
+        
+        # Adicionar identificação às recomendações
+        for rec in recs:
+            rec['strategy_tags'] = strategies.get(rec['player_id'], [])
     
     def get_recommendation_summary(self) -> Dict:
         """Retorna resumo das recomendações."""
         summary = {}
         
         for category, recs in self.recommendations.items():
+            # Confianças e times extraídos uma vez por categoria
+            confidences = [r['confidence'] for r in recs]
+            teams = {r['team'] for r in recs}
+            
             summary[category] = {
                 'count': len(recs),
                 'players': [
@@ -411,15 +481,13 @@ class StrategyEngine:
                         'position': r['position'],
                         'team': r['team'],
                         'primary_thesis': r['primary_thesis'],
-                        'confidence': round(r['confidence'], 2),
+                        'confidence': round(confidence, 2),
                         'pra_avg': r['stats']['pra_avg']
                     }
-                    for r in recs[:5]  # Limitar a 5 por visibilidade
+                    for r, confidence in zip(recs[:5], confidences)  # Limitar a 5 por visibilidade
                 ],
-                'avg_confidence': round(
-                    np.mean([r['confidence'] for r in recs]) if recs else 0, 2
-                ),
-                'strategy_diversity': len(set(r['team'] for r in recs)) if recs else 0
+                'avg_confidence': round(np.mean(confidences) if recs else 0, 2),
+                'strategy_diversity': len(teams)
             }
         
-        return summary
\ No newline at end of file
+        return summary
@@ -1,7 +1,18 @@
 """
 Identificador de Estratégias para Trixies
 """
-from itertools import combinations
+
+# Prioridade entre estratégias quando mais de uma se aplica (mais específicas primeiro)
+PRIORITY_ORDER = (
+    "THE_BATTERY",
+    "SHOOTOUT_PAIR",
+    "GLASS_BANGERS_TRIO",
+    "DVPA_EXPLOIT",
+    "BLOWOUT_SPECIAL",
+    "FLOOR_GENERALS_DUO",
+    "VALUE_HUNTER",
+    "SAFE_PLAY"
+)
 
 class StrategyIdentifier:
     def __init__(self):
@@ -47,49 +58,49 @@ class StrategyIdentifier:
                 "conditions": self._check_safe_play
             }
         }
+        
+        # Sequência de verificação já resolvida: (nome, min_players, verificação) em ordem de prioridade
+        self._checks = tuple(
+            (name, self.strategies[name]["min_players"], self.strategies[name]["conditions"])
+            for name in PRIORITY_ORDER
+        )
+        # Menor min_players entre as estratégias: abaixo disso nenhuma se aplica
+        self._min_players = min(min_players for _, min_players, _ in self._checks)
     
     def identify_strategy(self, players):
         """Identifica a estratégia principal de uma trixie"""
-        strategies_found = []
-        
-        # Verificar todas as estratégias
-        for strategy_name, strategy_info in self.strategies.items():
-            if len(players) >= strategy_info["min_players"]:
-                if strategy_info["conditions"](players):
-                    strategies_found.append(strategy_name)
-        
-        # Retornar a estratégia principal (prioridade)
-        if strategies_found:
-            # Priorizar estratégias específicas
-            priority_order = [
-                "THE_BATTERY",
-                "SHOOTOUT_PAIR", 
-                "GLASS_BANGERS_TRIO",
-                "DVPA_EXPLOIT",
-                "BLOWOUT_SPECIAL",
-                "FLOOR_GENERALS_DUO",
-                "VALUE_HUNTER",
-                "SAFE_PLAY"
-            ]
-            
-            for strategy in priority_order:
-                if strategy in strategies_found:
-                    return strategy
+        # Nenhuma estratégia aceita menos jogadores que o menor min_players
+        if len(players) < self._min_players:
+            return "BALANCED"
+        
+        # Features de cada jogador extraídas uma única vez para todas as verificações
+        features = [self._player_features(player) for player in players]
+        
+        # Verificar em ordem de prioridade e parar na primeira estratégia encontrada
+        n_players = len(players)
+        for strategy_name, min_players, conditions in self._checks:
+            if n_players >= min_players and conditions(players, features):
+                return strategy_name
         
         return "BALANCED"
     
-    def _check_battery(self, players):
+    @staticmethod
+    def _player_features(player):
+        """(time, classes do jogador, tipo de mercado) lidos uma vez por jogador"""
+        return (
+            player.get("team"),
+            player.get("player_class", []),
+            player.get("mercado", {}).get("tipo")
+        )
+    
+    def _check_battery(self, players, features):
         """Verifica se há uma dupla Armador + Finalizador do mesmo time"""
         teams = {}
-        for player in players:
-            team = player.get("team")
-            player_class = player.get("player_class", [])
-            mercado = player.get("mercado", {})
-            
+        for player, (team, player_class, tipo) in zip(players, features):
             # Classificar por papel
-            if "FLOOR_GENERAL" in player_class or mercado.get("tipo") == "AST":
+            if "FLOOR_GENERAL" in player_class or tipo == "AST":
                 teams.setdefault(team, {})["playmaker"] = player
-            elif mercado.get("tipo") == "PTS" or "SHOOTERS_LINES" in player_class:
+            elif tipo == "PTS" or "SHOOTERS_LINES" in player_class:
                 teams.setdefault(team, {})["scorer"] = player
         
         # Verificar se algum time tem ambos
@@ -99,58 +110,49 @@ class StrategyIdentifier:
         
         return False
     
-    def _check_shootout_pair(self, players):
+    def _check_shootout_pair(self, players, features):
         """Verifica scorers de times opostos"""
         if len(players) < 2:
             return False
         
         # Verificar se são de times diferentes
-        teams = set(p.get("team") for p in players)
+        teams = set(team for team, _, _ in features)
         if len(teams) < 2:
             return False
         
         # Verificar se são principalmente scorers
         scorers = 0
-        for player in players:
-            mercado = player.get("mercado", {})
-            player_class = player.get("player_class", [])
-            
-            if mercado.get("tipo") == "PTS" or "SHOOTERS_LINES" in player_class:
+        for _, player_class, tipo in features:
+            if tipo == "PTS" or "SHOOTERS_LINES" in player_class:
                 scorers += 1
         
         return scorers >= 2
     
-    def _check_glass_bangers(self, players):
+    def _check_glass_bangers(self, players, features):
         """Verifica reboteadores dominantes"""
         glass_bangers = 0
         
-        for player in players:
-            player_class = player.get("player_class", [])
-            mercado = player.get("mercado", {})
-            
+        for player, (_, player_class, tipo) in zip(players, features):
             if ("GLASS_BANGER" in player_class or 
-                mercado.get("tipo") == "REB" or
+                tipo == "REB" or
                 player.get("reb_per_min", 0) > 0.2):
                 glass_bangers += 1
         
         return glass_bangers >= 2
     
-    def _check_floor_generals(self, players):
+    def _check_floor_generals(self, players, features):
         """Verifica múltiplos armadores"""
         floor_generals = 0
         
-        for player in players:
-            player_class = player.get("player_class", [])
-            mercado = player.get("mercado", {})
-            
+        for player, (_, player_class, tipo) in zip(players, features):
             if ("FLOOR_GENERAL" in player_class or 
-                mercado.get("tipo") == "AST" or
+                tipo == "AST" or
                 player.get("ast_per_min", 0) > 0.15):
                 floor_generals += 1
         
         return floor_generals >= 2
     
-    def _check_dvpa_exploit(self, players):
+    def _check_dvpa_exploit(self, players, features):
         """Verifica exploração múltipla de DvP"""
         dvp_exploits = 0
         
@@ -163,7 +165,7 @@ class StrategyIdentifier:
         
         return dvp_exploits >= 2
     
-    def _check_blowout_special(self, players):
+    def _check_blowout_special(self, players, features):
         """Verifica foco em garbage time"""
         blowout_players = 0
         
@@ -176,7 +178,7 @@ class StrategyIdentifier:
         
         return blowout_players >= 2
     
-    def _check_value_hunter(self, players):
+    def _check_value_hunter(self, players, features):
         """Verifica jogadores subvalorizados"""
         value_players = 0
         
@@ -193,17 +195,17 @@ class StrategyIdentifier:
         
         return value_players >= 2
     
-    def _check_safe_play(self, players):
+    def _check_safe_play(self, players, features):
         """Verifica combinação de baixa volatilidade"""
         safe_players = 0
         
-        for player in players:
+        for player, (_, player_class, _) in zip(players, features):
             volatility = player.get("volatility", "medium")
             min_cv = player.get("min_cv", 1.0)
             
             if (volatility == "low" or 
                 min_cv < 0.4 or
-                "SAFE_PLAYS" in player.get("player_class", [])):
+                "SAFE_PLAYS" in player_class):
                 safe_players += 1
         
         return safe_players >= 2
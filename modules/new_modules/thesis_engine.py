@@ -6,7 +6,263 @@ Gera hipóteses por jogador/mercado com confiança e motivos explícitos
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Any
+import functools
+from dataclasses import dataclass, replace
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any
+
+# Numba é opcional: compila o núcleo de confiança das teses quando disponível
+try:
+    import numba as nb
+    _NUMBA_AVAILABLE = True
+except Exception:
+    nb = None
+    _NUMBA_AVAILABLE = False
+
+# Vocabulário fixo de tags de player_class -> bit (teste de pertinência com um único &)
+TAG_BITS = {
+    'GLASS_BANGER': 1, 'REBOUNDER': 2, 'FLOOR_GENERAL': 4, 'PLAYMAKER': 8,
+    'SCORER': 16, 'SHOOTER': 32, 'VOLUME': 64, 'RUNNER': 128,
+    'TRANSITION': 256, 'ATHLETIC': 512, 'YOUNG': 1024, 'BENCH': 2048,
+    'SPARK': 4096, 'PASS': 8192
+}
+REBOUND_TAGS = TAG_BITS['GLASS_BANGER'] | TAG_BITS['REBOUNDER']
+PLAYMAKING_TAGS = TAG_BITS['FLOOR_GENERAL'] | TAG_BITS['PLAYMAKER']
+SCORING_TAGS = TAG_BITS['SCORER'] | TAG_BITS['SHOOTER'] | TAG_BITS['VOLUME']
+BENCH_TAGS = TAG_BITS['BENCH'] | TAG_BITS['SPARK']
+PACE_TAGS = TAG_BITS['RUNNER'] | TAG_BITS['TRANSITION'] | TAG_BITS['ATHLETIC'] | TAG_BITS['YOUNG']
+PASSING_TAGS = TAG_BITS['PASS'] | TAG_BITS['PLAYMAKER']
+
+
+# Multiplicadores de confiança por tipo de tese
+CONFIDENCE_MULTIPLIERS = {
+    'BigRebound': 1.0,
+    'AssistMatchup': 1.0,
+    'ScorerLine': 1.0,
+    'ValueHunter': 0.9,  # Mais conservador para bench
+    'PaceBoost': 0.85,
+    'BlowoutRisk': 0.8,
+}
+BIG_REBOUND_MULT = CONFIDENCE_MULTIPLIERS['BigRebound']
+ASSIST_MATCHUP_MULT = CONFIDENCE_MULTIPLIERS['AssistMatchup']
+SCORER_LINE_MULT = CONFIDENCE_MULTIPLIERS['ScorerLine']
+VALUE_HUNTER_MULT = CONFIDENCE_MULTIPLIERS['ValueHunter']
+PACE_BOOST_MULT = CONFIDENCE_MULTIPLIERS['PaceBoost']
+
+# Thresholds
+HIGH_PACE = 100     # Pace > 100 é considerado alto
+BIG_SPREAD = 12     # Spread > 12 é considerado blowout risk
+LOW_DVP = 0.95      # DvP < 0.95 é favorável
+HIGH_DVP = 1.05     # DvP > 1.05 é desfavorável
+MIN_USAGE = 18      # Uso mínimo para considerar
+STARTER_MIN = 25    # Minutos mínimos para starter
+
+# Overrides manuais de posição (exemplo)
+POSITION_OVERRIDES = {
+    'LeBron James': 'SF',
+    'Nikola Jokic': 'C',
+    'Luka Doncic': 'PG',
+    'Giannis Antetokounmpo': 'PF'
+}
+
+# Pesos por tipo de fator usados na média ponderada de confiança
+FACTOR_WEIGHTS = {
+    'DvP': 0.3,
+    'Pace': 0.2,
+    'Role': 0.15,
+    'PlayerClass': 0.2,
+    'Usage': 0.15
+}
+
+# Vetores de peso na ordem em que cada tese soma seus fatores
+# (fatores fora de FACTOR_WEIGHTS, como GameContext e Form, não entram na soma)
+BIG_REBOUND_WEIGHTS = np.array([FACTOR_WEIGHTS[k] for k in ('DvP', 'Pace', 'Role', 'PlayerClass', 'Usage')])
+ASSIST_MATCHUP_WEIGHTS = np.array([FACTOR_WEIGHTS[k] for k in ('PlayerClass', 'DvP', 'Role')])
+SCORER_LINE_WEIGHTS = np.array([FACTOR_WEIGHTS[k] for k in ('DvP', 'Usage', 'PlayerClass')])
+VALUE_HUNTER_WEIGHTS = np.full(4, 0.2)   # Efficiency, Trend, GameContext, PlayerClass
+PACE_BOOST_WEIGHTS = np.full(3, 0.25)    # Pace, Matchup, Position
+
+
+def _score(factors, weights, base, multiplier):
+    """
+    Confiança de uma tese: base + soma de (fator - 1) * peso, multiplicada e limitada a [0, 1].
+    
+    Fatores ausentes entram como 1.0 (contribuição nula), mantendo o vetor com forma fixa.
+    """
+    s = base
+    for i in range(factors.shape[0]):
+        s += (factors[i] - 1.0) * weights[i]
+    v = s * multiplier
+    return 0.0 if v < 0.0 else (1.0 if v > 1.0 else v)
+
+
+def _score_rows(factors, weights, base, multiplier):
+    """Versão em lote de _score: uma linha de fatores (N, k) por jogador"""
+    s = np.full(factors.shape[0], base)
+    for i in range(factors.shape[1]):
+        s = s + (factors[:, i] - 1.0) * weights[i]
+    return np.clip(s * multiplier, 0.0, 1.0)
+
+
+if _NUMBA_AVAILABLE:
+    # Cache em disco só quando importado: o índice gravado sob o nome do pacote
+    # não recarrega com o módulo executado como script (__main__)
+    _score = nb.njit(cache=__name__ != '__main__')(_score)
+    _score_rows = nb.njit(cache=__name__ != '__main__')(_score_rows)
+
+
+class GameScalars(NamedTuple):
+    """Valores do contexto do jogo lidos pelas teses, extraídos uma vez por jogo"""
+    pace: float
+    spread: float               # spread com sinal (> 0: mandante azarão)
+    spread_abs: float
+    total: float
+    home_team: str
+    away_team: str
+    high_pace: bool             # pace > limite (BigRebound)
+    pace_boost_active: bool     # pace não abaixo do limite (PaceBoost)
+    big_spread: bool            # |spread| > limite (ValueHunter)
+    blowout_active: bool        # |spread| não abaixo do limite (BlowoutRisk)
+    pace_factor: float          # 1 + 1% por posse acima de 100, limitado a 1.3
+
+
+# Linhas sugeridas: mercado -> (média da temporada, média dos últimos 5) e multiplicador por role
+LINE_STATS = {
+    'PTS': ('ppg', 'last_5_ppg'),
+    'REB': ('rpg', 'last_5_rpg'),
+    'AST': ('apg', 'last_5_apg'),
+    'PRA': ('pra', 'last_5_pra')
+}
+ROLE_LINE_MULTIPLIERS = {'starter': 1.0, 'rotation': 0.9}
+DEFAULT_LINE_MULTIPLIER = 0.8
+
+# Colunas da matriz de teses (N, 6), na ordem de ThesisEngine._thesis_generators
+BIG_REBOUND, ASSIST_MATCHUP, SCORER_LINE, VALUE_HUNTER, PACE_BOOST, BLOWOUT_RISK = range(6)
+N_THESES = 6
+MAX_THESES_PER_PLAYER = 3
+MIN_CONFIDENCE = 0.4            # corte sobre a confiança arredondada (BlowoutRisk é isenta)
+BLOWOUT_RISK_CONFIDENCE = 0.3   # BlowoutRisk gera alerta, não recomendação
+
+# Memoização de generate_all_theses: campos do jogador lidos pelos geradores
+# (posição e bits de classe entram já resolvidos na chave)
+THESIS_PLAYER_FIELDS = (
+    'name', 'id', 'team', 'role', 'player_class', 'usg', 'ast_pct',
+    'dvp_reb', 'dvp_ast', 'dvp_pts', 'min_avg', 'last_5_min_avg',
+    'ppg', 'rpg', 'apg', 'pra', 'last_5_ppg', 'last_5_rpg', 'last_5_apg', 'last_5_pra'
+)
+THESES_CACHE_SIZE = 4096
+
+# Colunas de get_thesis_summary
+SUMMARY_COLUMNS = ['Player', 'Thesis', 'Market', 'Confidence', 'Reason', 'Evidences', 'Suggested Line']
+_MISSING = object()
+
+@dataclass(slots=True)
+class Thesis:
+    """
+    Tese gerada para um jogador
+    
+    Acesso por atributo; thesis['campo'] e thesis.get('campo') continuam
+    funcionando para o código que tratava as teses como dict.
+    """
+    player: str
+    player_id: Any
+    market: str
+    confidence: float
+    reason: str
+    evidences: List[str]
+    weights: Dict[str, float]
+    thesis_type: str
+    suggested_line: Optional[float]
+    is_risk: bool = False
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato dict anterior (is_risk só aparece nas teses de risco)"""
+        result = {
+            'player': self.player,
+            'player_id': self.player_id,
+            'market': self.market,
+            'confidence': self.confidence,
+            'reason': self.reason,
+            'evidences': self.evidences,
+            'weights': self.weights,
+            'thesis_type': self.thesis_type,
+            'suggested_line': self.suggested_line
+        }
+        if self.is_risk:
+            result['is_risk'] = True
+        return result
+
+
+# Colunas numéricas lidas pela triagem em lote e seus defaults (os mesmos de player_ctx.get)
+SCREEN_COLUMNS = {
+    'dvp_reb': 1.0, 'dvp_pts': 1.0, 'dvp_ast': 1.0,
+    'usg': 0.0, 'ast_pct': 0.0, 'min_avg': 0.0, 'pra': 0.0
+}
+
+
+def _round_array(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    np.round com o mesmo resultado do round() do Python.
+    
+    np.round escala por 10**ndigits antes de arredondar, o que pode mudar o
+    lado do arredondamento perto de x.5; esses poucos casos usam round().
+    """
+    out = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        out[near_tie] = [round(v, ndigits) for v in values[near_tie].tolist()]
+    return out
+
+
+def _r2(x: float) -> float:
+    """Arredonda para 2 casas, meio para cima (evita o caminho lento e half-even do round()); NaN/inf passam inalterados"""
+    try:
+        return int(x * 100 + 0.5) / 100.0 if x >= 0 else -(int(-x * 100 + 0.5) / 100.0)
+    except (ValueError, OverflowError):
+        return x
+
+
+def _r1(x: float) -> float:
+    """Arredonda para 1 casa, meio para cima; NaN/inf passam inalterados"""
+    try:
+        return int(x * 10 + 0.5) / 10.0 if x >= 0 else -(int(-x * 10 + 0.5) / 10.0)
+    except (ValueError, OverflowError):
+        return x
+
+
+def _round_half_up(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Versão vetorizada de _r2/_r1: mesmas operações, mesmo resultado elemento a elemento"""
+    scale = 10 ** ndigits
+    return np.where(
+        values >= 0,
+        np.floor(values * scale + 0.5),
+        -np.floor(-values * scale + 0.5)
+    ) / scale
+
+
+def _cache_key(values) -> Tuple:
+    """Chave hashable que distingue 12 de 12.0 (a formatação das evidências depende do tipo)"""
+    return tuple((type(value), value) for value in values)
+
+
+@functools.lru_cache(maxsize=1024)
+def class_bits(player_class: str) -> int:
+    """Converte player_class em bitmask de TAG_BITS (por substring: 'VOLUME_SCORER' liga VOLUME e SCORER)"""
+    bits = 0
+    for tag, bit in TAG_BITS.items():
+        if tag in player_class:
+            bits |= bit
+    return bits
+
 
 class ThesisEngine:
     """
@@ -16,54 +272,46 @@ class ThesisEngine:
     - Dados históricos e situacionais
     """
     
+    __slots__ = ('config', 'confidence_multipliers', 'weights', 'position_overrides', 'thresholds',
+                 '_cached_theses')
+    
     def __init__(self, config: Optional[Dict] = None):
-        """Inicializa o motor de teses com configurações"""
-        self.config = config or {}
-        
-        # Multiplicadores de confiança por tipo de tese
-        self.confidence_multipliers = {
-            'BigRebound': 1.0,
-            'AssistMatchup': 1.0,
-            'ScorerLine': 1.0,
-            'ValueHunter': 0.9,  # Mais conservador para bench
-            'PaceBoost': 0.85,
-            'BlowoutRisk': 0.8,
-        }
-        
-        # Pesos para cálculo de confiança
-        self.weights = {
-            'DvP': 0.3,
-            'Pace': 0.2,
-            'Role': 0.15,
-            'PlayerClass': 0.2,
-            'Usage': 0.15
-        }
-        
-        # Overrides manuais de posição (exemplo)
-        self.position_overrides = {
-            'LeBron James': 'SF',
-            'Nikola Jokic': 'C',
-            'Luka Doncic': 'PG',
-            'Giannis Antetokounmpo': 'PF'
-        }
+        """
+        Inicializa o motor de teses com configurações
         
-        # Thresholds
+        Os valores numéricos ficam em constantes de módulo, lidas diretamente pelos
+        geradores; os dicts da instância são cópias mantidas para consulta.
+        """
+        self.config = config or {}
+        self.confidence_multipliers = dict(CONFIDENCE_MULTIPLIERS)
+        self.weights = dict(FACTOR_WEIGHTS)
+        self.position_overrides = dict(POSITION_OVERRIDES)
         self.thresholds = {
-            'high_pace': 100,  # Pace > 100 é considerado alto
-            'big_spread': 12,  # Spread > 12 é considerado blowout risk
-            'low_dvp': 0.95,   # DvP < 0.95 é favorável
-            'high_dvp': 1.05,  # DvP > 1.05 é desfavorável
-            'min_usage': 18,   # Uso mínimo para considerar
-            'starter_min': 25  # Minutos mínimos para starter
+            'high_pace': HIGH_PACE,
+            'big_spread': BIG_SPREAD,
+            'low_dvp': LOW_DVP,
+            'high_dvp': HIGH_DVP,
+            'min_usage': MIN_USAGE,
+            'starter_min': STARTER_MIN
         }
+        # Teses por (jogador, jogo): simulações repetidas não recalculam jogadores já vistos
+        self._cached_theses = functools.lru_cache(maxsize=THESES_CACHE_SIZE)(self._evaluate_theses)
     
     def get_player_position(self, player_name: str, default_pos: str) -> str:
         """Retorna posição do jogador com overrides manuais"""
         return self.position_overrides.get(player_name, default_pos)
     
+    def _player_profile(self, player_ctx: Dict) -> Tuple[str, int]:
+        """
+        Posição resolvida (com overrides) e bits de classe do jogador, lidos dos
+        próprios campos do player_ctx (class_bits é memoizado por player_class)
+        """
+        return (self.get_player_position(player_ctx['name'], player_ctx.get('pos', '')),
+                class_bits(player_ctx.get('player_class', '')))
+    
     def classify_role(self, min_avg: float, is_starter: bool) -> str:
         """Classifica o role do jogador baseado em minutos e titularidade"""
-        if is_starter and min_avg >= self.thresholds['starter_min']:
+        if is_starter and min_avg >= STARTER_MIN:
             return 'starter'
         elif min_avg >= 20:
             return 'rotation'
@@ -90,194 +338,210 @@ class ThesisEngine:
             else:
                 return 1.0 + (dvp_value - 1.0) * 0.3
     
-    def generate_big_rebound_thesis(self, player_ctx: Dict, game_ctx: Dict) -> Optional[Dict]:
+    def generate_big_rebound_thesis(self, player_ctx: Dict, game_ctx: Dict,
+                                    game: Optional[GameScalars] = None,
+                                    min_confidence: Optional[float] = None) -> Optional['Thesis']:
         """
         Gera tese BigRebound: PF/C + GLASS_BANGER + DvP favorável garrafão + pace alto
+        
+        Com min_confidence, retorna None sem montar evidências/reason quando a
+        confiança arredondada não passa do corte (vale para todos os geradores).
         """
-        pos = self.get_player_position(player_ctx['name'], player_ctx.get('pos', ''))
+        if game is None:
+            game = self._game_scalars(game_ctx)
+        pos, bits = self._player_profile(player_ctx)
         
         # Verifica elegibilidade
         if pos not in ['PF', 'C']:
             return None
         
         # Verifica player class
-        player_class = player_ctx.get('player_class', '')
-        if 'GLASS_BANGER' not in player_class and 'REBOUNDER' not in player_class:
+        if not bits & REBOUND_TAGS:
             return None
         
-        # Coleta evidências
-        evidences = []
-        confidence_factors = []
-        
         # 1. DvP para rebotes
         dvp_reb = player_ctx.get('dvp_reb', 1.0)
-        dvp_factor = self.calculate_dvp_factor(dvp_reb, is_favorable=True)
-        if dvp_reb > 1.0:
-            evidences.append(f"DvP REB favorável: {dvp_reb:.2f}")
-            confidence_factors.append(('DvP', dvp_factor))
+        dvp_factor = self.calculate_dvp_factor(dvp_reb, is_favorable=True) if dvp_reb > 1.0 else 1.0
         
         # 2. Pace do jogo
-        pace = game_ctx.get('pace', 100)
-        if pace > self.thresholds['high_pace']:
-            pace_factor = 1.0 + (pace - 100) * 0.01
-            evidences.append(f"Pace alto: {pace:.1f}")
-            confidence_factors.append(('Pace', min(pace_factor, 1.3)))
+        pace_factor = game.pace_factor if game.high_pace else 1.0
         
         # 3. Role do jogador
         role = player_ctx.get('role', 'bench')
         role_factor = 1.0 if role == 'starter' else 0.9
-        evidences.append(f"Role: {role}")
-        confidence_factors.append(('Role', role_factor))
         
         # 4. Player class
-        class_factor = 1.2 if 'GLASS_BANGER' in player_class else 1.0
-        confidence_factors.append(('PlayerClass', class_factor))
+        class_factor = 1.2 if bits & TAG_BITS['GLASS_BANGER'] else 1.0
         
         # 5. Usage rate
         usage = player_ctx.get('usg', 0.0)
-        if usage > self.thresholds['min_usage']:
-            usage_factor = 1.0 + (usage - 18) * 0.01
-            confidence_factors.append(('Usage', min(usage_factor, 1.2)))
-            evidences.append(f"USG% adequado: {usage:.1f}%")
-        
-        # Calcula confiança final
-        if not confidence_factors:
+        usage_factor = 1.0 + (usage - 18) * 0.01 if usage > MIN_USAGE else 1.0
+        usage_factor = 1.2 if usage_factor > 1.2 else usage_factor
+        
+        # Média ponderada com multiplicador da tese
+        confidence = _r2(_score(
+            np.array([dvp_factor, pace_factor, role_factor, class_factor, usage_factor]),
+            BIG_REBOUND_WEIGHTS, 0.5, BIG_REBOUND_MULT
+        ))
+        if min_confidence is not None and confidence <= min_confidence:
             return None
         
-        # Média ponderada
-        base_confidence = 0.5
-        for factor_type, value in confidence_factors:
-            if factor_type in self.weights:
-                base_confidence += (value - 1.0) * self.weights[factor_type]
-        
-        # Aplica multiplicador da tese
-        confidence = min(max(base_confidence * self.confidence_multipliers['BigRebound'], 0), 1)
-        
-        return {
-            'player': player_ctx['name'],
-            'player_id': player_ctx.get('id', ''),
-            'market': 'REB',
-            'confidence': round(confidence, 2),
-            'reason': f"{player_ctx['name']} como {pos} com perfil {player_class} em matchup favorável para rebotes",
-            'evidences': evidences,
-            'weights': {k: v for k, v in confidence_factors},
-            'thesis_type': 'BigRebound',
-            'suggested_line': self.suggest_rebound_line(player_ctx)
-        }
+        # Evidências e pesos (mesma ordem dos fatores)
+        evidences = []
+        confidence_factors = []
+        if dvp_reb > 1.0:
+            evidences.append(f"DvP REB favorável: {dvp_reb:.2f}")
+            confidence_factors.append(('DvP', dvp_factor))
+        if game.high_pace:
+            evidences.append(f"Pace alto: {game.pace:.1f}")
+            confidence_factors.append(('Pace', pace_factor))
+        evidences.append(f"Role: {role}")
+        confidence_factors.append(('Role', role_factor))
+        confidence_factors.append(('PlayerClass', class_factor))
+        if usage > MIN_USAGE:
+            confidence_factors.append(('Usage', usage_factor))
+            evidences.append(f"USG% adequado: {usage:.1f}%")
+        
+        player_class = player_ctx.get('player_class', '')
+        return Thesis(
+            player=player_ctx['name'],
+            player_id=player_ctx.get('id', ''),
+            market='REB',
+            confidence=confidence,
+            reason=f"{player_ctx['name']} como {pos} com perfil {player_class} em matchup favorável para rebotes",
+            evidences=evidences,
+            weights=dict(confidence_factors),
+            thesis_type='BigRebound',
+            suggested_line=self.suggest_rebound_line(player_ctx)
+        )
     
-    def generate_assist_matchup_thesis(self, player_ctx: Dict, game_ctx: Dict) -> Optional[Dict]:
+    def generate_assist_matchup_thesis(self, player_ctx: Dict, game_ctx: Dict,
+                                       game: Optional[GameScalars] = None,
+                                       min_confidence: Optional[float] = None) -> Optional['Thesis']:
         """
         Gera tese AssistMatchup: PG/FLOOR_GENERAL + jogo parelho + AST% alto
         """
-        pos = self.get_player_position(player_ctx['name'], player_ctx.get('pos', ''))
+        if game is None:
+            game = self._game_scalars(game_ctx)
+        pos, bits = self._player_profile(player_ctx)
         
         # Verifica elegibilidade
         if pos not in ['PG', 'SG']:
             return None
         
         # Verifica player class
-        player_class = player_ctx.get('player_class', '')
-        if 'FLOOR_GENERAL' not in player_class and 'PLAYMAKER' not in player_class:
+        if not bits & PLAYMAKING_TAGS:
             return None
         
-        # Coleta evidências
-        evidences = []
-        confidence_factors = []
-        
         # 1. Spread do jogo (jogo parelho)
-        spread = abs(game_ctx.get('spread', 0))
+        spread = game.spread_abs
         if spread <= 5:
             spread_factor = 1.2
-            evidences.append(f"Jogo parelho (spread: {spread})")
         elif spread <= 8:
             spread_factor = 1.0
-            evidences.append(f"Spread moderado: {spread}")
         else:
             spread_factor = 0.8
-            evidences.append(f"Spread alto: {spread}")
-        confidence_factors.append(('GameContext', spread_factor))
         
         # 2. AST% do jogador
         ast_pct = player_ctx.get('ast_pct', 0.0)
-        if ast_pct > 20:
-            ast_factor = 1.0 + (ast_pct - 20) * 0.01
-            confidence_factors.append(('PlayerClass', min(ast_factor, 1.3)))
-            evidences.append(f"AST% alto: {ast_pct:.1f}%")
+        ast_factor = 1.0 + (ast_pct - 20) * 0.01 if ast_pct > 20 else 1.0
+        ast_factor = 1.3 if ast_factor > 1.3 else ast_factor
         
         # 3. DvP para assistências
         dvp_ast = player_ctx.get('dvp_ast', 1.0)
-        dvp_factor = self.calculate_dvp_factor(dvp_ast, is_favorable=True)
-        if dvp_ast > 1.0:
-            evidences.append(f"DvP AST favorável: {dvp_ast:.2f}")
-            confidence_factors.append(('DvP', dvp_factor))
+        dvp_factor = self.calculate_dvp_factor(dvp_ast, is_favorable=True) if dvp_ast > 1.0 else 1.0
         
         # 4. Role
         role = player_ctx.get('role', 'bench')
         role_factor = 1.1 if role == 'starter' else 0.9
-        confidence_factors.append(('Role', role_factor))
         
-        # Calcula confiança
-        if not confidence_factors:
+        # Calcula confiança (GameContext não tem peso)
+        confidence = _r2(_score(
+            np.array([ast_factor, dvp_factor, role_factor]),
+            ASSIST_MATCHUP_WEIGHTS, 0.5, ASSIST_MATCHUP_MULT
+        ))
+        if min_confidence is not None and confidence <= min_confidence:
             return None
         
-        base_confidence = 0.5
-        for factor_type, value in confidence_factors:
-            if factor_type in self.weights:
-                base_confidence += (value - 1.0) * self.weights.get(factor_type, 0.1)
-        
-        confidence = min(max(base_confidence * self.confidence_multipliers['AssistMatchup'], 0), 1)
-        
-        return {
-            'player': player_ctx['name'],
-            'player_id': player_ctx.get('id', ''),
-            'market': 'AST',
-            'confidence': round(confidence, 2),
-            'reason': f"{player_ctx['name']} como {pos} com alto AST% em jogo competitivo",
-            'evidences': evidences,
-            'weights': {k: v for k, v in confidence_factors},
-            'thesis_type': 'AssistMatchup',
-            'suggested_line': self.suggest_assist_line(player_ctx)
-        }
+        # Evidências e pesos (mesma ordem dos fatores)
+        if spread <= 5:
+            evidences = [f"Jogo parelho (spread: {spread})"]
+        elif spread <= 8:
+            evidences = [f"Spread moderado: {spread}"]
+        else:
+            evidences = [f"Spread alto: {spread}"]
+        confidence_factors = [('GameContext', spread_factor)]
+        if ast_pct > 20:
+            confidence_factors.append(('PlayerClass', ast_factor))
+            evidences.append(f"AST% alto: {ast_pct:.1f}%")
+        if dvp_ast > 1.0:
+            evidences.append(f"DvP AST favorável: {dvp_ast:.2f}")
+            confidence_factors.append(('DvP', dvp_factor))
+        confidence_factors.append(('Role', role_factor))
+        
+        return Thesis(
+            player=player_ctx['name'],
+            player_id=player_ctx.get('id', ''),
+            market='AST',
+            confidence=confidence,
+            reason=f"{player_ctx['name']} como {pos} com alto AST% em jogo competitivo",
+            evidences=evidences,
+            weights=dict(confidence_factors),
+            thesis_type='AssistMatchup',
+            suggested_line=self.suggest_assist_line(player_ctx)
+        )
     
-    def generate_scorer_line_thesis(self, player_ctx: Dict, game_ctx: Dict) -> Optional[Dict]:
+    def generate_scorer_line_thesis(self, player_ctx: Dict, game_ctx: Dict,
+                                    game: Optional[GameScalars] = None,
+                                    min_confidence: Optional[float] = None) -> Optional['Thesis']:
         """
         Gera tese ScorerLine: SG/SF + Volume/Sharpshooter + defesa fraca no perímetro
         """
-        pos = self.get_player_position(player_ctx['name'], player_ctx.get('pos', ''))
+        if game is None:
+            game = self._game_scalars(game_ctx)
+        pos, bits = self._player_profile(player_ctx)
         
         if pos not in ['SG', 'SF']:
             return None
         
-        player_class = player_ctx.get('player_class', '')
-        if 'SCORER' not in player_class and 'SHOOTER' not in player_class and 'VOLUME' not in player_class:
+        if not bits & SCORING_TAGS:
             return None
         
-        evidences = []
-        confidence_factors = []
-        
         # 1. DvP para pontos
         dvp_pts = player_ctx.get('dvp_pts', 1.0)
-        dvp_factor = self.calculate_dvp_factor(dvp_pts, is_favorable=True)
-        if dvp_pts > 1.0:
-            evidences.append(f"DvP PTS favorável: {dvp_pts:.2f}")
-            confidence_factors.append(('DvP', dvp_factor))
+        dvp_factor = self.calculate_dvp_factor(dvp_pts, is_favorable=True) if dvp_pts > 1.0 else 1.0
         
         # 2. Usage rate
         usage = player_ctx.get('usg', 0.0)
-        if usage > 22:
-            usage_factor = 1.0 + (usage - 22) * 0.015
-            confidence_factors.append(('Usage', min(usage_factor, 1.3)))
-            evidences.append(f"USG% alto: {usage:.1f}%")
+        usage_factor = 1.0 + (usage - 22) * 0.015 if usage > 22 else 1.0
+        usage_factor = 1.3 if usage_factor > 1.3 else usage_factor
         
         # 3. Player class
-        class_factor = 1.2 if 'SCORER' in player_class else 1.0
+        class_factor = 1.2 if bits & TAG_BITS['SCORER'] else 1.0
+        
+        # Calcula confiança (GameContext e Form não têm peso)
+        confidence = _r2(_score(
+            np.array([dvp_factor, usage_factor, class_factor]),
+            SCORER_LINE_WEIGHTS, 0.55, SCORER_LINE_MULT
+        ))
+        if min_confidence is not None and confidence <= min_confidence:
+            return None
+        
+        # Evidências e pesos (mesma ordem dos fatores)
+        evidences = []
+        confidence_factors = []
+        if dvp_pts > 1.0:
+            evidences.append(f"DvP PTS favorável: {dvp_pts:.2f}")
+            confidence_factors.append(('DvP', dvp_factor))
+        if usage > 22:
+            confidence_factors.append(('Usage', usage_factor))
+            evidences.append(f"USG% alto: {usage:.1f}%")
         confidence_factors.append(('PlayerClass', class_factor))
         
         # 4. Total do jogo (over/under)
-        total = game_ctx.get('total', 220)
-        if total > 225:
+        if game.total > 225:
             total_factor = 1.1
-            evidences.append(f"Total alto: {total}")
+            evidences.append(f"Total alto: {game.total}")
         else:
             total_factor = 1.0
         confidence_factors.append(('GameContext', total_factor))
@@ -292,30 +556,26 @@ class ThesisEngine:
             form_factor = 1.0
         confidence_factors.append(('Form', form_factor))
         
-        # Calcula confiança
-        base_confidence = 0.55
-        for factor_type, value in confidence_factors:
-            if factor_type in self.weights:
-                base_confidence += (value - 1.0) * self.weights.get(factor_type, 0.1)
-        
-        confidence = min(max(base_confidence * self.confidence_multipliers['ScorerLine'], 0), 1)
-        
-        return {
-            'player': player_ctx['name'],
-            'player_id': player_ctx.get('id', ''),
-            'market': 'PTS',
-            'confidence': round(confidence, 2),
-            'reason': f"{player_ctx['name']} como {pos} com perfil de scorer contra defesa vulnerável",
-            'evidences': evidences,
-            'weights': {k: v for k, v in confidence_factors},
-            'thesis_type': 'ScorerLine',
-            'suggested_line': self.suggest_points_line(player_ctx)
-        }
+        return Thesis(
+            player=player_ctx['name'],
+            player_id=player_ctx.get('id', ''),
+            market='PTS',
+            confidence=confidence,
+            reason=f"{player_ctx['name']} como {pos} com perfil de scorer contra defesa vulnerável",
+            evidences=evidences,
+            weights=dict(confidence_factors),
+            thesis_type='ScorerLine',
+            suggested_line=self.suggest_points_line(player_ctx)
+        )
     
-    def generate_value_hunter_thesis(self, player_ctx: Dict, game_ctx: Dict) -> Optional[Dict]:
+    def generate_value_hunter_thesis(self, player_ctx: Dict, game_ctx: Dict,
+                                     game: Optional[GameScalars] = None,
+                                     min_confidence: Optional[float] = None) -> Optional['Thesis']:
         """
         Gera tese ValueHunter: bench/rotation + bom PRA/min + minutos previstos crescentes
         """
+        if game is None:
+            game = self._game_scalars(game_ctx)
         role = player_ctx.get('role', 'bench')
         
         # Foca em bench/rotation
@@ -327,155 +587,144 @@ class ThesisEngine:
         if min_avg < 15:
             return None
         
-        evidences = []
-        confidence_factors = []
-        
         # 1. PRA por minuto
         pra = player_ctx.get('pra', 0)
         pra_per_min = pra / min_avg if min_avg > 0 else 0
-        
-        if pra_per_min > 0.8:
-            pra_factor = 1.0 + (pra_per_min - 0.8) * 0.5
-            confidence_factors.append(('Efficiency', min(pra_factor, 1.3)))
-            evidences.append(f"PRA/min alto: {pra_per_min:.2f}")
+        pra_factor = 1.0 + (pra_per_min - 0.8) * 0.5 if pra_per_min > 0.8 else 1.0
+        pra_factor = 1.3 if pra_factor > 1.3 else pra_factor
         
         # 2. Tendência de minutos
         last_5_min = player_ctx.get('last_5_min_avg', min_avg)
-        if last_5_min > min_avg * 1.1:
-            trend_factor = 1.2
-            evidences.append(f"Minutos crescentes: {last_5_min:.1f} últimos 5 jogos")
-        else:
-            trend_factor = 1.0
-        confidence_factors.append(('Trend', trend_factor))
+        trend_factor = 1.2 if last_5_min > min_avg * 1.1 else 1.0
         
         # 3. Spread do jogo (possível garbage time)
-        spread = abs(game_ctx.get('spread', 0))
-        if spread > self.thresholds['big_spread']:
-            garbage_factor = 1.15
-            evidences.append(f"Spread alto pode gerar garbage time: {spread}")
-        else:
-            garbage_factor = 1.0
-        confidence_factors.append(('GameContext', garbage_factor))
+        garbage_factor = 1.15 if game.big_spread else 1.0
         
         # 4. Player class (bench specialists)
-        player_class = player_ctx.get('player_class', '')
-        if 'BENCH' in player_class or 'SPARK' in player_class:
-            class_factor = 1.15
+        bench_specialist = self._player_profile(player_ctx)[1] & BENCH_TAGS
+        class_factor = 1.15 if bench_specialist else 1.0
+        
+        # Calcula confiança (base mais baixa por ser bench)
+        confidence = _r2(_score(
+            np.array([pra_factor, trend_factor, garbage_factor, class_factor]),
+            VALUE_HUNTER_WEIGHTS, 0.45, VALUE_HUNTER_MULT
+        ))
+        if min_confidence is not None and confidence <= min_confidence:
+            return None
+        
+        # Evidências e pesos (mesma ordem dos fatores)
+        evidences = []
+        confidence_factors = []
+        if pra_per_min > 0.8:
+            confidence_factors.append(('Efficiency', pra_factor))
+            evidences.append(f"PRA/min alto: {pra_per_min:.2f}")
+        if last_5_min > min_avg * 1.1:
+            evidences.append(f"Minutos crescentes: {last_5_min:.1f} últimos 5 jogos")
+        confidence_factors.append(('Trend', trend_factor))
+        if game.big_spread:
+            evidences.append(f"Spread alto pode gerar garbage time: {game.spread_abs}")
+        confidence_factors.append(('GameContext', garbage_factor))
+        if bench_specialist:
             evidences.append(f"Perfil de bench specialist")
-        else:
-            class_factor = 1.0
         confidence_factors.append(('PlayerClass', class_factor))
         
-        # Calcula confiança
-        base_confidence = 0.45  # Mais baixo por ser bench
-        for factor_type, value in confidence_factors:
-            base_confidence += (value - 1.0) * 0.2
-        
-        confidence = min(max(base_confidence * self.confidence_multipliers['ValueHunter'], 0), 1)
-        
-        return {
-            'player': player_ctx['name'],
-            'player_id': player_ctx.get('id', ''),
-            'market': 'PRA',
-            'confidence': round(confidence, 2),
-            'reason': f"{player_ctx['name']} ({role}) com bom valor PRA/min e potencial de minutos",
-            'evidences': evidences,
-            'weights': {k: v for k, v in confidence_factors},
-            'thesis_type': 'ValueHunter',
-            'suggested_line': self.suggest_pra_line(player_ctx)
-        }
+        return Thesis(
+            player=player_ctx['name'],
+            player_id=player_ctx.get('id', ''),
+            market='PRA',
+            confidence=confidence,
+            reason=f"{player_ctx['name']} ({role}) com bom valor PRA/min e potencial de minutos",
+            evidences=evidences,
+            weights=dict(confidence_factors),
+            thesis_type='ValueHunter',
+            suggested_line=self.suggest_pra_line(player_ctx)
+        )
     
-    def generate_pace_boost_thesis(self, player_ctx: Dict, game_ctx: Dict) -> Optional[Dict]:
+    def generate_pace_boost_thesis(self, player_ctx: Dict, game_ctx: Dict,
+                                   game: Optional[GameScalars] = None,
+                                   min_confidence: Optional[float] = None) -> Optional['Thesis']:
         """
         Gera tese PaceBoost: jogadores beneficiados por ritmo acelerado
         """
-        pace = game_ctx.get('pace', 100)
-        
+        if game is None:
+            game = self._game_scalars(game_ctx)
         # Só ativa se pace for realmente alto
-        if pace < self.thresholds['high_pace']:
+        if not game.pace_boost_active:
             return None
+        pace = game.pace
         
-        player_class = player_ctx.get('player_class', '')
-        
-        # Tipos de jogadores beneficiados por pace alto
-        pace_benefited = ['RUNNER', 'TRANSITION', 'ATHLETIC', 'YOUNG']
-        if not any(benefit in player_class for benefit in pace_benefited):
+        # Tipos de jogadores beneficiados por pace alto (RUNNER, TRANSITION, ATHLETIC, YOUNG)
+        pos, bits = self._player_profile(player_ctx)
+        if not bits & PACE_TAGS:
             return None
         
-        evidences = []
-        confidence_factors = []
-        
         # 1. Fator pace
-        pace_factor = 1.0 + (pace - 100) * 0.01
-        confidence_factors.append(('Pace', min(pace_factor, 1.3)))
-        evidences.append(f"Pace muito alto: {pace:.1f}")
+        pace_factor = game.pace_factor
         
         # 2. Estatísticas em jogos de pace alto
         # (aqui poderia ter dados históricos, usando placeholder)
         pace_matchup_factor = 1.1
-        confidence_factors.append(('Matchup', pace_matchup_factor))
-        evidences.append("Perfil beneficiado por jogo rápido")
         
         # 3. Posição (guards e wings se beneficiam mais)
-        pos = self.get_player_position(player_ctx['name'], player_ctx.get('pos', ''))
         if pos in ['PG', 'SG']:
             pos_factor = 1.1
         elif pos in ['SF']:
             pos_factor = 1.05
         else:
             pos_factor = 1.0
-        confidence_factors.append(('Position', pos_factor))
+        
+        # Calcula confiança
+        confidence = _r2(_score(
+            np.array([pace_factor, pace_matchup_factor, pos_factor]),
+            PACE_BOOST_WEIGHTS, 0.5, PACE_BOOST_MULT
+        ))
+        if min_confidence is not None and confidence <= min_confidence:
+            return None
         
         # Determina mercado mais beneficiado
-        if 'PASS' in player_class or 'PLAYMAKER' in player_class:
+        if bits & PASSING_TAGS:
             market = 'AST'
             suggested_line = self.suggest_assist_line(player_ctx)
-        elif 'SCORER' in player_class:
+        elif bits & TAG_BITS['SCORER']:
             market = 'PTS'
             suggested_line = self.suggest_points_line(player_ctx)
         else:
             market = 'PRA'
             suggested_line = self.suggest_pra_line(player_ctx)
         
-        # Calcula confiança
-        base_confidence = 0.5
-        for factor_type, value in confidence_factors:
-            base_confidence += (value - 1.0) * 0.25
-        
-        confidence = min(max(base_confidence * self.confidence_multipliers['PaceBoost'], 0), 1)
-        
-        return {
-            'player': player_ctx['name'],
-            'player_id': player_ctx.get('id', ''),
-            'market': market,
-            'confidence': round(confidence, 2),
-            'reason': f"{player_ctx['name']} beneficiado pelo pace alto do jogo ({pace})",
-            'evidences': evidences,
-            'weights': {k: v for k, v in confidence_factors},
-            'thesis_type': 'PaceBoost',
-            'suggested_line': suggested_line
-        }
+        return Thesis(
+            player=player_ctx['name'],
+            player_id=player_ctx.get('id', ''),
+            market=market,
+            confidence=confidence,
+            reason=f"{player_ctx['name']} beneficiado pelo pace alto do jogo ({pace})",
+            evidences=[f"Pace muito alto: {pace:.1f}", "Perfil beneficiado por jogo rápido"],
+            weights={'Pace': pace_factor, 'Matchup': pace_matchup_factor, 'Position': pos_factor},
+            thesis_type='PaceBoost',
+            suggested_line=suggested_line
+        )
     
-    def generate_blowout_risk_thesis(self, player_ctx: Dict, game_ctx: Dict) -> Optional[Dict]:
+    def generate_blowout_risk_thesis(self, player_ctx: Dict, game_ctx: Dict,
+                                     game: Optional[GameScalars] = None,
+                                     min_confidence: Optional[float] = None) -> Optional['Thesis']:
         """
         Gera tese BlowoutRisk: penaliza linhas em grande spread
-        """
-        spread = abs(game_ctx.get('spread', 0))
         
+        É um alerta, não uma recomendação: min_confidence é ignorado.
+        """
+        if game is None:
+            game = self._game_scalars(game_ctx)
         # Só ativa para spread muito alto
-        if spread < self.thresholds['big_spread']:
+        if not game.blowout_active:
             return None
+        spread = game.spread_abs
         
-        # Identifica qual time está perdendo por muito
+        # Determina se o jogador está no time underdog (perdendo por muito)
         player_team = player_ctx.get('team', '')
-        home_team = game_ctx.get('home_team', '')
-        away_team = game_ctx.get('away_team', '')
-        
-        # Determina se o jogador está no time underdog
         is_underdog = False
-        if player_team == home_team and game_ctx.get('spread', 0) > 0:
+        if player_team == game.home_team and game.spread > 0:
             is_underdog = True
-        elif player_team == away_team and game_ctx.get('spread', 0) < 0:
+        elif player_team == game.away_team and game.spread < 0:
             is_underdog = True
         
         evidences = []
@@ -499,150 +748,393 @@ class ThesisEngine:
         evidences.append(f"Spread muito alto: {spread}")
         
         # Calcula confiança (esta tese gera penalidades, não recomendações)
-        confidence = 0.3  # Baixa confiança para apostar
-        
-        return {
-            'player': player_ctx['name'],
-            'player_id': player_ctx.get('id', ''),
-            'market': 'RISK',
-            'confidence': round(confidence, 2),
-            'reason': f"Alerta de blowout risk para {player_ctx['name']} (spread: {spread})",
-            'evidences': evidences,
-            'weights': {k: v for k, v in confidence_factors},
-            'thesis_type': 'BlowoutRisk',
-            'suggested_line': None,
-            'is_risk': True
-        }
+        confidence = BLOWOUT_RISK_CONFIDENCE  # Baixa confiança para apostar
+        
+        return Thesis(
+            player=player_ctx['name'],
+            player_id=player_ctx.get('id', ''),
+            market='RISK',
+            confidence=_r2(confidence),
+            reason=f"Alerta de blowout risk para {player_ctx['name']} (spread: {spread})",
+            evidences=evidences,
+            weights=dict(confidence_factors),
+            thesis_type='BlowoutRisk',
+            suggested_line=None,
+            is_risk=True
+        )
     
     # Métodos auxiliares para sugerir linhas
+    def _suggest_line(self, player_ctx: Dict, market: str) -> float:
+        """Linha sugerida: max(média da temporada, últimos 5) ajustada pelo role"""
+        season_key, last_5_key = LINE_STATS[market]
+        season = player_ctx.get(season_key, 0)
+        recent_form = max(season, player_ctx.get(last_5_key, season))
+        multiplier = ROLE_LINE_MULTIPLIERS.get(player_ctx.get('role', 'bench'), DEFAULT_LINE_MULTIPLIER)
+        return _r1(recent_form * multiplier)
+    
     def suggest_points_line(self, player_ctx: Dict) -> float:
         """Sugere linha de pontos baseado na média e momentum"""
-        season_ppg = player_ctx.get('ppg', 0)
-        last_5_ppg = player_ctx.get('last_5_ppg', season_ppg)
-        recent_form = max(season_ppg, last_5_ppg)
-        
-        # Ajusta baseado no role
-        role = player_ctx.get('role', 'bench')
-        if role == 'starter':
-            multiplier = 1.0
-        elif role == 'rotation':
-            multiplier = 0.9
-        else:
-            multiplier = 0.8
-        
-        return round(recent_form * multiplier, 1)
+        return self._suggest_line(player_ctx, 'PTS')
     
     def suggest_rebound_line(self, player_ctx: Dict) -> float:
         """Sugere linha de rebotes"""
-        season_rpg = player_ctx.get('rpg', 0)
-        last_5_rpg = player_ctx.get('last_5_rpg', season_rpg)
-        recent_form = max(season_rpg, last_5_rpg)
-        
-        role = player_ctx.get('role', 'bench')
-        if role == 'starter':
-            multiplier = 1.0
-        elif role == 'rotation':
-            multiplier = 0.9
-        else:
-            multiplier = 0.8
-        
-        return round(recent_form * multiplier, 1)
+        return self._suggest_line(player_ctx, 'REB')
     
     def suggest_assist_line(self, player_ctx: Dict) -> float:
         """Sugere linha de assistências"""
-        season_apg = player_ctx.get('apg', 0)
-        last_5_apg = player_ctx.get('last_5_apg', season_apg)
-        recent_form = max(season_apg, last_5_apg)
-        
-        role = player_ctx.get('role', 'bench')
-        if role == 'starter':
-            multiplier = 1.0
-        elif role == 'rotation':
-            multiplier = 0.9
-        else:
-            multiplier = 0.8
-        
-        return round(recent_form * multiplier, 1)
+        return self._suggest_line(player_ctx, 'AST')
     
     def suggest_pra_line(self, player_ctx: Dict) -> float:
         """Sugere linha de PRA"""
-        season_pra = player_ctx.get('pra', 0)
-        last_5_pra = player_ctx.get('last_5_pra', season_pra)
-        recent_form = max(season_pra, last_5_pra)
-        
-        role = player_ctx.get('role', 'bench')
-        if role == 'starter':
-            multiplier = 1.0
-        elif role == 'rotation':
-            multiplier = 0.9
-        else:
-            multiplier = 0.8
-        
-        return round(recent_form * multiplier, 1)
+        return self._suggest_line(player_ctx, 'PRA')
     
-    def generate_all_theses(self, player_ctx: Dict, game_ctx: Dict) -> List[Dict]:
+    def suggest_lines(self, players_df: pd.DataFrame) -> pd.DataFrame:
         """
-        Gera todas as teses possíveis para um jogador
-        Retorna lista ordenada por confiança
+        Linhas sugeridas de PTS/REB/AST/PRA para todos os jogadores de uma vez
+        
+        Args:
+            players_df: jogadores com as colunas de média (ppg, rpg, apg, pra) e last_5_*
+        
+        Returns:
+            DataFrame com uma coluna por mercado, alinhado ao índice de players_df
         """
-        theses = []
+        role = self._text_column(players_df, 'role', 'bench')
+        multiplier = role.map(ROLE_LINE_MULTIPLIERS).fillna(DEFAULT_LINE_MULTIPLIER).to_numpy(dtype=float)
+        
+        lines = {}
+        for market, (season_key, last_5_key) in LINE_STATS.items():
+            season = self._numeric_column(players_df, season_key, 0.0)
+            last_5 = self._numeric_column(players_df, last_5_key, np.nan).fillna(season)
+            recent_form = np.maximum(season.to_numpy(dtype=float), last_5.to_numpy(dtype=float))
+            lines[market] = _round_half_up(recent_form * multiplier, 1)
         
-        # Gera cada tipo de tese
-        thesis_generators = [
+        return pd.DataFrame(lines, index=players_df.index)
+    
+    def _thesis_generators(self) -> Tuple:
+        """Geradores de tese na ordem fixa usada por generate_all_theses e process_game"""
+        return (
             self.generate_big_rebound_thesis,
             self.generate_assist_matchup_thesis,
             self.generate_scorer_line_thesis,
             self.generate_value_hunter_thesis,
             self.generate_pace_boost_thesis,
             self.generate_blowout_risk_thesis
+        )
+    
+    def _game_scalars(self, game_ctx: Dict) -> GameScalars:
+        """Extrai pace/spread/total/times do contexto e pré-avalia os limites do jogo"""
+        pace = game_ctx.get('pace', 100)
+        spread = game_ctx.get('spread', 0)
+        spread_abs = abs(spread)
+        pace_factor = 1.0 + (pace - 100) * 0.01
+        return GameScalars(
+            pace=pace,
+            spread=spread,
+            spread_abs=spread_abs,
+            total=game_ctx.get('total', 220),
+            home_team=game_ctx.get('home_team', ''),
+            away_team=game_ctx.get('away_team', ''),
+            high_pace=pace > HIGH_PACE,
+            pace_boost_active=not pace < HIGH_PACE,
+            big_spread=spread_abs > BIG_SPREAD,
+            blowout_active=not spread_abs < BIG_SPREAD,
+            pace_factor=1.3 if pace_factor > 1.3 else pace_factor
+        )
+    
+    @staticmethod
+    def _rank_theses(theses: List[Thesis]) -> List[Thesis]:
+        """Ordena por confiança (decrescente, estável) e limita a 3 teses por jogador"""
+        theses.sort(key=lambda x: x.confidence, reverse=True)
+        return theses[:MAX_THESES_PER_PLAYER]
+    
+    def generate_all_theses(self, player_ctx: Dict, game_ctx: Dict) -> List[Thesis]:
+        """
+        Gera todas as teses possíveis para um jogador
+        Retorna lista ordenada por confiança
+        
+        O resultado é memoizado pelos campos que os geradores leem; cada chamada
+        recebe cópias próprias das teses (evidences/weights incluídos).
+        """
+        pos, bits = self._player_profile(player_ctx)
+        player_key = _cache_key(
+            [player_ctx.get(field, _MISSING) for field in THESIS_PLAYER_FIELDS] + [pos, bits]
+        )
+        game_key = _cache_key(self._game_scalars(game_ctx))
+        try:
+            theses = self._cached_theses(player_key, game_key)
+        except TypeError:
+            # Campo não hashable no contexto: avalia sem cache
+            theses = self._evaluate_theses(player_key, game_key, player_ctx)
+        
+        return [
+            replace(thesis, evidences=list(thesis.evidences), weights=dict(thesis.weights))
+            for thesis in theses
         ]
+    
+    def _evaluate_theses(self, player_key: Tuple, game_key: Tuple,
+                         player_ctx: Optional[Dict] = None) -> Tuple[Thesis, ...]:
+        """
+        Avalia os seis geradores para um jogador, filtra e ranqueia
+        
+        Args:
+            player_key: chave de generate_all_theses (campos, posição e bits)
+            game_key: GameScalars do jogo como chave
+            player_ctx: contexto original, usado quando a chave não é hashable
+        
+        Returns:
+            Até 3 teses ordenadas por confiança
+        """
+        values = [value for _, value in player_key]
+        if player_ctx is None:
+            player_ctx = {
+                field: value for field, value in zip(THESIS_PLAYER_FIELDS, values)
+                if value is not _MISSING
+            }
+            # A chave guarda a posição já resolvida (override aplicado de novo dá o mesmo valor)
+            player_ctx['pos'] = values[-2]
+        game = GameScalars(*(value for _, value in game_key))
         
-        for generator in thesis_generators:
-            thesis = generator(player_ctx, game_ctx)
+        theses = []
+        for generator in self._thesis_generators():
+            thesis = generator(player_ctx, None, game, MIN_CONFIDENCE)
             if thesis:
                 # Filtra teses com confiança muito baixa
-                if thesis.get('confidence', 0) > 0.4 or thesis.get('thesis_type') == 'BlowoutRisk':
+                if thesis.confidence > MIN_CONFIDENCE or thesis.thesis_type == 'BlowoutRisk':
                     theses.append(thesis)
         
-        # Ordena por confiança (decrescente)
-        theses.sort(key=lambda x: x['confidence'], reverse=True)
+        return tuple(self._rank_theses(theses))
+    
+    @staticmethod
+    def _numeric_column(df: pd.DataFrame, column: str, default) -> pd.Series:
+        """Coluna numérica com o mesmo default de player_ctx.get(column, default)"""
+        if column not in df:
+            return pd.Series(default, index=df.index, dtype=float)
+        return pd.to_numeric(df[column], errors='coerce').fillna(default)
+    
+    @staticmethod
+    def _text_column(df: pd.DataFrame, column: str, default: str = '') -> pd.Series:
+        """Coluna de texto com o mesmo default de player_ctx.get(column, default)"""
+        if column not in df:
+            return pd.Series(default, index=df.index, dtype=object)
+        return df[column].fillna(default).astype(str)
+    
+    def _soa_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Extrai do DataFrame do jogo um array contíguo por campo (layout SoA).
+        
+        Campos ausentes ou NaN recebem o mesmo default que os geradores usam
+        via player_ctx.get; posição (com overrides) e bits de classe são
+        resolvidos aqui uma única vez.
+        """
+        cols = {
+            column: self._numeric_column(df, column, default).to_numpy(dtype=float)
+            for column, default in SCREEN_COLUMNS.items()
+        }
+        last_5_min = self._numeric_column(df, 'last_5_min_avg', np.nan).to_numpy(dtype=float)
+        cols['last_5_min_avg'] = np.where(np.isnan(last_5_min), cols['min_avg'], last_5_min)
+        
+        name = self._text_column(df, 'name')
+        cols['pos'] = name.map(self.position_overrides).fillna(self._text_column(df, 'pos')).to_numpy()
+        cols['role'] = self._text_column(df, 'role', 'bench').to_numpy()
+        
+        # Bitmask de tags por jogador, calculado uma vez para todas as teses
+        player_class = self._text_column(df, 'player_class')
+        cols['bits'] = np.bitwise_or.reduce([
+            np.where(player_class.str.contains(tag, regex=False), bit, 0)
+            for tag, bit in TAG_BITS.items()
+        ])
+        return cols
+    
+    def _eligibility_matrix(self, cols: Dict[str, np.ndarray], game: GameScalars) -> np.ndarray:
+        """
+        Portões de elegibilidade (posição, classe, role e contexto do jogo) de cada tese.
+        
+        Returns:
+            Matriz booleana (N, 6) nas colunas BIG_REBOUND..BLOWOUT_RISK
+        """
+        pos, bits = cols['pos'], cols['bits']
+        eligible = np.zeros((len(pos), N_THESES), dtype=bool)
+        eligible[:, BIG_REBOUND] = np.isin(pos, ['PF', 'C']) & ((bits & REBOUND_TAGS) != 0)
+        eligible[:, ASSIST_MATCHUP] = np.isin(pos, ['PG', 'SG']) & ((bits & PLAYMAKING_TAGS) != 0)
+        eligible[:, SCORER_LINE] = np.isin(pos, ['SG', 'SF']) & ((bits & SCORING_TAGS) != 0)
+        eligible[:, VALUE_HUNTER] = np.isin(cols['role'], ['bench', 'rotation']) & (cols['min_avg'] >= 15)
+        if game.pace_boost_active:
+            eligible[:, PACE_BOOST] = (bits & PACE_TAGS) != 0
+        if game.blowout_active:
+            eligible[:, BLOWOUT_RISK] = True
+        return eligible
+    
+    @staticmethod
+    def _passing_confidence(confidence: np.ndarray) -> np.ndarray:
+        """Confiança arredondada como nas teses; -inf onde não passa o corte"""
+        rounded = _round_half_up(confidence, 2)
+        return np.where(rounded > MIN_CONFIDENCE, rounded, -np.inf)
+    
+    def _screen_theses(self, cols: Dict[str, np.ndarray], game: GameScalars) -> np.ndarray:
+        """
+        Avalia as seis teses em lote sobre os arrays SoA do jogo.
+        
+        A confiança só é calculada para os pares jogador x tese que passam a
+        matriz de elegibilidade, reproduzindo a aritmética dos geradores (mesma
+        ordem de soma dos fatores) e o mesmo arredondamento.
+        
+        Returns:
+            Matriz (N, 6) com a confiança de cada par aprovado e -inf nos demais
+        """
+        passing = self._eligibility_matrix(cols, game)
+        scores = np.full(passing.shape, -np.inf)
+        
+        # BigRebound: PF/C reboteiros
+        rows = np.flatnonzero(passing[:, BIG_REBOUND])
+        if rows.size:
+            dvp_reb, usage = cols['dvp_reb'][rows], cols['usg'][rows]
+            factors = np.column_stack([
+                np.where(dvp_reb > 1.0, 1.0 + (dvp_reb - 1.0) * 0.3, 1.0),
+                np.full(rows.size, game.pace_factor if game.high_pace else 1.0),
+                np.where(cols['role'][rows] == 'starter', 1.0, 0.9),
+                np.where(cols['bits'][rows] & TAG_BITS['GLASS_BANGER'], 1.2, 1.0),
+                np.where(usage > MIN_USAGE, np.minimum(1.0 + (usage - 18) * 0.01, 1.2), 1.0)
+            ])
+            confidence = _score_rows(factors, BIG_REBOUND_WEIGHTS, 0.5, BIG_REBOUND_MULT)
+            scores[rows, BIG_REBOUND] = self._passing_confidence(confidence)
+        
+        # AssistMatchup: armadores em jogo parelho
+        rows = np.flatnonzero(passing[:, ASSIST_MATCHUP])
+        if rows.size:
+            ast_pct, dvp_ast = cols['ast_pct'][rows], cols['dvp_ast'][rows]
+            factors = np.column_stack([
+                np.where(ast_pct > 20, np.minimum(1.0 + (ast_pct - 20) * 0.01, 1.3), 1.0),
+                np.where(dvp_ast > 1.0, 1.0 + (dvp_ast - 1.0) * 0.3, 1.0),
+                np.where(cols['role'][rows] == 'starter', 1.1, 0.9)
+            ])
+            confidence = _score_rows(factors, ASSIST_MATCHUP_WEIGHTS, 0.5, ASSIST_MATCHUP_MULT)
+            scores[rows, ASSIST_MATCHUP] = self._passing_confidence(confidence)
+        
+        # ScorerLine: alas pontuadores
+        rows = np.flatnonzero(passing[:, SCORER_LINE])
+        if rows.size:
+            dvp_pts, usage = cols['dvp_pts'][rows], cols['usg'][rows]
+            factors = np.column_stack([
+                np.where(dvp_pts > 1.0, 1.0 + (dvp_pts - 1.0) * 0.3, 1.0),
+                np.where(usage > 22, np.minimum(1.0 + (usage - 22) * 0.015, 1.3), 1.0),
+                np.where(cols['bits'][rows] & TAG_BITS['SCORER'], 1.2, 1.0)
+            ])
+            confidence = _score_rows(factors, SCORER_LINE_WEIGHTS, 0.55, SCORER_LINE_MULT)
+            scores[rows, SCORER_LINE] = self._passing_confidence(confidence)
+        
+        # ValueHunter: bench/rotation com minutos (min_avg >= 15 garantido pelo portão)
+        rows = np.flatnonzero(passing[:, VALUE_HUNTER])
+        if rows.size:
+            min_avg = cols['min_avg'][rows]
+            pra_per_min = cols['pra'][rows] / min_avg
+            factors = np.column_stack([
+                np.where(pra_per_min > 0.8, np.minimum(1.0 + (pra_per_min - 0.8) * 0.5, 1.3), 1.0),
+                np.where(cols['last_5_min_avg'][rows] > min_avg * 1.1, 1.2, 1.0),
+                np.full(rows.size, 1.15 if game.big_spread else 1.0),
+                np.where(cols['bits'][rows] & BENCH_TAGS, 1.15, 1.0)
+            ])
+            confidence = _score_rows(factors, VALUE_HUNTER_WEIGHTS, 0.45, VALUE_HUNTER_MULT)
+            scores[rows, VALUE_HUNTER] = self._passing_confidence(confidence)
+        
+        # PaceBoost: só com pace alto
+        rows = np.flatnonzero(passing[:, PACE_BOOST])
+        if rows.size:
+            pos = cols['pos'][rows]
+            factors = np.column_stack([
+                np.full(rows.size, game.pace_factor),
+                np.full(rows.size, 1.1),
+                np.select([np.isin(pos, ['PG', 'SG']), pos == 'SF'], [1.1, 1.05], 1.0)
+            ])
+            confidence = _score_rows(factors, PACE_BOOST_WEIGHTS, 0.5, PACE_BOOST_MULT)
+            scores[rows, PACE_BOOST] = self._passing_confidence(confidence)
+        
+        # BlowoutRisk: alerta para todos quando o spread é muito alto (sem corte de confiança)
+        scores[passing[:, BLOWOUT_RISK], BLOWOUT_RISK] = BLOWOUT_RISK_CONFIDENCE
+        return scores
+    
+    @staticmethod
+    def _top_theses(scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Seleciona as até 3 melhores teses de cada jogador com np.argpartition
+        
+        A chave inteira (confiança em centésimos, desempate pela ordem dos
+        geradores) reproduz a ordenação estável de _rank_theses.
         
-        # Limita a 3 teses por jogador
-        return theses[:3]
+        Returns:
+            (colunas (N, 3) em ordem decrescente, máscara (N, 3) das posições válidas)
+        """
+        tie_break = N_THESES - 1 - np.arange(N_THESES)
+        keys = np.where(np.isfinite(scores), np.rint(scores * 100) * N_THESES + tie_break, -1)
+        top = np.argpartition(-keys, kth=MAX_THESES_PER_PLAYER - 1, axis=1)[:, :MAX_THESES_PER_PLAYER]
+        order = np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return top, np.take_along_axis(keys, top, axis=1) >= 0
     
-    def process_game(self, players_data: List[Dict], game_ctx: Dict) -> Dict[str, List[Dict]]:
+    def process_game(self, players_data: List[Dict], game_ctx: Dict) -> Dict[str, List[Thesis]]:
         """
         Processa todos os jogadores de um jogo e retorna teses organizadas
         """
+        if not players_data:
+            return {}
+        return self._process_frame(pd.DataFrame(players_data), game_ctx, players_data)
+    
+    def process_game_batch(self, players_df: pd.DataFrame, game_ctx: Dict) -> Dict[str, List[Thesis]]:
+        """
+        Versão de process_game para jogadores já organizados em DataFrame (uma coluna por campo)
+        
+        Valores NaN são tratados como campo ausente, recebendo o default dos geradores.
+        """
+        if players_df is None or players_df.empty:
+            return {}
+        return self._process_frame(players_df, game_ctx)
+    
+    def _process_frame(self, df: pd.DataFrame, game_ctx: Dict,
+                       players_data: Optional[List[Dict]] = None) -> Dict[str, List[Thesis]]:
+        """
+        Triagem vetorizada das seis teses, top-3 por jogador e materialização só das selecionadas
+        
+        Args:
+            df: jogadores do jogo, uma linha por jogador
+            game_ctx: contexto do jogo
+            players_data: dicts originais alinhados a df (se None, usa as linhas de df)
+        
+        Returns:
+            Dict jogador -> até 3 teses ordenadas por confiança
+        """
+        game = self._game_scalars(game_ctx)
+        cols = self._soa_columns(df)
+        top, valid = self._top_theses(self._screen_theses(cols, game))
+        rows = np.flatnonzero(valid[:, 0])
+        
+        if players_data is None:
+            contexts = [
+                {k: v for k, v in record.items() if not (isinstance(v, float) and v != v)}
+                for record in df.iloc[rows].to_dict('records')
+            ]
+        else:
+            contexts = [players_data[row] for row in rows]
+        
+        generators = self._thesis_generators()
         all_theses = {}
         
-        for player_ctx in players_data:
-            player_name = player_ctx.get('name', 'Unknown')
-            player_theses = self.generate_all_theses(player_ctx, game_ctx)
-            
-            if player_theses:
-                all_theses[player_name] = player_theses
+        for row, player_ctx in zip(rows, contexts):
+            # Só as teses selecionadas são materializadas, já na ordem final
+            theses = [generators[col](player_ctx, game_ctx, game) for col in top[row][valid[row]]]
+            all_theses[player_ctx.get('name', 'Unknown')] = theses
         
         return all_theses
     
-    def get_thesis_summary(self, theses_data: Dict[str, List[Dict]]) -> pd.DataFrame:
+    def get_thesis_summary(self, theses_data: Dict[str, List[Thesis]]) -> pd.DataFrame:
         """
         Retorna resumo das teses em DataFrame para análise
         """
-        rows = []
-        for player, player_theses in theses_data.items():
-            for thesis in player_theses:
-                rows.append({
-                    'Player': player,
-                    'Thesis': thesis['thesis_type'],
-                    'Market': thesis['market'],
-                    'Confidence': thesis['confidence'],
-                    'Reason': thesis['reason'],
-                    'Evidences': '; '.join(thesis['evidences']),
-                    'Suggested Line': thesis.get('suggested_line', 'N/A')
-                })
-        
-        return pd.DataFrame(rows)
+        records = (
+            (player, thesis.thesis_type, thesis.market, thesis.confidence, thesis.reason,
+             '; '.join(thesis.evidences), thesis.suggested_line)
+            for player, player_theses in theses_data.items()
+            for thesis in player_theses
+        )
+        return pd.DataFrame.from_records(records, columns=SUMMARY_COLUMNS)
 
 
 # Função de exemplo para teste
@@ -696,6 +1188,34 @@ def test_thesis_engine():
     return theses
 
 
+def test_thesis_engine_nan_context():
+    """Contexto com pace/usg NaN: confiança NaN é descartada pelo filtro, sem exceção"""
+    engine = ThesisEngine()
+    
+    player_ctx = {
+        'name': 'Bam Adebayo',
+        'pos': 'C',
+        'role': 'starter',
+        'min_avg': 34.5,
+        'usg': float('nan'),
+        'ppg': 20.5,
+        'rpg': 9.2,
+        'apg': 3.8,
+        'dvp_reb': 1.15,
+        'player_class': 'GLASS_BANGER',
+        'team': 'MIA'
+    }
+    game_ctx = {'home_team': 'MIA', 'away_team': 'BOS', 'pace': float('nan'), 'spread': -3.5}
+    
+    theses = engine.generate_all_theses(player_ctx, game_ctx)
+    assert all(thesis['confidence'] == thesis['confidence'] for thesis in theses)
+    assert _r2(float('nan')) != _r2(float('nan'))
+    assert _r2(float('inf')) == float('inf')
+    
+    return theses
+
+
 if __name__ == "__main__":
     # Teste do módulo
-    test_thesis_engine()
\ No newline at end of file
+    test_thesis_engine()
+    test_thesis_engine_nan_context()
\ No newline at end of file
@@ -3,7 +3,20 @@ Vacuum Matrix Module (FASE 1B)
 Detecta e aplica boost quando jogadores-chave estão ausentes
 """
 
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Stats recentes multiplicados pelo boost do vacuum
+STATS_TO_BOOST = ('pts_L5', 'reb_L5', 'ast_L5', 'pra_L5')
+
+
 class VacuumMatrixAnalyzer:
+    # Mesma semântica de substring do scan antigo ("ir" casa dentro de qualquer palavra)
+    _STATUS_OUT_RE = re.compile(r"out|injured|ir", re.IGNORECASE)
+    
     def __init__(self, injury_monitor=None):
         self.injury_monitor = injury_monitor
         
@@ -14,38 +27,37 @@ class VacuumMatrixAnalyzer:
         if not team_roster:
             return {}
         
-        # Identificar titulares ausentes
+        # Passada única: titulares ausentes + índice posição -> substitutos disponíveis
         absent_starters = []
+        substitutes_by_position = defaultdict(list)
         for player in team_roster:
-            if player.get("STARTER") and self._is_player_out(player):
-                absent_starters.append({
-                    "name": player.get("PLAYER"),
-                    "position": player.get("POSITION", "").upper()
-                })
+            position = player.get("POSITION", "").upper()
+            if player.get("STARTER"):
+                if self._is_player_out(player):
+                    absent_starters.append({
+                        "name": player.get("PLAYER"),
+                        "position": position
+                    })
+            elif not self._is_player_out(player):
+                substitutes_by_position[position].append(player.get("PLAYER"))
         
         if not absent_starters:
             return {}
         
-        # Mapear substitutos potenciais
+        # Mapear substitutos potenciais (só a posição do titular, não o elenco inteiro)
         vacuum_opportunities = {}
         
         for starter in absent_starters:
             position = starter["position"]
             
-            # Procurar substitutos na mesma posição
-            for player in team_roster:
-                if (player.get("POSITION", "").upper() == position and 
-                    not player.get("STARTER") and 
-                    not self._is_player_out(player)):
-                    
-                    player_name = player.get("PLAYER")
-                    if player_name not in vacuum_opportunities:
-                        vacuum_opportunities[player_name] = {
-                            "reason": f"Substituto de {starter['name']}",
-                            "boost": 1.25,  # 25% boost inicial
-                            "absent_starter": starter["name"],
-                            "position": position
-                        }
+            for player_name in substitutes_by_position.get(position, ()):
+                if player_name not in vacuum_opportunities:
+                    vacuum_opportunities[player_name] = {
+                        "reason": f"Substituto de {starter['name']}",
+                        "boost": 1.25,  # 25% boost inicial
+                        "absent_starter": starter["name"],
+                        "position": position
+                    }
         
         return vacuum_opportunities
     
@@ -59,8 +71,7 @@ class VacuumMatrixAnalyzer:
             boost_info = vacuum_data[player_name]
             
             # Aplicar boost aos stats
-            stats_to_boost = ['pts_L5', 'reb_L5', 'ast_L5', 'pra_L5']
-            for stat in stats_to_boost:
+            for stat in STATS_TO_BOOST:
                 if stat in player_ctx:
                     player_ctx[stat] = round(player_ctx[stat] * boost_info["boost"], 1)
             
@@ -74,7 +85,53 @@ class VacuumMatrixAnalyzer:
         
         return player_ctx
     
+    def apply_vacuum_boost_batch(self, players_df, vacuum_data):
+        """
+        Versão vetorizada de apply_vacuum_boost para o slate inteiro.
+        
+        Args:
+            players_df: DataFrame com coluna 'name' e stats L5
+            vacuum_data: saída de analyze_team_vacuum
+        
+        Returns:
+            Cópia do DataFrame com os stats boostados e a coluna 'vacuum_boost'
+            (metadata só nas linhas com vacuum)
+        """
+        if players_df is None or players_df.empty or not vacuum_data or "name" not in players_df.columns:
+            return players_df
+        
+        result = players_df.copy()
+        boost = result["name"].map({name: info["boost"] for name, info in vacuum_data.items()})
+        boosted = boost.notna().to_numpy()
+        if not boosted.any():
+            return result
+        
+        # Só as linhas com vacuum são multiplicadas/arredondadas, com o mesmo round()
+        # do caminho escalar (são poucos jogadores por slate)
+        factors = boost.to_numpy(dtype=float)[boosted]
+        for stat in STATS_TO_BOOST:
+            if stat in result.columns:
+                values = result[stat].to_numpy(dtype=float, copy=True)
+                values[boosted] = [round(v, 1) for v in (values[boosted] * factors).tolist()]
+                result[stat] = values
+        
+        if "vacuum_boost" in result.columns:
+            metadata = result["vacuum_boost"].to_numpy(dtype=object, copy=True)
+        else:
+            metadata = np.full(len(result), None, dtype=object)
+        names = result["name"].to_numpy(dtype=object)
+        for idx in np.flatnonzero(boosted):
+            boost_info = vacuum_data[names[idx]]
+            metadata[idx] = {
+                "active": True,
+                "boost_factor": boost_info["boost"],
+                "reason": boost_info["reason"],
+                "replaces": boost_info["absent_starter"]
+            }
+        result["vacuum_boost"] = metadata
+        
+        return result
+    
     def _is_player_out(self, player):
         """Verifica se jogador está fora"""
-        status = (player.get("STATUS") or "").lower()
-        return any(keyword in status for keyword in ["out", "injured", "ir"])
\ No newline at end of file
+        return bool(self._STATUS_OUT_RE.search(player.get("STATUS") or ""))
\ No newline at end of file
@@ -4,14 +4,21 @@
 Módulo player_context extraído do OficialDeep5.3.py
 Contém as funções:
  - build_player_ctx
+ - build_player_ctx_batch
  - build_player_ctx_super_enhanced
 
 Mantive a lógica idêntica, com proteções mínimas para imports (streamlit, DataEnhancer).
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import re
 import traceback
 
+import numpy as np
+import pandas as pd
+
+from modules.player_ctx_type import PlayerCtx
+
 # Tentativa de import streamlit (usado no super enhanced)
 try:
     import streamlit as st
@@ -27,6 +34,25 @@ try:
 except Exception:
     pass
 
+# Palavras-chave de status (o status já chega em minúsculas): uma única busca por regex
+_STATUS_OUT_RE = re.compile(r"out|ir|injur")
+_STATUS_ACTIVE_RE = re.compile(r"active|available")
+
+# Classificação por tabela: usage/volatility viram tiers 0-2 (low, medium, high),
+# role é indexado por starter*3 + usage_tier e style pela máscara das 4 condições
+# (bit 0 = rebounder, ... bit 3 = hustle; a de menor bit vence, como no if/elif)
+TIER_NAMES = ("low", "medium", "high")
+ROLE_TABLE = ("deep_bench", "rotation", "bench_scorer",   # reserva: usage low/medium/high
+              "deep_bench", "starter", "star")            # titular: usage low/medium/high
+STYLE_NAMES = ("rebounder", "playmaker", "scorer", "hustle")
+STYLE_TABLE = tuple(
+    next((STYLE_NAMES[bit] for bit in range(len(STYLE_NAMES)) if mask >> bit & 1), "role")
+    for mask in range(1 << len(STYLE_NAMES))
+)
+_TIER_NAMES_ARR = np.array(TIER_NAMES)
+_ROLE_TABLE_ARR = np.array(ROLE_TABLE)
+_STYLE_TABLE_ARR = np.array(STYLE_TABLE)
+
 # Nota: se o ambiente executar o main antes, variáveis como DATA_ENHANCER_AVAILABLE
 # podem existir em globals; aqui usamos robustez e checamos st.session_state quando possível.
 
@@ -40,11 +66,11 @@ def derive_availability_and_expected_minutes(roster_entry, df_l5_row, treat_unkn
     min_avg = float(df_l5_row.get("MIN_AVG", 0)) if df_l5_row is not None else 0.0
     last_min = float(df_l5_row.get("LAST_MIN", 0)) if df_l5_row is not None else 0.0
     availability = "unknown"; expected_minutes = min_avg
-    if any(k in status for k in ("out","ir","injur")):
+    if _STATUS_OUT_RE.search(status):
         availability = "out"; expected_minutes = 0.0
     elif starter:
         availability = "available"; expected_minutes = max(min_avg, last_min, 28.0)
-    elif status and any(k in status for k in ("active","available")):
+    elif status and _STATUS_ACTIVE_RE.search(status):
         availability = "available"; expected_minutes = max(min_avg*0.8, last_min*0.9)
     else:
         availability = "probable"; expected_minutes = max(min_avg*0.8, last_min*0.6) if treat_unknown_as_available else min_avg*0.6
@@ -56,9 +82,10 @@ def build_player_ctx(roster_entry: Dict[str,Any],
                      df_l5_row: Optional[Dict[str,Any]],
                      team_context: Dict[str,Any],
                      opponent_context: Dict[str,Any],
-                     dvp_analyzer=None) -> Dict[str,Any]:
+                     dvp_analyzer=None) -> PlayerCtx:
     """
     Função idêntica à original — constrói o contexto básico do jogador.
+    Retorna um PlayerCtx (slots + interface de dict; to_dict() para o dict plano).
     """
     try:
         name = roster_entry.get("PLAYER", "")
@@ -83,31 +110,16 @@ def build_player_ctx(roster_entry: Dict[str,Any],
         derived = derive_availability_and_expected_minutes(roster_entry, df_l5_row, treat_unknown_as_available=True)
         expected_minutes = derived.get("expected_minutes", 0.0)
         is_young = exp <= 3; is_veteran = exp >= 8
-        usage = "high" if pra_L5>=30 else ("medium" if pra_L5>=18 else "low")
+        usage_tier = (pra_L5>=30) + (pra_L5>=18)
+        usage = TIER_NAMES[usage_tier]
         vol_score = (pts_cv + min_cv)/2.0
-        volatility = "high" if vol_score>=0.8 else ("medium" if vol_score>=0.5 else "low")
-
-        if starter and usage=="high":
-            role="star"
-        elif starter and usage!="low":
-            role="starter"
-        elif not starter and usage=="high":
-            role="bench_scorer"
-        elif not starter and usage=="medium":
-            role="rotation"
-        else:
-            role="deep_bench"
-
-        if reb_per_min>=0.22 and pts_L5<16:
-            style="rebounder"
-        elif ast_per_min>=0.18:
-            style="playmaker"
-        elif pts_L5>=18:
-            style="scorer"
-        elif reb_per_min>=0.18 and pts_L5>=12:
-            style="hustle"
-        else:
-            style="role"
+        volatility = TIER_NAMES[(vol_score>=0.8) + (vol_score>=0.5)]
+
+        role = ROLE_TABLE[starter*3 + usage_tier]
+        style = STYLE_TABLE[
+            (reb_per_min>=0.22 and pts_L5<16) | (ast_per_min>=0.18) << 1
+            | (pts_L5>=18) << 2 | (reb_per_min>=0.18 and pts_L5>=12) << 3
+        ]
 
         garbage_profile = "high" if ((not starter) and is_young and volatility!="low") else ("medium" if ((not starter) and volatility=="medium") else "low")
 
@@ -121,43 +133,204 @@ def build_player_ctx(roster_entry: Dict[str,Any],
             except Exception:
                 dvp_data = {}
 
-        return {
-            "player_id": int(df_l5_row.get("PLAYER_ID")) if df_l5_row and df_l5_row.get("PLAYER_ID") is not None else None,
-            "name": name, "team": team_context.get("team_abbr"), "position": pos,
-            "is_starter": starter, "status": status,
-            "min_L3": min_L5, "min_L5": min_L5, "min_L10": min_L10, "expected_minutes": expected_minutes,
-            "pts_L5": pts_L5, "reb_L5": reb_L5, "ast_L5": ast_L5, "pra_L5": pra_L5,
-            "reb_per_min": reb_per_min, "ast_per_min": ast_per_min,
-            "reb_cv": reb_cv, "ast_cv": ast_cv, "pts_cv": pts_cv, "min_cv": min_cv, "exp": exp,
-            "team_injuries": team_context.get("team_injuries", 0),
-            "spread": float(team_context.get("spread") or 0.0),
-            "is_underdog": team_context.get("is_underdog", False),
-            "is_b2b": team_context.get("is_b2b", False),
-            "pace_expected": team_context.get("pace_expected", None),
-            "opponent_reb_rank": opponent_context.get("opponent_reb_rank", 0),
-            "opponent_ast_rank": opponent_context.get("opponent_ast_rank", 0),
-            "games_last_6": team_context.get("games_last_6", 0),
-            "timezones_traveled": team_context.get("timezones_traveled", 0),
-            "garbage_rate_L10": team_context.get("garbage_rate_L10", 0.0),
-            "is_young": is_young, "is_veteran": is_veteran, "usage": usage,
-            "volatility": volatility, "role": role, "style": style, "garbage_time_profile": garbage_profile,
-            "dvp_data": dvp_data
-        }
+        return PlayerCtx(
+            player_id=int(df_l5_row.get("PLAYER_ID")) if df_l5_row and df_l5_row.get("PLAYER_ID") is not None else None,
+            name=name, team=team_context.get("team_abbr"), position=pos,
+            is_starter=starter, status=status,
+            min_L3=min_L5, min_L5=min_L5, min_L10=min_L10, expected_minutes=expected_minutes,
+            pts_L5=pts_L5, reb_L5=reb_L5, ast_L5=ast_L5, pra_L5=pra_L5,
+            reb_per_min=reb_per_min, ast_per_min=ast_per_min,
+            reb_cv=reb_cv, ast_cv=ast_cv, pts_cv=pts_cv, min_cv=min_cv, exp=exp,
+            team_injuries=team_context.get("team_injuries", 0),
+            spread=float(team_context.get("spread") or 0.0),
+            is_underdog=team_context.get("is_underdog", False),
+            is_b2b=team_context.get("is_b2b", False),
+            pace_expected=team_context.get("pace_expected", None),
+            opponent_reb_rank=opponent_context.get("opponent_reb_rank", 0),
+            opponent_ast_rank=opponent_context.get("opponent_ast_rank", 0),
+            games_last_6=team_context.get("games_last_6", 0),
+            timezones_traveled=team_context.get("timezones_traveled", 0),
+            garbage_rate_L10=team_context.get("garbage_rate_L10", 0.0),
+            is_young=is_young, is_veteran=is_veteran, usage=usage,
+            volatility=volatility, role=role, style=style, garbage_time_profile=garbage_profile,
+            dvp_data=dvp_data
+        )
     except Exception:
         # Em caso de erro inesperado retornamos um contexto mínimo para evitar que o pipeline quebre
         try:
-            return {
-                "player_id": None,
-                "name": roster_entry.get("PLAYER", ""),
-                "team": team_context.get("team_abbr"),
-                "position": (roster_entry.get("POSITION", "") or "").upper(),
-                "is_starter": bool(roster_entry.get("STARTER", False)),
-                "status": roster_entry.get("STATUS", ""),
-                "min_L5": 0, "pts_L5": 0, "reb_L5": 0, "ast_L5": 0,
-                "pra_L5": 0, "expected_minutes": 0
-            }
+            return PlayerCtx(
+                player_id=None,
+                name=roster_entry.get("PLAYER", ""),
+                team=team_context.get("team_abbr"),
+                position=(roster_entry.get("POSITION", "") or "").upper(),
+                is_starter=bool(roster_entry.get("STARTER", False)),
+                status=roster_entry.get("STATUS", ""),
+                min_L5=0, pts_L5=0, reb_L5=0, ast_L5=0,
+                pra_L5=0, expected_minutes=0
+            )
+        except Exception:
+            return PlayerCtx()
+
+
+# Campos numéricos da linha L5 lidos por build_player_ctx: (coluna, default)
+L5_FIELDS = (
+    ("MIN_AVG", 0.0), ("REB_AVG", 0.0), ("AST_AVG", 0.0), ("PTS_AVG", 0.0),
+    ("REB_CV", 1.0), ("AST_CV", 1.0), ("PTS_CV", 1.0), ("MIN_CV", 1.0),
+)
+# Linha numérica de quem não tem L5: MIN, REB, AST, PTS, CVs, PRA, LAST_MIN, EXP
+_NO_L5_VALUES = (0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.0, 99)
+
+
+def _batch_player_values(roster_entry, df_l5_row):
+    """
+    Extrai de um jogador os campos usados por build_player_ctx_batch.
+    
+    Levanta exceção (ou devolve NaN) nos mesmos casos em que o caminho escalar
+    cairia no fallback ou em comparações com NaN; esses jogadores usam build_player_ctx.
+    """
+    name = roster_entry.get("PLAYER", "")
+    pos = (roster_entry.get("POSITION", "") or "").upper()
+    starter = bool(roster_entry.get("STARTER", False))
+    status = (roster_entry.get("STATUS") or "")
+    status_lower = status.lower()
+    if df_l5_row is None:
+        values = _NO_L5_VALUES
+    else:
+        numeric = [float(df_l5_row.get(col, default)) for col, default in L5_FIELDS]
+        min_L5, reb_L5, ast_L5, pts_L5 = numeric[:4]
+        pra_L5 = float(df_l5_row.get("PRA_AVG", pts_L5+reb_L5+ast_L5))
+        last_min = float(df_l5_row.get("LAST_MIN", 0))
+        values = (*numeric, pra_L5, last_min, int(df_l5_row.get("EXP", 99)))
+    if any(v != v for v in values):
+        raise ValueError("NaN")
+    player_id = int(df_l5_row.get("PLAYER_ID")) if df_l5_row and df_l5_row.get("PLAYER_ID") is not None else None
+    return name, pos, starter, status, status_lower, player_id, values
+
+
+def build_player_ctx_batch(roster_entries, df_l5_rows, team_context: Dict[str,Any],
+                           opponent_context: Dict[str,Any], dvp_analyzer=None) -> List[PlayerCtx]:
+    """
+    Versão em lote de build_player_ctx para os jogadores de um mesmo time.
+    
+    Classificações (usage, volatility, role, style, garbage) e minutos esperados
+    são calculados por coluna com np.select; jogadores com NaN ou valores não
+    numéricos passam pelo build_player_ctx escalar.
+    
+    Args:
+        roster_entries: entradas de roster (lista de dicts ou DataFrame)
+        df_l5_rows: linha L5 de cada jogador (dict ou None), alinhada a roster_entries
+        team_context: contexto do time, comum a todos os jogadores
+        opponent_context: contexto do adversário
+        dvp_analyzer: analisador de DvP opcional
+    
+    Returns:
+        Lista de contextos na ordem de roster_entries, iguais aos de build_player_ctx
+    """
+    if isinstance(roster_entries, pd.DataFrame):
+        roster_entries = roster_entries.to_dict("records")
+    roster_entries = list(roster_entries)
+    df_l5_rows = list(df_l5_rows)
+
+    # 1. Extração por jogador (única passada Python); falhas vão para o caminho escalar
+    rows, extracted = [], []
+    for i, (roster_entry, df_l5_row) in enumerate(zip(roster_entries, df_l5_rows)):
+        try:
+            extracted.append(_batch_player_values(roster_entry, df_l5_row))
+            rows.append(i)
         except Exception:
-            return {}
+            pass
+    try:
+        team = team_context.get("team_abbr")
+        spread = float(team_context.get("spread") or 0.0)
+    except Exception:
+        rows = []
+    results = [None] * len(roster_entries)
+
+    if rows:
+        names, positions, starters, statuses, status_lower, player_ids, values = zip(*extracted)
+        values = np.array(values, dtype=float)
+        min_L5, reb_L5, ast_L5, pts_L5, reb_cv, ast_cv, pts_cv, min_cv, pra_L5, last_min, exp = values.T
+        starter = np.array(starters, dtype=bool)
+        exp_int = [int(e) for e in exp]
+
+        # 2. Minutos esperados (mesmas regras de derive_availability_and_expected_minutes)
+        safe_min = np.where(min_L5 > 0, min_L5, 1.0)
+        reb_per_min = np.where(min_L5 > 0, reb_L5/safe_min, 0.0)
+        ast_per_min = np.where(min_L5 > 0, ast_L5/safe_min, 0.0)
+        status_series = pd.Series(status_lower, dtype=object)
+        is_out = status_series.str.contains(_STATUS_OUT_RE, regex=True).to_numpy(dtype=bool)
+        is_active = status_series.str.contains(_STATUS_ACTIVE_RE, regex=True).to_numpy(dtype=bool)
+        expected_minutes = np.select(
+            [is_out, starter, is_active],
+            [0.0, np.maximum(np.maximum(min_L5, last_min), 28.0), np.maximum(min_L5*0.8, last_min*0.9)],
+            default=np.maximum(min_L5*0.8, last_min*0.6)
+        )
+        expected_minutes = np.maximum(0.0, expected_minutes)
+
+        # 3. Classificações por coluna
+        is_young = exp <= 3; is_veteran = exp >= 8
+        usage_tier = (pra_L5>=30).astype(int) + (pra_L5>=18)
+        usage = _TIER_NAMES_ARR[usage_tier]
+        vol_score = (pts_cv + min_cv)/2.0
+        volatility = _TIER_NAMES_ARR[(vol_score>=0.8).astype(int) + (vol_score>=0.5)]
+        role = _ROLE_TABLE_ARR[starter*3 + usage_tier]
+        style = _STYLE_TABLE_ARR[
+            ((reb_per_min>=0.22) & (pts_L5<16)) | (ast_per_min>=0.18) << 1
+            | (pts_L5>=18) << 2 | ((reb_per_min>=0.18) & (pts_L5>=12)) << 3
+        ]
+        garbage_profile = np.select(
+            [~starter & is_young & (volatility!="low"), ~starter & (volatility=="medium")],
+            ["high", "medium"], default="low"
+        )
+
+        # 4. Materialização: um dict por jogador, mesmo formato do caminho escalar
+        columns = zip(
+            rows, names, positions, starters, statuses, player_ids,
+            min_L5.tolist(), expected_minutes.tolist(), pts_L5.tolist(), reb_L5.tolist(),
+            ast_L5.tolist(), pra_L5.tolist(), reb_per_min.tolist(), ast_per_min.tolist(),
+            reb_cv.tolist(), ast_cv.tolist(), pts_cv.tolist(), min_cv.tolist(), exp_int,
+            is_young.tolist(), is_veteran.tolist(), usage.tolist(), volatility.tolist(),
+            role.tolist(), style.tolist(), garbage_profile.tolist()
+        )
+        for (i, name, pos, is_starter, status, player_id, min_l5, exp_min, pts, reb, ast, pra,
+             rpm, apm, rcv, acv, pcv, mcv, exp_i, young, veteran, usg, vol, rl, st_, garbage) in columns:
+            dvp_data = {}
+            if dvp_analyzer and opponent_context.get("opponent_team"):
+                try:
+                    dvp_data = dvp_analyzer.get_matchup_analysis(
+                        opponent_context.get("opponent_team"),
+                        pos
+                    )
+                except Exception:
+                    dvp_data = {}
+            results[i] = PlayerCtx(
+                player_id=player_id,
+                name=name, team=team, position=pos,
+                is_starter=is_starter, status=status,
+                min_L3=min_l5, min_L5=min_l5, min_L10=min_l5, expected_minutes=exp_min,
+                pts_L5=pts, reb_L5=reb, ast_L5=ast, pra_L5=pra,
+                reb_per_min=rpm, ast_per_min=apm,
+                reb_cv=rcv, ast_cv=acv, pts_cv=pcv, min_cv=mcv, exp=exp_i,
+                team_injuries=team_context.get("team_injuries", 0),
+                spread=spread,
+                is_underdog=team_context.get("is_underdog", False),
+                is_b2b=team_context.get("is_b2b", False),
+                pace_expected=team_context.get("pace_expected", None),
+                opponent_reb_rank=opponent_context.get("opponent_reb_rank", 0),
+                opponent_ast_rank=opponent_context.get("opponent_ast_rank", 0),
+                games_last_6=team_context.get("games_last_6", 0),
+                timezones_traveled=team_context.get("timezones_traveled", 0),
+                garbage_rate_L10=team_context.get("garbage_rate_L10", 0.0),
+                is_young=young, is_veteran=veteran, usage=usg,
+                volatility=vol, role=rl, style=st_, garbage_time_profile=garbage,
+                dvp_data=dvp_data
+            )
+
+    # Jogadores fora do lote: caminho escalar (inclui o contexto mínimo de erro)
+    return [
+        ctx if ctx is not None else build_player_ctx(roster_entry, df_l5_row, team_context, opponent_context, dvp_analyzer)
+        for ctx, roster_entry, df_l5_row in zip(results, roster_entries, df_l5_rows)
+    ]
 
 
 def build_player_ctx_super_enhanced(roster_entry: Dict[str,Any],
@@ -172,13 +345,20 @@ def build_player_ctx_super_enhanced(roster_entry: Dict[str,Any],
     """
     basic_ctx = build_player_ctx(roster_entry, df_l5_row, team_context, opponent_context, dvp_analyzer)
 
+    # Sem streamlit o DataEnhancer não roda; sem engine ou player_id não há projeção a anexar
+    if not _ST_AVAILABLE and not (projection_engine and basic_ctx.get("player_id")):
+        return basic_ctx
+
     # Usar DataEnhancer se disponível no session_state (compatível com como o main usava)
     try:
         data_enhancer_available = False
         if _ST_AVAILABLE and hasattr(st, "session_state"):
             data_enhancer_available = bool(st.session_state.get("data_enhancer"))
         # Se data_enhancer estiver disponível na sessão, executar o enhancement
-        if data_enhancer_available:
+        # (sem player_id não há o que enriquecer: só marca o contexto)
+        if data_enhancer_available and basic_ctx.get("player_id") is None:
+            basic_ctx["enhancement_skipped"] = True
+        elif data_enhancer_available:
             try:
                 basic_ctx = st.session_state.data_enhancer.enhance_player_stats(basic_ctx)
             except Exception as e:
@@ -190,11 +370,12 @@ def build_player_ctx_super_enhanced(roster_entry: Dict[str,Any],
     # Usar ProjectionEngine se disponível (passado explicitamente)
     if projection_engine and basic_ctx.get("player_id"):
         try:
+            opponent_team = opponent_context.get("opponent_team")
             proj = projection_engine.get_player_projection(
                 player_id=basic_ctx.get("player_id"),
                 player_name=basic_ctx.get("name"),
                 team=basic_ctx.get("team"),
-                opponent=opponent_context.get("opponent_team"),
+                opponent=opponent_team,
                 position=basic_ctx.get("position"),
                 player_context=basic_ctx,
                 dvp_analyzer=dvp_analyzer
@@ -223,4 +404,6 @@ def build_player_ctx_super_enhanced(roster_entry: Dict[str,Any],
                 }
         except Exception as e:
             basic_ctx["proj_engine_error"] = str(e)
-            basic_ctx["proj_engine_]()_
+            basic_ctx["proj_engine_used"] = False
+
+    return basic_ctx
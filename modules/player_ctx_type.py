@@ -0,0 +1,161 @@
+# modules/player_ctx_type.py
+"""
+Tipo do contexto de jogador produzido por build_player_ctx.
+
+PlayerCtx declara o schema do contexto em __slots__: o acesso por atributo
+(ctx.min_L5) é um offset de slot em vez de um lookup em hash. Para os
+consumidores legados ele continua se comportando como um dict mutável
+(get, [], in, items, copy, update...): chaves fora do schema (proj_*,
+enhancement_error, métricas do DataEnhancer...) ficam em `extras`.
+to_dict() devolve o dict plano quando um dict de verdade é necessário (json etc).
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Dict
+
+# Schema do contexto, na mesma ordem de chaves do dict original de build_player_ctx
+PLAYER_CTX_FIELDS = (
+    "player_id", "name", "team", "position", "is_starter", "status",
+    "min_L3", "min_L5", "min_L10", "expected_minutes",
+    "pts_L5", "reb_L5", "ast_L5", "pra_L5", "reb_per_min", "ast_per_min",
+    "reb_cv", "ast_cv", "pts_cv", "min_cv", "exp",
+    "team_injuries", "spread", "is_underdog", "is_b2b", "pace_expected",
+    "opponent_reb_rank", "opponent_ast_rank", "games_last_6", "timezones_traveled",
+    "garbage_rate_L10", "is_young", "is_veteran", "usage", "volatility", "role",
+    "style", "garbage_time_profile", "dvp_data",
+)
+_FIELD_SET = frozenset(PLAYER_CTX_FIELDS)
+
+# Marca de campo não informado no construtor (o slot fica vazio)
+_UNSET = object()
+
+
+class PlayerCtx(MutableMapping):
+    """
+    Contexto básico de um jogador com campos em slots e interface de dict.
+
+    Construído como um dict: PlayerCtx(min_L5=..., ...) ou PlayerCtx(mapping).
+    Campos não informados ficam com o slot vazio, então ctx.get(campo) e
+    getattr(ctx, campo, default) devolvem o default, como no dict original.
+
+    Não é um dataclass de propósito: pandas e dataclasses.asdict tratam dataclasses
+    pelos campos declarados, o que ignoraria `extras` e quebraria contextos parciais.
+    """
+    __slots__ = PLAYER_CTX_FIELDS + ("extras",)
+
+    def __init__(self, values=None, *,
+                 player_id=_UNSET, name=_UNSET, team=_UNSET, position=_UNSET, is_starter=_UNSET,
+                 status=_UNSET, min_L3=_UNSET, min_L5=_UNSET, min_L10=_UNSET,
+                 expected_minutes=_UNSET, pts_L5=_UNSET, reb_L5=_UNSET, ast_L5=_UNSET,
+                 pra_L5=_UNSET, reb_per_min=_UNSET, ast_per_min=_UNSET, reb_cv=_UNSET,
+                 ast_cv=_UNSET, pts_cv=_UNSET, min_cv=_UNSET, exp=_UNSET, team_injuries=_UNSET,
+                 spread=_UNSET, is_underdog=_UNSET, is_b2b=_UNSET, pace_expected=_UNSET,
+                 opponent_reb_rank=_UNSET, opponent_ast_rank=_UNSET, games_last_6=_UNSET,
+                 timezones_traveled=_UNSET, garbage_rate_L10=_UNSET, is_young=_UNSET,
+                 is_veteran=_UNSET, usage=_UNSET, volatility=_UNSET, role=_UNSET, style=_UNSET,
+                 garbage_time_profile=_UNSET, dvp_data=_UNSET,
+                 **extras):
+        # Mesma precedência de dict(values, **kwargs): argumentos nomeados vencem
+        self.extras = {}
+        if values:
+            for key, value in (values.items() if hasattr(values, "items") else values):
+                self[key] = value
+        if extras:
+            self.extras.update(extras)
+        if player_id is not _UNSET: self.player_id = player_id
+        if name is not _UNSET: self.name = name
+        if team is not _UNSET: self.team = team
+        if position is not _UNSET: self.position = position
+        if is_starter is not _UNSET: self.is_starter = is_starter
+        if status is not _UNSET: self.status = status
+        if min_L3 is not _UNSET: self.min_L3 = min_L3
+        if min_L5 is not _UNSET: self.min_L5 = min_L5
+        if min_L10 is not _UNSET: self.min_L10 = min_L10
+        if expected_minutes is not _UNSET: self.expected_minutes = expected_minutes
+        if pts_L5 is not _UNSET: self.pts_L5 = pts_L5
+        if reb_L5 is not _UNSET: self.reb_L5 = reb_L5
+        if ast_L5 is not _UNSET: self.ast_L5 = ast_L5
+        if pra_L5 is not _UNSET: self.pra_L5 = pra_L5
+        if reb_per_min is not _UNSET: self.reb_per_min = reb_per_min
+        if ast_per_min is not _UNSET: self.ast_per_min = ast_per_min
+        if reb_cv is not _UNSET: self.reb_cv = reb_cv
+        if ast_cv is not _UNSET: self.ast_cv = ast_cv
+        if pts_cv is not _UNSET: self.pts_cv = pts_cv
+        if min_cv is not _UNSET: self.min_cv = min_cv
+        if exp is not _UNSET: self.exp = exp
+        if team_injuries is not _UNSET: self.team_injuries = team_injuries
+        if spread is not _UNSET: self.spread = spread
+        if is_underdog is not _UNSET: self.is_underdog = is_underdog
+        if is_b2b is not _UNSET: self.is_b2b = is_b2b
+        if pace_expected is not _UNSET: self.pace_expected = pace_expected
+        if opponent_reb_rank is not _UNSET: self.opponent_reb_rank = opponent_reb_rank
+        if opponent_ast_rank is not _UNSET: self.opponent_ast_rank = opponent_ast_rank
+        if games_last_6 is not _UNSET: self.games_last_6 = games_last_6
+        if timezones_traveled is not _UNSET: self.timezones_traveled = timezones_traveled
+        if garbage_rate_L10 is not _UNSET: self.garbage_rate_L10 = garbage_rate_L10
+        if is_young is not _UNSET: self.is_young = is_young
+        if is_veteran is not _UNSET: self.is_veteran = is_veteran
+        if usage is not _UNSET: self.usage = usage
+        if volatility is not _UNSET: self.volatility = volatility
+        if role is not _UNSET: self.role = role
+        if style is not _UNSET: self.style = style
+        if garbage_time_profile is not _UNSET: self.garbage_time_profile = garbage_time_profile
+        if dvp_data is not _UNSET: self.dvp_data = dvp_data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict plano na ordem do schema, seguido das chaves extras"""
+        return dict(self.items())
+
+    def copy(self) -> "PlayerCtx":
+        """Cópia rasa, como dict.copy()"""
+        return PlayerCtx(self)
+
+    # --- protocolo de mapping ---
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self.extras[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self.extras[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            del self.extras[key]
+
+    def __iter__(self):
+        for key in PLAYER_CTX_FIELDS:
+            if hasattr(self, key):
+                yield key
+        yield from self.extras
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return key in self.extras
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return self.extras.get(key, default)
+
+    def __repr__(self):
+        return f"PlayerCtx({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (PlayerCtx, (self.to_dict(),))
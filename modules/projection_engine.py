@@ -1,9 +1,17 @@
 # modules/projection_engine.py
 import os
+import re
 import json
+import time
+import atexit
+import weakref
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
+# Tudo que não é dígito ASCII, ponto ou sinal (usado pelo safe_float local)
+_NUMCLEAN_RE = re.compile(r"[^0-9.\-]")
+
 # IMPORTAR DO UTILS_FIX (sem problemas de importação circular)
 try:
     from modules.utils_fix import load_pickle, save_json, load_json, SafetyUtils
@@ -56,16 +64,70 @@ except ImportError:
             try:
                 if value is None:
                     return default
+                # Caminho rápido pelo tipo exato (float/int são a maioria das chamadas)
+                value_type = type(value)
+                if value_type is float:
+                    return value
+                if value_type is int:
+                    return float(value)
                 if isinstance(value, (int, float)):
                     return float(value)
                 if isinstance(value, str):
-                    cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
+                    if value.isascii():
+                        cleaned = _NUMCLEAN_RE.sub("", value)
+                    else:  # isdigit() aceita dígitos unicode que a classe 0-9 não cobre
+                        cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
                     return float(cleaned) if cleaned else default
                 return float(value)
             except:
                 return default
 
+# orjson é opcional: lê e serializa os caches JSON mais rápido quando disponível
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
+
+def _json_loads(data):
+    """Decodifica JSON (bytes) com orjson; o json padrão cobre o que ele rejeita (NaN, ints > 64 bits)"""
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except Exception:
+            pass
+    return json.loads(data)
+
 from modules.config import CACHE_DIR, L5_CACHE_FILE
+from modules.projection_jit import (
+    PROJ_STATS, STAT_IDX, CEILING_STATS, CEILING_TABLE, CEILING_KEYS, CEILING_IDX,
+    PARALLEL_SLATE_MIN, hybrid_projection, ceiling_values,
+    project_slate as project_slate_serial, project_slate_parallel
+)
+
+PTS_IDX, REB_IDX, AST_IDX, PRA_IDX = (STAT_IDX[stat] for stat in ("PTS", "REB", "AST", "PRA"))
+
+# Colunas do L5 usadas para simular os season stats
+L5_SEASON_COLUMNS = ("MIN_AVG", "PTS_AVG", "REB_AVG", "AST_AVG", "PRA_AVG")
+
+# Pesos season/recent da projeção híbrida
+HYBRID_WEIGHT_SEASON, HYBRID_WEIGHT_RECENT = 0.7, 0.3
+
+# Intervalo mínimo (s) entre gravações do cache de projeções; flush_cache() força a escrita
+PROJECTIONS_FLUSH_INTERVAL = 30.0
+
+# Engines vivas com cache possivelmente pendente: um único hook de atexit grava
+# todas. WeakSet para não segurar engines de sessões já encerradas até o exit.
+_live_engines = weakref.WeakSet()
+
+def _flush_live_engines():
+    """Grava o cache pendente de cada engine ainda viva (registrado no atexit)"""
+    for engine in list(_live_engines):
+        engine.flush_cache()
+
+atexit.register(_flush_live_engines)
 
 # ============================================================================
 # PROJECTION ENGINE
@@ -86,14 +148,25 @@ class ProjectionEngine:
         self.season_stats = self._load_season_stats()
         self.projections_cache = self._load_projections_cache()
         
+        # DataFrame L5 em memória (recarregado só quando o arquivo muda)
+        self._l5_mtime = None
+        self._df_l5 = None
+        self._l5_index = {}
+        self._l5_columns = {}
+        
+        # Gravação do cache de projeções com debounce (dirty flag + relógio monotônico)
+        self._dirty = False
+        self._last_flush = 0.0
+        _live_engines.add(self)
+        
         self.safety = SafetyUtils()
         
     def _load_season_stats(self):
         """Carrega stats da temporada do cache"""
         try:
             if os.path.exists(self.season_cache_file):
-                with open(self.season_cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.season_cache_file, 'rb') as f:
+                    return _json_loads(f.read())
         except Exception:
             pass
         return {}
@@ -102,47 +175,111 @@ class ProjectionEngine:
         """Carrega cache de projeções"""
         try:
             if os.path.exists(self.projections_cache_file):
-                with open(self.projections_cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    # Verificar se o cache não está muito antigo (< 6 horas)
-                    cache_time = datetime.fromisoformat(cache_data.get("timestamp", "1970-01-01"))
-                    if (datetime.now() - cache_time).total_seconds() < 21600:  # 6 horas
-                        return cache_data.get("projections", {})
+                with open(self.projections_cache_file, 'rb') as f:
+                    cache_data = _json_loads(f.read())
+                # Verificar se o cache não está muito antigo (< 6 horas)
+                cache_time = cache_data.get("timestamp_epoch")
+                if cache_time is None:
+                    cache_time = datetime.fromisoformat(cache_data.get("timestamp", "1970-01-01")).timestamp()
+                if time.time() - cache_time < 21600:  # 6 horas
+                    projections = cache_data.get("projections", {})
+                    self._add_cache_epochs(projections)
+                    return self._rekey_projections(projections)
         except Exception:
             pass
         return {}
     
+    @staticmethod
+    def _add_cache_epochs(projections):
+        """Converte uma vez o cache_time ISO de entradas antigas em cache_time_epoch"""
+        for entry in projections.values():
+            if isinstance(entry, dict) and "cache_time_epoch" not in entry:
+                try:
+                    entry["cache_time_epoch"] = datetime.fromisoformat(entry.get("cache_time", "1970-01-01")).timestamp()
+                except Exception:
+                    pass
+    
+    @staticmethod
+    def _rekey_projections(projections):
+        """
+        Chaves do JSON ("pid_team_opp") -> tuplas (player_id, team, opponent) montadas
+        com os campos de cada projeção, que o JSON guarda com os tipos originais.
+        """
+        rekeyed = {}
+        for key, entry in projections.items():
+            if isinstance(entry, dict) and all(field in entry for field in ("player_id", "team", "opponent")):
+                try:
+                    tuple_key = (entry["player_id"], entry["team"], entry["opponent"])
+                    hash(tuple_key)
+                    key = tuple_key
+                except TypeError:
+                    pass
+            rekeyed[key] = entry
+        return rekeyed
+    
+    @staticmethod
+    def _cache_key_str(cache_key):
+        """Chave em memória (tupla) -> chave string do JSON em disco (mesmo formato de antes)"""
+        if isinstance(cache_key, tuple):
+            return "_".join(f"{part}" for part in cache_key)
+        return cache_key
+    
     def _save_projections_cache(self, projections):
         """Salva projeções no cache"""
         try:
+            now = datetime.now()
             cache_data = {
-                "timestamp": datetime.now().isoformat(),
-                "projections": projections
+                "timestamp": now.isoformat(),
+                "timestamp_epoch": now.timestamp(),
+                "projections": {self._cache_key_str(key): entry for key, entry in projections.items()}
             }
-            with open(self.projections_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+            blob = None
+            if _ORJSON_AVAILABLE:
+                try:
+                    blob = orjson.dumps(cache_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+                except Exception:
+                    blob = None  # tipo não suportado: cai no json padrão
+            if blob is None:
+                blob = json.dumps(cache_data, indent=2, ensure_ascii=False).encode("utf-8")
+            # Arquivo temporário + replace atômico: um leitor nunca vê o JSON pela metade
+            tmp_file = self.projections_cache_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_file, self.projections_cache_file)
         except Exception:
             pass
     
+    def _maybe_flush(self):
+        """Grava o cache se houver alterações e o último flush tiver mais de PROJECTIONS_FLUSH_INTERVAL s"""
+        if self._dirty and time.monotonic() - self._last_flush > PROJECTIONS_FLUSH_INTERVAL:
+            self.flush_cache()
+    
+    def flush_cache(self):
+        """Força a gravação do cache de projeções pendente (chamar ao fim do slate)"""
+        if not self._dirty:
+            return
+        self._save_projections_cache(self.projections_cache)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+    
     def _fetch_season_stats_for_player(self, player_id, player_name):
         """
         Busca stats da temporada para um jogador.
         Por enquanto, simula com base nos dados L5.
         """
-        saved = load_pickle(L5_CACHE_FILE)
-        df_l5 = saved.get("df") if saved and isinstance(saved, dict) else pd.DataFrame()
+        df_l5 = self._get_l5_df()
         
         if df_l5.empty:
             return None
         
-        player_data = df_l5[df_l5["PLAYER_ID"] == player_id]
-        if player_data.empty:
-            player_data = df_l5[df_l5["PLAYER"] == player_name]
+        pos = self._lookup_l5_row("PLAYER_ID", player_id)
+        if pos is None:
+            pos = self._lookup_l5_row("PLAYER", player_name)
         
-        if player_data.empty:
+        if pos is None:
             return None
         
-        row = player_data.iloc[0].to_dict()
+        row = self._l5_row(pos, L5_SEASON_COLUMNS)
         
         # Simular season stats
         season_stats = {
@@ -160,7 +297,64 @@ class ProjectionEngine:
         
         return season_stats
     
-    def _calculate_base_projection(self, season_stats, recent_stats, weight_season=0.7, weight_recent=0.3):
+    def _get_l5_df(self):
+        """Retorna o DataFrame L5, relendo o pickle apenas se o mtime mudou"""
+        try:
+            stat = os.stat(L5_CACHE_FILE)
+            mtime = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            mtime = None
+        
+        if mtime is None or mtime != self._l5_mtime or self._df_l5 is None:
+            saved = load_pickle(L5_CACHE_FILE)
+            self._df_l5 = saved.get("df") if saved and isinstance(saved, dict) else pd.DataFrame()
+            self._l5_mtime = mtime
+            self._l5_index = {}
+            self._l5_columns = {}
+        return self._df_l5
+    
+    def _lookup_l5_row(self, column, value):
+        """
+        Posição da primeira linha do L5 com df[column] == value (ou None).
+        O índice {valor: primeira posição} é montado uma vez por coluna.
+        """
+        index = self._l5_index.get(column)
+        if index is None:
+            index = {}
+            for pos, key in enumerate(self._df_l5[column].tolist()):
+                try:
+                    if key is not None and key == key:  # None/NaN nunca casam no ==
+                        index.setdefault(key, pos)
+                except TypeError:
+                    continue
+            self._l5_index[column] = index
+        try:
+            return index.get(value)
+        except TypeError:
+            return None
+    
+    def _l5_row(self, pos, columns):
+        """
+        Campos de uma linha do L5 sem montar a Series inteira: cada coluna vira uma
+        lista (uma vez por carga do pickle) e o valor sai por posição. Colunas
+        ausentes ficam de fora, como no to_dict() da linha.
+        """
+        df_l5 = self._df_l5
+        if not df_l5.columns.is_unique:
+            return df_l5.iloc[pos].to_dict()
+        row = {}
+        for column in columns:
+            values = self._l5_columns.get(column)
+            if values is None:
+                if column not in df_l5.columns:
+                    continue
+                values = self._l5_columns[column] = df_l5[column].tolist()
+            value = values[pos]
+            row[column] = value.item() if isinstance(value, np.generic) else value
+        return row
+    
+    def _calculate_base_projection(self, season_stats, recent_stats,
+                                   weight_season=HYBRID_WEIGHT_SEASON, weight_recent=HYBRID_WEIGHT_RECENT):
         """
         Calcula projeção base combinando season stats com recent stats
         """
@@ -174,22 +368,67 @@ class ProjectionEngine:
             base_stats = season_stats.copy()
             base_stats["source"] = "season_only"
         else:
-            base_stats = {}
-            for stat in ["MIN", "PTS", "REB", "AST", "FG3M", "STL", "BLK", "PRA"]:
-                season_val = self.safety.safe_float(season_stats.get(stat, 0))
-                recent_val = self.safety.safe_float(recent_stats.get(stat, 0))
-                
-                if season_val > 0 and recent_val > 0:
-                    base_stats[stat] = (season_val * weight_season) + (recent_val * weight_recent)
-                elif season_val > 0:
-                    base_stats[stat] = season_val
-                else:
-                    base_stats[stat] = recent_val
+            season = np.array([self.safety.safe_float(season_stats.get(stat, 0)) for stat in PROJ_STATS])
+            recent = np.array([self.safety.safe_float(recent_stats.get(stat, 0)) for stat in PROJ_STATS])
+            hybrid = hybrid_projection(season, recent, weight_season, weight_recent)
+            base_stats = dict(zip(PROJ_STATS, hybrid.tolist()))
             
             base_stats["source"] = f"hybrid_{int(weight_season*100)}_{int(weight_recent*100)}"
         
         return base_stats
     
+    def _dvp_multipliers(self, opponent_team, player_position, dvp_analyzer):
+        """Multiplicadores DvP por stat (get_dvp_vector numa chamada; senão uma consulta por categoria)"""
+        get_dvp_vector = getattr(dvp_analyzer, "get_dvp_vector", None)
+        if get_dvp_vector is not None:
+            points, rebounds, assists = np.asarray(get_dvp_vector(opponent_team, player_position)).tolist()
+        else:
+            points = dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "points")
+            rebounds = dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "rebounds")
+            assists = dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "assists")
+        return {
+            "PTS": points,
+            "REB": rebounds,
+            "AST": assists,
+            "FG3M": points * 0.95,
+            "STL": assists * 1.1,
+            "BLK": rebounds * 1.05
+        }
+    
+    @staticmethod
+    def _context_factors(player_context):
+        """Fatores de B2B, viagem e lesões do time, e o fator combinado"""
+        b2b_factor = 1.0
+        if player_context.get("is_b2b", False):
+            if player_context.get("is_veteran", False):
+                b2b_factor = 0.85
+            elif player_context.get("is_young", False):
+                b2b_factor = 0.95
+            else:
+                b2b_factor = 0.90
+        
+        travel_factor = 1.0
+        timezones = player_context.get("timezones_traveled", 0)
+        if timezones >= 3:
+            travel_factor = 0.88
+        elif timezones >= 2:
+            travel_factor = 0.93
+        
+        injury_factor = 1.0
+        team_injuries = player_context.get("team_injuries", 0)
+        if team_injuries >= 2:
+            if player_context.get("role") in ["star", "starter"]:
+                injury_factor = 1.15
+            else:
+                injury_factor = 1.25
+        
+        return {
+            "b2b_factor": b2b_factor,
+            "travel_factor": travel_factor,
+            "injury_factor": injury_factor,
+            "combined_factor": b2b_factor * travel_factor * injury_factor
+        }
+    
     def _apply_dvp_adjustments(self, base_projection, opponent_team, player_position, dvp_analyzer):
         """
         Aplica ajustes baseados em Defense vs Position
@@ -199,14 +438,7 @@ class ProjectionEngine:
         
         adjusted = base_projection.copy()
         
-        dvp_multipliers = {
-            "PTS": dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "points"),
-            "REB": dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "rebounds"),
-            "AST": dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "assists"),
-            "FG3M": dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "points") * 0.95,
-            "STL": dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "assists") * 1.1,
-            "BLK": dvp_analyzer.get_dvp_multiplier(opponent_team, player_position, "rebounds") * 1.05
-        }
+        dvp_multipliers = self._dvp_multipliers(opponent_team, player_position, dvp_analyzer)
         
         for stat, multiplier in dvp_multipliers.items():
             if stat in adjusted:
@@ -229,31 +461,8 @@ class ProjectionEngine:
         
         contextual = projection.copy()
         
-        b2b_factor = 1.0
-        if player_context.get("is_b2b", False):
-            if player_context.get("is_veteran", False):
-                b2b_factor = 0.85
-            elif player_context.get("is_young", False):
-                b2b_factor = 0.95
-            else:
-                b2b_factor = 0.90
-        
-        travel_factor = 1.0
-        timezones = player_context.get("timezones_traveled", 0)
-        if timezones >= 3:
-            travel_factor = 0.88
-        elif timezones >= 2:
-            travel_factor = 0.93
-        
-        injury_factor = 1.0
-        team_injuries = player_context.get("team_injuries", 0)
-        if team_injuries >= 2:
-            if player_context.get("role") in ["star", "starter"]:
-                injury_factor = 1.15
-            else:
-                injury_factor = 1.25
-        
-        combined_factor = b2b_factor * travel_factor * injury_factor
+        context_factors = self._context_factors(player_context)
+        combined_factor = context_factors["combined_factor"]
         
         if "MIN" in contextual:
             contextual["MIN"] *= combined_factor
@@ -266,15 +475,45 @@ class ProjectionEngine:
         if "PTS" in contextual and "REB" in contextual and "AST" in contextual:
             contextual["PRA"] = contextual["PTS"] + contextual["REB"] + contextual["AST"]
         
-        contextual["context_factors"] = {
-            "b2b_factor": b2b_factor,
-            "travel_factor": travel_factor,
-            "injury_factor": injury_factor,
-            "combined_factor": combined_factor
-        }
+        contextual["context_factors"] = context_factors
         
         return contextual
     
+    def _project_in_place(self, base_projection, opponent_team, player_position, dvp_analyzer, player_context):
+        """
+        DvP + fatores contextuais sobre um único buffer float64 (ordem PROJ_STATS).
+        
+        Usado quando a projeção base tem os 8 stats em float (caminho híbrido):
+        os estágios multiplicam o buffer in place e os dicts de saída só são
+        montados no fim, com o mesmo conteúdo de _apply_dvp_adjustments e
+        _apply_contextual_factors.
+        
+        Returns:
+            (dvp_adjusted, contextual_projection), ou None se algum multiplicador
+            DvP não for numérico (os estágios em dict tratam esse caso)
+        """
+        stats = np.array([base_projection[stat] for stat in PROJ_STATS])
+        extra = {k: v for k, v in base_projection.items() if k not in STAT_IDX}
+        
+        dvp_adjusted = base_projection
+        if opponent_team and player_position and dvp_analyzer:
+            dvp_multipliers = self._dvp_multipliers(opponent_team, player_position, dvp_analyzer)
+            if not all(type(m) in (int, float) for m in dvp_multipliers.values()):
+                return None
+            stats *= [dvp_multipliers.get(stat, 1.0) for stat in PROJ_STATS]
+            stats[PRA_IDX] = stats[PTS_IDX] + stats[REB_IDX] + stats[AST_IDX]
+            extra["dvp_applied"] = True
+            extra["dvp_multipliers"] = dvp_multipliers
+            dvp_adjusted = dict(zip(PROJ_STATS, stats.tolist()), **extra)
+        
+        context_factors = self._context_factors(player_context)
+        stats *= context_factors["combined_factor"]
+        stats[PRA_IDX] = stats[PTS_IDX] + stats[REB_IDX] + stats[AST_IDX]
+        extra["context_factors"] = context_factors
+        contextual_projection = dict(zip(PROJ_STATS, stats.tolist()), **extra)
+        
+        return dvp_adjusted, contextual_projection
+    
     def _calculate_ceilings(self, projection, volatility=0.3):
         """
         Calcula ceilings (percentis 90, 95, absoluto)
@@ -286,22 +525,15 @@ class ProjectionEngine:
         
         volatility_factor = 1.0 + (volatility * 0.5)
         
-        stat_configs = {
-            "PTS": {"90p": 1.3, "95p": 1.5, "abs": 1.8},
-            "REB": {"90p": 1.4, "95p": 1.7, "abs": 2.0},
-            "AST": {"90p": 1.4, "95p": 1.6, "abs": 1.9},
-            "FG3M": {"90p": 1.5, "95p": 1.8, "abs": 2.2},
-            "STL": {"90p": 1.6, "95p": 2.0, "abs": 2.5},
-            "BLK": {"90p": 1.6, "95p": 2.0, "abs": 2.5},
-            "PRA": {"90p": 1.3, "95p": 1.5, "abs": 1.8}
-        }
-        
-        for stat, config in stat_configs.items():
-            base_value = projection.get(stat, 0)
-            if base_value > 0:
-                for percentile, multiplier in config.items():
-                    key = f"{stat}_{percentile}"
-                    ceilings[key] = base_value * multiplier * volatility_factor
+        # Multiplicadores por stat em CEILING_TABLE; só stats com base > 0 entram
+        base_values = [projection.get(stat, 0) for stat in CEILING_STATS]
+        positive = [base_value > 0 for base_value in base_values]
+        if any(positive):
+            base = np.array([v if is_pos else 0.0 for v, is_pos in zip(base_values, positive)], dtype=float)
+            values = ceiling_values(base, CEILING_TABLE, volatility_factor).tolist()
+            for keys, stat_values, is_pos in zip(CEILING_KEYS, values, positive):
+                if is_pos:
+                    ceilings.update(zip(keys, stat_values))
         
         if "MIN" in projection:
             min_base = projection["MIN"]
@@ -311,24 +543,30 @@ class ProjectionEngine:
         
         return ceilings
     
-    def get_player_projection(self, player_id, player_name, team, opponent, position, 
-                            player_context=None, dvp_analyzer=None):
-        """
-        Retorna projeção completa para um jogador
-        """
-        cache_key = f"{player_id}_{team}_{opponent}"
+    def _cached_projection(self, cache_key, now):
+        """Projeção do cache se ainda válida (< 2 horas) no instante now (epoch), senão None"""
         if cache_key in self.projections_cache:
             cached_proj = self.projections_cache[cache_key]
-            cache_time = datetime.fromisoformat(cached_proj.get("cache_time", "1970-01-01"))
-            if (datetime.now() - cache_time).total_seconds() < 7200:
+            # Epoch float: a checagem de validade não reparseia a data ISO
+            cache_time = cached_proj.get("cache_time_epoch")
+            if cache_time is None:
+                cache_time = datetime.fromisoformat(cached_proj.get("cache_time", "1970-01-01")).timestamp()
+            if now - cache_time < 7200:
                 return cached_proj
-        
+        return None
+    
+    def _season_stats_for(self, player_id, player_name):
+        """Season stats do cache em memória, buscando (e guardando) no L5 se faltar"""
         season_stats = self.season_stats.get(str(player_id))
         if not season_stats:
             season_stats = self._fetch_season_stats_for_player(player_id, player_name)
             if season_stats:
                 self.season_stats[str(player_id)] = season_stats
-        
+        return season_stats
+    
+    @staticmethod
+    def _recent_stats(player_context):
+        """Stats recentes (L5) do contexto do jogador"""
         recent_stats = {}
         if player_context:
             recent_stats = {
@@ -338,22 +576,12 @@ class ProjectionEngine:
                 "AST": player_context.get("ast_L5", 0),
                 "PRA": player_context.get("pra_L5", 0)
             }
-        
-        base_projection = self._calculate_base_projection(season_stats, recent_stats)
-        if not base_projection:
-            return None
-        
-        dvp_adjusted = self._apply_dvp_adjustments(base_projection, opponent, position, dvp_analyzer)
-        
-        contextual_projection = self._apply_contextual_factors(
-            dvp_adjusted, 
-            {"team": team, "opponent": opponent},
-            player_context or {}
-        )
-        
-        volatility = player_context.get("volatility_score", 0.3) if player_context else 0.3
-        ceilings = self._calculate_ceilings(contextual_projection, volatility)
-        
+        return recent_stats
+    
+    def _store_projection(self, cache_key, player_id, player_name, team, opponent, position,
+                          base_projection, dvp_adjusted, contextual_projection, ceilings, volatility, now):
+        """Monta a projeção final com o instante now (epoch), guarda no cache (flush com debounce) e a retorna"""
+        now = datetime.fromtimestamp(now)
         final_projection = {
             "player_id": player_id,
             "player_name": player_name,
@@ -365,14 +593,183 @@ class ProjectionEngine:
             "contextual_projection": contextual_projection,
             "ceilings": ceilings,
             "volatility": volatility,
-            "cache_time": datetime.now().isoformat(),
-            "projection_time": datetime.now().strftime("%Y-%m-d %H:%M:%S")
+            "cache_time": now.isoformat(),
+            "cache_time_epoch": now.timestamp(),
+            "projection_time": now.strftime("%Y-%m-d %H:%M:%S")
         }
         
         for stat in ["MIN", "PTS", "REB", "AST", "FG3M", "STL", "BLK", "PRA"]:
             final_projection[f"{stat}_proj"] = contextual_projection.get(stat, 0)
         
         self.projections_cache[cache_key] = final_projection
-        self._save_projections_cache(self.projections_cache)
+        self._dirty = True
+        self._maybe_flush()
+        
+        return final_projection
+    
+    def get_player_projection(self, player_id, player_name, team, opponent, position, 
+                            player_context=None, dvp_analyzer=None):
+        """
+        Retorna projeção completa para um jogador
+        """
+        # Um único instante para a checagem de validade e para o registro no cache
+        now = time.time()
+        cache_key = (player_id, team, opponent)
+        cached_proj = self._cached_projection(cache_key, now)
+        if cached_proj is not None:
+            return cached_proj
+        
+        season_stats = self._season_stats_for(player_id, player_name)
+        recent_stats = self._recent_stats(player_context)
+        
+        base_projection = self._calculate_base_projection(season_stats, recent_stats)
+        if not base_projection:
+            return None
+        
+        stages = None
+        if (tuple(base_projection)[:len(PROJ_STATS)] == PROJ_STATS
+                and all(type(base_projection[stat]) is float for stat in PROJ_STATS)):
+            stages = self._project_in_place(base_projection, opponent, position, dvp_analyzer, player_context or {})
+        
+        if stages is not None:
+            dvp_adjusted, contextual_projection = stages
+        else:
+            dvp_adjusted = self._apply_dvp_adjustments(base_projection, opponent, position, dvp_analyzer)
+            
+            contextual_projection = self._apply_contextual_factors(
+                dvp_adjusted, 
+                {"team": team, "opponent": opponent},
+                player_context or {}
+            )
+        
+        volatility = player_context.get("volatility_score", 0.3) if player_context else 0.3
+        ceilings = self._calculate_ceilings(contextual_projection, volatility)
+        
+        return self._store_projection(cache_key, player_id, player_name, team, opponent, position,
+                                      base_projection, dvp_adjusted, contextual_projection, ceilings, volatility, now)
+    
+    def _slate_inputs(self, player_id, player_name, opponent, position, player_context, dvp_analyzer):
+        """
+        Entradas numéricas de um jogador para o kernel project_slate, ou None se ele
+        não estiver no caminho híbrido (season + recent) com DvP e volatilidade numéricos.
+        """
+        season_stats = self._season_stats_for(player_id, player_name)
+        recent_stats = self._recent_stats(player_context)
+        if not season_stats or not recent_stats:
+            return None
+        
+        season = [self.safety.safe_float(season_stats.get(stat, 0)) for stat in PROJ_STATS]
+        recent = [self.safety.safe_float(recent_stats.get(stat, 0)) for stat in PROJ_STATS]
+        
+        dvp_multipliers = None
+        dvp_row = [1.0] * len(PROJ_STATS)
+        if opponent and position and dvp_analyzer:
+            dvp_multipliers = self._dvp_multipliers(opponent, position, dvp_analyzer)
+            if not all(type(m) in (int, float) for m in dvp_multipliers.values()):
+                return None
+            dvp_row = [dvp_multipliers.get(stat, 1.0) for stat in PROJ_STATS]
+        
+        context_factors = self._context_factors(player_context or {})
+        volatility = player_context.get("volatility_score", 0.3) if player_context else 0.3
+        volatility_factor = 1.0 + (volatility * 0.5)
+        if not isinstance(volatility_factor, float):
+            return None
+        
+        return season, recent, dvp_row, dvp_multipliers, context_factors, volatility, volatility_factor
+    
+    def project_slate(self, players, dvp_analyzer=None):
+        """
+        Projeta um slate inteiro de uma vez.
+        
+        Jogadores do caminho híbrido são empilhados em matrizes (N, 8) e projetados
+        juntos no kernel project_slate (prange com numba a partir de PARALLEL_SLATE_MIN
+        jogadores); os demais passam por get_player_projection. O resultado e o cache
+        ficam iguais aos de chamar get_player_projection jogador a jogador.
+        
+        Args:
+            players: lista de dicts com player_id, player_name, team, opponent,
+                     position e player_context (opcional)
+            dvp_analyzer: analisador de DvP opcional
+        
+        Returns:
+            Lista de projeções na ordem de players (None para quem não tem dados)
+        """
+        results = [None] * len(players)
+        batch = []
+        pending = {}  # (player_id, team, opponent) -> índice do jogador que vai gerar essa projeção
+        aliases = []
+        now = time.time()  # um instante para o slate inteiro
+        
+        for i, player in enumerate(players):
+            player_id = player.get("player_id")
+            team = player.get("team")
+            opponent = player.get("opponent")
+            cache_key = (player_id, team, opponent)
+            # Chave repetida no slate: em série seria um hit do cache
+            if cache_key in pending:
+                aliases.append((i, pending[cache_key]))
+                continue
+            cached_proj = self._cached_projection(cache_key, now)
+            if cached_proj is not None:
+                results[i] = cached_proj
+                continue
+            
+            player_context = player.get("player_context")
+            try:
+                inputs = self._slate_inputs(player_id, player.get("player_name"), opponent,
+                                            player.get("position"), player_context, dvp_analyzer)
+            except Exception:
+                inputs = None  # get_player_projection reproduz (e propaga) o erro
+            if inputs is None:
+                results[i] = self.get_player_projection(
+                    player_id, player.get("player_name"), team, opponent, player.get("position"),
+                    player_context, dvp_analyzer
+                )
+                continue
+            pending[cache_key] = i
+            batch.append((i, cache_key, player, inputs))
+        
+        if batch:
+            season, recent, dvp_rows, _, context_factors, _, volatility_factors = zip(*(b[3] for b in batch))
+            kernel = project_slate_parallel if len(batch) >= PARALLEL_SLATE_MIN else project_slate_serial
+            base_mat, dvp_mat, ctx_mat, ceil_mat = kernel(
+                np.array(season, dtype=float), np.array(recent, dtype=float),
+                HYBRID_WEIGHT_SEASON, HYBRID_WEIGHT_RECENT, np.array(dvp_rows, dtype=float),
+                np.array([f["combined_factor"] for f in context_factors], dtype=float),
+                np.array(volatility_factors, dtype=float), CEILING_TABLE, CEILING_IDX
+            )
+            source = f"hybrid_{int(HYBRID_WEIGHT_SEASON*100)}_{int(HYBRID_WEIGHT_RECENT*100)}"
+            
+            for (i, cache_key, player, inputs), base_row, dvp_row, ctx_row, ceil_rows in zip(
+                    batch, base_mat.tolist(), dvp_mat.tolist(), ctx_mat.tolist(), ceil_mat.tolist()):
+                _, _, _, dvp_multipliers, factors, volatility, _ = inputs
+                
+                base_projection = dict(zip(PROJ_STATS, base_row), source=source)
+                extra = {"source": source}
+                dvp_adjusted = base_projection
+                if dvp_multipliers is not None:
+                    extra["dvp_applied"] = True
+                    extra["dvp_multipliers"] = dvp_multipliers
+                    dvp_adjusted = dict(zip(PROJ_STATS, dvp_row), **extra)
+                extra["context_factors"] = factors
+                contextual_projection = dict(zip(PROJ_STATS, ctx_row), **extra)
+                
+                ceilings = {}
+                for keys, stat, stat_values in zip(CEILING_KEYS, CEILING_STATS, ceil_rows):
+                    if contextual_projection[stat] > 0:
+                        ceilings.update(zip(keys, stat_values))
+                min_base = contextual_projection["MIN"]
+                ceilings["MIN_90p"] = min(min_base * 1.25, 48)
+                ceilings["MIN_95p"] = min(min_base * 1.35, 48)
+                ceilings["MIN_abs"] = min(min_base * 1.5, 48)
+                
+                results[i] = self._store_projection(
+                    cache_key, player.get("player_id"), player.get("player_name"), player.get("team"),
+                    player.get("opponent"), player.get("position"),
+                    base_projection, dvp_adjusted, contextual_projection, ceilings, volatility, now
+                )
+        
+        for i, source_index in aliases:
+            results[i] = results[source_index]
         
-        return final_projection
\ No newline at end of file
+        return results
@@ -0,0 +1,133 @@
+# modules/projection_jit.py
+"""
+Núcleo numérico do ProjectionEngine.
+
+As projeções trafegam como vetores float64 de tamanho fixo na ordem de
+PROJ_STATS; a conversão dict <-> array fica nas bordas do ProjectionEngine.
+Com numba disponível os kernels são compilados (cache=True, sem fastmath
+para manter a mesma aritmética do caminho em Python puro).
+"""
+
+import numpy as np
+
+# Numba é opcional: sem ele os kernels rodam como Python/NumPy comum
+try:
+    import numba as nb
+    _NUMBA_AVAILABLE = True
+except Exception:
+    nb = None
+    _NUMBA_AVAILABLE = False
+
+# prange vira range comum sem numba (ou no kernel serial)
+prange = nb.prange if _NUMBA_AVAILABLE else range
+
+# Ordem fixa dos stats projetados
+PROJ_STATS = ("MIN", "PTS", "REB", "AST", "FG3M", "STL", "BLK", "PRA")
+STAT_IDX = {stat: i for i, stat in enumerate(PROJ_STATS)}
+STAT_PTS, STAT_REB, STAT_AST, STAT_PRA = (STAT_IDX[stat] for stat in ("PTS", "REB", "AST", "PRA"))
+
+# Ceilings: multiplicadores (90p, 95p, abs) por stat, antes do fator de volatilidade
+CEILING_PERCENTILES = ("90p", "95p", "abs")
+CEILING_STATS = ("PTS", "REB", "AST", "FG3M", "STL", "BLK", "PRA")
+CEILING_TABLE = np.array([
+    [1.3, 1.5, 1.8],   # PTS
+    [1.4, 1.7, 2.0],   # REB
+    [1.4, 1.6, 1.9],   # AST
+    [1.5, 1.8, 2.2],   # FG3M
+    [1.6, 2.0, 2.5],   # STL
+    [1.6, 2.0, 2.5],   # BLK
+    [1.3, 1.5, 1.8],   # PRA
+])
+CEILING_KEYS = tuple(
+    tuple(f"{stat}_{percentile}" for percentile in CEILING_PERCENTILES)
+    for stat in CEILING_STATS
+)
+CEILING_IDX = np.array([STAT_IDX[stat] for stat in CEILING_STATS])
+
+# Abaixo disso o slate roda no kernel serial: o overhead das threads não compensa
+PARALLEL_SLATE_MIN = 32
+
+
+def hybrid_projection(season, recent, weight_season, weight_recent):
+    """
+    Mistura season/recent stat a stat: média ponderada quando ambos > 0,
+    senão o lado season (se > 0) ou o recent.
+    """
+    out = np.empty(season.shape[0])
+    for i in range(season.shape[0]):
+        if season[i] > 0 and recent[i] > 0:
+            out[i] = (season[i] * weight_season) + (recent[i] * weight_recent)
+        elif season[i] > 0:
+            out[i] = season[i]
+        else:
+            out[i] = recent[i]
+    return out
+
+
+def ceiling_values(base, table, volatility_factor):
+    """Ceilings (n_stats, 3): base * multiplicador * fator de volatilidade"""
+    out = np.empty(table.shape)
+    for i in range(table.shape[0]):
+        for j in range(table.shape[1]):
+            out[i, j] = base[i] * table[i, j] * volatility_factor
+    return out
+
+
+def project_core(season, recent, weight_season, weight_recent, dvp, factor, volatility_factor,
+                 table, ceiling_idx, out_base, out_dvp, out_ctx, out_ceil):
+    """
+    Pipeline de um jogador do caminho híbrido, escrito nos buffers de saída:
+    base híbrida -> DvP (PRA recalculado) -> fator contextual (PRA recalculado)
+    -> ceilings dos stats positivos (zeros nos demais).
+    Mesma aritmética de _project_in_place + _calculate_ceilings.
+    """
+    n = season.shape[0]
+    for i in range(n):
+        if season[i] > 0 and recent[i] > 0:
+            out_base[i] = (season[i] * weight_season) + (recent[i] * weight_recent)
+        elif season[i] > 0:
+            out_base[i] = season[i]
+        else:
+            out_base[i] = recent[i]
+    pts, reb, ast, pra = STAT_PTS, STAT_REB, STAT_AST, STAT_PRA
+    for i in range(n):
+        out_dvp[i] = out_base[i] * dvp[i]
+    out_dvp[pra] = out_dvp[pts] + out_dvp[reb] + out_dvp[ast]
+    for i in range(n):
+        out_ctx[i] = out_dvp[i] * factor
+    out_ctx[pra] = out_ctx[pts] + out_ctx[reb] + out_ctx[ast]
+    for k in range(table.shape[0]):
+        base = out_ctx[ceiling_idx[k]]
+        for j in range(table.shape[1]):
+            out_ceil[k, j] = base * table[k, j] * volatility_factor if base > 0 else 0.0
+
+
+def project_slate(season_mat, recent_mat, weight_season, weight_recent, dvp_mat,
+                  factor_vec, volatility_vec, table, ceiling_idx):
+    """
+    Projeta N jogadores independentes (linhas das matrizes (N, len(PROJ_STATS))).
+
+    Returns:
+        (base, dvp, contextual) em matrizes (N, len(PROJ_STATS)) e ceilings (N, n_ceil, 3)
+    """
+    n = season_mat.shape[0]
+    out_base = np.empty(season_mat.shape)
+    out_dvp = np.empty(season_mat.shape)
+    out_ctx = np.empty(season_mat.shape)
+    out_ceil = np.empty((n, table.shape[0], table.shape[1]))
+    for i in prange(n):
+        project_core(season_mat[i], recent_mat[i], weight_season, weight_recent, dvp_mat[i],
+                     factor_vec[i], volatility_vec[i], table, ceiling_idx,
+                     out_base[i], out_dvp[i], out_ctx[i], out_ceil[i])
+    return out_base, out_dvp, out_ctx, out_ceil
+
+
+# Sem numba as duas variantes são a mesma função Python
+project_slate_parallel = project_slate
+
+if _NUMBA_AVAILABLE:
+    hybrid_projection = nb.njit(cache=True, nogil=True)(hybrid_projection)
+    ceiling_values = nb.njit(cache=True, nogil=True)(ceiling_values)
+    project_core = nb.njit(cache=True, nogil=True)(project_core)
+    project_slate_parallel = nb.njit(cache=True, parallel=True)(project_slate)
+    project_slate = nb.njit(cache=True, nogil=True)(project_slate)
@@ -4,21 +4,79 @@ Arquivo temporário para resolver problemas de importação.
 Contém todas as funções necessárias para outros módulos.
 """
 import os
+import re
 import pickle
 import json
 import tempfile
+import unicodedata
 from datetime import datetime
+from functools import lru_cache
+
+from modules.config import L5_CACHE_FILE, TEAM_ABBR_TO_ODDS
+
+# orjson é opcional: serializa/lê os caches JSON mais rápido quando disponível
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
+def _json_dumps(obj) -> bytes:
+    """JSON indentado em UTF-8; orjson também aceita escalares/arrays numpy"""
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except Exception:
+            pass  # tipo não suportado: cai no json padrão
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _json_loads(data):
+    """Decodifica JSON (bytes) com orjson; o json padrão cobre o que ele rejeita (NaN, Infinity)"""
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except Exception:
+            pass
+    return json.loads(data)
 
 # ============================================================================
 # FUNÇÕES DE CACHE
 # ============================================================================
 
-def atomic_save(path, obj_bytes):
-    """Salva arquivo atomicamente"""
+# Tamanho máximo de cada os.write em atomic_save (caches grandes vão em fatias)
+WRITE_CHUNK_SIZE = 8 * 1024 * 1024
+
+def _write_all(fd, data):
+    """os.write até o fim, em fatias de WRITE_CHUNK_SIZE sem copiar (escritas parciais são possíveis)"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view[:WRITE_CHUNK_SIZE])
+        view = view[written:]
+
+def atomic_save(path, obj_bytes, durable=True):
+    """
+    Salva arquivo atomicamente. durable=False grava direto no destino, sem
+    arquivo temporário nem replace: só para caches que podem ser recalculados
+    (um leitor concorrente pode ver o arquivo pela metade e o descarta).
+    """
+    if not durable:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                _write_all(fd, obj_bytes)
+            finally:
+                os.close(fd)
+            return True
+        except Exception:
+            return False
     dirpath = os.path.dirname(path) or "."
     fd, tmp = tempfile.mkstemp(dir=dirpath)
     try:
-        with os.fdopen(fd, "wb") as f: f.write(obj_bytes)
+        try:
+            _write_all(fd, obj_bytes)
+        finally:
+            os.close(fd)
         os.replace(tmp, path); return True
     except Exception:
         try:
@@ -29,7 +87,7 @@ def atomic_save(path, obj_bytes):
 def save_pickle(path, obj):
     """Salva objeto em arquivo pickle"""
     try:
-        data = pickle.dumps(obj)
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
         return atomic_save(path, data)
     except Exception:
         return False
@@ -45,8 +103,7 @@ def load_pickle(path):
 def save_json(path, obj):
     """Salva objeto em arquivo JSON"""
     try:
-        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
-        return atomic_save(path, data)
+        return atomic_save(path, _json_dumps(obj))
     except Exception:
         return False
 
@@ -54,7 +111,7 @@ def load_json(path):
     """Carrega objeto de arquivo JSON"""
     try:
         if not os.path.exists(path): return None
-        with open(path, "r", encoding="utf-8") as f: return json.load(f)
+        with open(path, "rb") as f: return _json_loads(f.read())
     except Exception:
         return None
 
@@ -85,10 +142,19 @@ class SafetyUtils:
         try:
             if value is None:
                 return default
+            # Caminho rápido pelo tipo exato (float/int são a maioria das chamadas)
+            value_type = type(value)
+            if value_type is float:
+                return value
+            if value_type is int:
+                return float(value)
             if isinstance(value, (int, float)):
                 return float(value)
             if isinstance(value, str):
-                cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
+                if value.isascii():
+                    cleaned = _NUMCLEAN_RE.sub("", value)
+                else:  # isdigit() aceita dígitos unicode que a classe 0-9 não cobre
+                    cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
                 return float(cleaned) if cleaned else default
             return float(value)
         except:
@@ -102,16 +168,32 @@ def safe_get(dictionary, key, default=None):
     """Acesso seguro a dicionários com fallback"""
     return dictionary.get(key, default)
 
+# Sufixos removidos e pontuação trocada por espaço em normalize_name
+_JR_SR_RE = re.compile(r"\b(jr|sr|ii|iii|iv)\b")
+_PUNCT_TBL = str.maketrans({".": " ", ",": " ", "-": " "})
+
+# Dobra para ASCII dos acentos latinos (U+0080..U+024F), equivalente ao
+# NFKD + encode("ascii", "ignore") caractere a caractere; letras sem forma
+# ASCII viram "". Fora dessa faixa normalize_name ainda cai no NFKD.
+_ASCII_FOLD = {
+    cp: unicodedata.normalize("NFKD", chr(cp)).encode("ascii", "ignore").decode("ascii")
+    for cp in range(0x80, 0x250)
+}
+
+# Status out/questionable (comparado já em minúsculas)
+_STATUS_OUTQ_RE = re.compile(r"out|ir|injur|questionable")
+
+# Tudo que não é dígito ASCII, ponto ou sinal (limpeza de números em texto)
+_NUMCLEAN_RE = re.compile(r"[^0-9.\-]")
+
+@lru_cache(maxsize=8192)
 def normalize_name(n: str) -> str:
-    """Normaliza nomes para comparação"""
-    import re
-    import unicodedata
-    
+    """Normaliza nomes para comparação (memoizado: os mesmos nomes se repetem no slate)"""
     if not n: return ""
-    n = str(n).lower()
-    n = n.replace(".", " ").replace(",", " ").replace("-", " ")
-    n = re.sub(r"\b(jr|sr|ii|iii|iv)\b", "", n)
-    n = unicodedata.normalize("NFKD", n).encode("ascii","ignore").decode("ascii")
+    n = str(n).lower().translate(_PUNCT_TBL)
+    n = _JR_SR_RE.sub("", n).translate(_ASCII_FOLD)
+    if not n.isascii():
+        n = unicodedata.normalize("NFKD", n).encode("ascii","ignore").decode("ascii")
     return " ".join(n.split())
 
 def safe_abs_spread(val):
@@ -123,4 +205,205 @@ def safe_abs_spread(val):
 def _status_is_out_or_questionable(status: str) -> bool:
     """Verifica se status é out ou questionable"""
     s = (status or "").lower()
-    return ("out" in s) or ("questionable" in s) or ("injur" in s) or ("ir" in s)
\ No newline at end of file
+    return bool(_STATUS_OUTQ_RE.search(s))
+
+def top_k_rows(df, columns, k=10):
+    """
+    Top k linhas de cada coluna a partir de uma única conversão para ndarray.
+    Mesmo resultado de df.nlargest(k, col) por coluna (partição O(n) + ordenação
+    só dos candidatos): empates seguem a ordem original das linhas e NaN só
+    entra quando faltam valores para o top
+    """
+    import numpy as np
+    import pandas as pd
+
+    columns = list(columns)
+    if not all(pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+               for col in columns):
+        return {col: df.nlargest(k, col) for col in columns}
+
+    values = df[columns].to_numpy(dtype=float)
+    tops = {}
+    for j, col in enumerate(columns):
+        col_values = values[:, j]
+        candidates = np.flatnonzero(~np.isnan(col_values))
+        if len(candidates) > k:
+            # Todos os empatados com o k-ésimo maior seguem como candidatos
+            kth = np.partition(col_values[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[col_values[candidates] >= kth]
+        order = candidates[np.argsort(-col_values[candidates], kind="stable")][:k]
+        if len(order) < k:
+            # Como no nlargest: faltando valores, as linhas NaN completam o top na ordem original
+            order = np.concatenate([order, np.flatnonzero(np.isnan(col_values))[:k - len(order)]])
+        tops[col] = df.iloc[order]
+    return tops
+
+# ============================================================================
+# DADOS DO SESSION_STATE (usados pelas páginas via "from modules.utils import *")
+# ============================================================================
+
+def load_l5():
+    """DataFrame do L5 salvo por data_fetchers.get_players_l5 (vazio sem cache)"""
+    import pandas as pd
+
+    saved = load_pickle(L5_CACHE_FILE)
+    return saved.get("df") if saved and isinstance(saved, dict) else pd.DataFrame()
+
+def get_l5_cached():
+    """
+    DataFrame do L5 guardado no session_state. O pickle só é relido quando o
+    arquivo muda (mtime/tamanho), então vários leitores na mesma renderização
+    compartilham uma única desserialização. Somente leitura: não alterar in-place.
+    """
+    import streamlit as st
+
+    try:
+        stat = os.stat(L5_CACHE_FILE)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        signature = None
+    cached = st.session_state.get("df_l5_raw")
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    df = load_l5()
+    st.session_state.df_l5_raw = (signature, df)
+    return df
+
+# Spread (em módulo) a partir do qual o jogo é marcado como risco de blowout
+BLOWOUT_SPREAD_THRESHOLD = 10
+
+def _is_blowout_spread(spread):
+    if not spread:
+        return False
+    try:
+        return abs(float(spread)) >= BLOWOUT_SPREAD_THRESHOLD
+    except Exception:
+        return False
+
+def get_scoreboard_odds():
+    """
+    Jogos do scoreboard já pareados com as odds: lista de
+    (game, spread, total, blowout_risk).
+    """
+    import streamlit as st
+
+    games = st.session_state.get("scoreboard") or []
+    odds = st.session_state.get("odds") or {}
+
+    pairs = []
+    for game in games:
+        away = game.get("away")
+        home = game.get("home")
+        away_full = TEAM_ABBR_TO_ODDS.get(away, away)
+        home_full = TEAM_ABBR_TO_ODDS.get(home, home)
+        spread = None
+        total = None
+        if away_full and home_full:
+            game_odds = odds.get(f"{away_full}@{home_full}", {})
+            spread = game_odds.get("spread")
+            total = game_odds.get("total")
+        pairs.append((game, spread, total, _is_blowout_spread(spread)))
+    return pairs
+
+def get_injuries_total():
+    """Total de jogadores lesionados em injuries_data ({time: [lesões]})"""
+    import streamlit as st
+
+    injuries = st.session_state.get("injuries_data")
+    return sum(len(team_injuries) for team_injuries in injuries.values()) if injuries else 0
+
+def validate_pipeline_integrity(required_components=None):
+    """
+    Valida se os dados necessários para o pipeline estão disponíveis.
+    """
+    import streamlit as st
+    
+    if required_components is None:
+        required_components = ['l5', 'scoreboard']
+    
+    checks = {
+        'l5': {
+            'name': 'Dados L5 (últimos 5 jogos)',
+            'critical': True,
+            'status': False,
+            'message': ''
+        },
+        'scoreboard': {
+            'name': 'Scoreboard do dia',
+            'critical': True,
+            'status': False,
+            'message': ''
+        },
+        'odds': {
+            'name': 'Odds das casas',
+            'critical': False,
+            'status': False,
+            'message': ''
+        },
+        'dvp': {
+            'name': 'Dados Defense vs Position',
+            'critical': False,
+            'status': False,
+            'message': ''
+        },
+        'injuries': {
+            'name': 'Dados de lesões',
+            'critical': False,
+            'status': False,
+            'message': ''
+        }
+    }
+    
+    # Validar L5
+    if 'l5' in required_components:
+        df_l5 = st.session_state.get('df_l5')
+        if df_l5 is not None and hasattr(df_l5, 'shape') and not df_l5.empty:
+            checks['l5']['status'] = True
+            checks['l5']['message'] = f'Carregados {len(df_l5)} jogadores'
+        else:
+            checks['l5']['message'] = 'Dados L5 não disponíveis'
+    
+    # Validar scoreboard
+    if 'scoreboard' in required_components:
+        scoreboard = st.session_state.get('scoreboard')
+        if scoreboard and len(scoreboard) > 0:
+            checks['scoreboard']['status'] = True
+            checks['scoreboard']['message'] = f'{len(scoreboard)} jogos hoje'
+        else:
+            checks['scoreboard']['message'] = 'Nenhum jogo encontrado para hoje'
+    
+    # Validar odds
+    if 'odds' in required_components:
+        odds = st.session_state.get('odds')
+        if odds and len(odds) > 0:
+            checks['odds']['status'] = True
+            checks['odds']['message'] = f'{len(odds)} jogos com odds'
+        else:
+            checks['odds']['message'] = 'Odds não disponíveis'
+    
+    # Validar DvP
+    if 'dvp' in required_components:
+        dvp_analyzer = st.session_state.get('dvp_analyzer')
+        if dvp_analyzer and hasattr(dvp_analyzer, 'defense_data') and dvp_analyzer.defense_data:
+            checks['dvp']['status'] = True
+            checks['dvp']['message'] = f'Dados de {len(dvp_analyzer.defense_data)} times'
+        else:
+            checks['dvp']['message'] = 'Dados DvP não disponíveis'
+    
+    # Validar lesões
+    if 'injuries' in required_components:
+        injuries = st.session_state.get('injuries_data')
+        if injuries and len(injuries) > 0:
+            checks['injuries']['status'] = True
+            checks['injuries']['message'] = f'Lesões carregadas'
+        else:
+            checks['injuries']['message'] = 'Dados de lesões não disponíveis'
+    
+    # Determinar se todos os componentes críticos estão ok
+    all_critical_ok = all(
+        check['status'] for key, check in checks.items() 
+        if key in required_components and check['critical']
+    )
+    
+    return all_critical_ok, checks
@@ -3,13 +3,12 @@ import os
 import pickle
 import json
 import re
-import tempfile
 import unicodedata
 import difflib
-import pandas as pd
-import numpy as np
+import inspect
 from datetime import datetime, timedelta
 from itertools import combinations
+from functools import lru_cache
 
 # Injuries (flexível)
 try:
@@ -19,16 +18,42 @@ except Exception:
 
 from modules.config import *
 
+# Definidos uma única vez em modules/utils.py, o módulo que "modules.utils" resolve
+from modules.utils import (
+    _json_dumps, _json_loads, _write_all, atomic_save, WRITE_CHUNK_SIZE,
+    load_l5, get_l5_cached, BLOWOUT_SPREAD_THRESHOLD, _is_blowout_spread,
+    get_scoreboard_odds, get_injuries_total, validate_pipeline_integrity
+)
+
+# Tudo que não é dígito ASCII, ponto ou sinal (limpeza de números em texto)
+_NUMCLEAN_RE = re.compile(r"[^0-9.\-]")
+
+# pandas/numpy são importados dentro das funções que os usam: normalize_name
+# e os helpers de cache não pagam o import deles.
+
 # ============================================================================
 # FUNÇÕES UTILITÁRIAS BÁSICAS
 # ============================================================================
 
+# Sufixos removidos e pontuação trocada por espaço em normalize_name
+_SUFFIX_RE = re.compile(r"\b(?:jr|sr|ii|iii|iv)\b")
+_PUNCT_TBL = str.maketrans({".": " ", ",": " ", "-": " "})
+
+# Dobra para ASCII dos acentos latinos (U+0080..U+024F), equivalente ao
+# NFKD + encode("ascii", "ignore") caractere a caractere; letras sem forma
+# ASCII viram "". Fora dessa faixa normalize_name ainda cai no NFKD.
+_ASCII_FOLD = {
+    cp: unicodedata.normalize("NFKD", chr(cp)).encode("ascii", "ignore").decode("ascii")
+    for cp in range(0x80, 0x250)
+}
+
+@lru_cache(maxsize=8192)
 def normalize_name(n: str) -> str:
     if not n: return ""
-    n = str(n).lower()
-    n = n.replace(".", " ").replace(",", " ").replace("-", " ")
-    n = re.sub(r"\b(jr|sr|ii|iii|iv)\b", "", n)
-    n = unicodedata.normalize("NFKD", n).encode("ascii","ignore").decode("ascii")
+    n = str(n).lower().translate(_PUNCT_TBL)
+    n = _SUFFIX_RE.sub("", n).translate(_ASCII_FOLD)
+    if not n.isascii():
+        n = unicodedata.normalize("NFKD", n).encode("ascii","ignore").decode("ascii")
     return " ".join(n.split())
 
 def safe_abs_spread(val):
@@ -40,26 +65,30 @@ def _status_is_out_or_questionable(status: str) -> bool:
     s = (status or "").lower()
     return ("out" in s) or ("questionable" in s) or ("injur" in s) or ("ir" in s)
 
-def atomic_save(path, obj_bytes):
-    dirpath = os.path.dirname(path) or "."
-    fd, tmp = tempfile.mkstemp(dir=dirpath)
+def save_pickle(path, obj):
     try:
-        with os.fdopen(fd, "wb") as f: f.write(obj_bytes)
-        os.replace(tmp, path); return True
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        return atomic_save(path, data)
     except Exception:
-        try:
-            if os.path.exists(tmp): os.remove(tmp)
-        except Exception: pass
         return False
 
-def save_pickle(path, obj):
+def load_pickle(path):
     try:
-        data = pickle.dumps(obj)
-        return atomic_save(path, data)
+        if not os.path.exists(path): return None
+        with open(path, "rb") as f: return pickle.load(f)
+    except Exception:
+        return None
+
+# Caches internos (não editados à mão): pickle binário em vez de JSON indentado
+FAST_CACHE_PROTOCOL = 5
+
+def save_fast_cache(path, obj, durable=True):
+    try:
+        return atomic_save(path, pickle.dumps(obj, protocol=FAST_CACHE_PROTOCOL), durable=durable)
     except Exception:
         return False
 
-def load_pickle(path):
+def load_fast_cache(path):
     try:
         if not os.path.exists(path): return None
         with open(path, "rb") as f: return pickle.load(f)
@@ -68,20 +97,47 @@ def load_pickle(path):
 
 def save_json(path, obj):
     try:
-        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
-        return atomic_save(path, data)
+        return atomic_save(path, _json_dumps(obj))
     except Exception:
         return False
 
 def load_json(path):
     try:
         if not os.path.exists(path): return None
-        with open(path, "r", encoding="utf-8") as f: return json.load(f)
+        with open(path, "rb") as f: return _json_loads(f.read())
     except Exception:
         return None
 
+def _injury_monitor_kwargs():
+    """
+    kwargs para o construtor do InjuryMonitor lidos da assinatura, na mesma
+    preferência da lista de tentativas (cache_file > cache_path, ttl_hours junto
+    do arquivo). None quando a assinatura não pode ser inspecionada.
+    """
+    try:
+        params = inspect.signature(InjuryMonitor).parameters
+    except (TypeError, ValueError):
+        return None
+    accepts_any = any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values())
+    kwargs = {}
+    if accepts_any or "cache_file" in params:
+        kwargs["cache_file"] = INJURIES_CACHE_FILE
+    elif "cache_path" in params:
+        kwargs["cache_path"] = INJURIES_CACHE_FILE
+    if kwargs and (accepts_any or "ttl_hours" in params):
+        kwargs["ttl_hours"] = 24
+    return kwargs
+
 def init_injury_monitor_flexible():
     if InjuryMonitor is None: return None
+    kwargs = _injury_monitor_kwargs()
+    if kwargs is not None:
+        try:
+            return InjuryMonitor(**kwargs)
+        except TypeError:
+            pass  # assinatura enganosa: volta às tentativas abaixo
+        except Exception:
+            return None
     tries = [
         {"cache_file": INJURIES_CACHE_FILE, "ttl_hours": 24},
         {"cache_path": INJURIES_CACHE_FILE, "ttl_hours": 24},
@@ -123,49 +179,51 @@ def safe_load_initial_data():
         fetch_team_opponent_stats_simple, fetch_odds_for_today_simple
     )
     
-    if "scoreboard" not in st.session_state:
+    # Uma leitura das chaves do SessionStateProxy; os testes abaixo usam o set local
+    have = set(st.session_state.keys())
+    
+    if "scoreboard" not in have:
         st.session_state.scoreboard = fetch_espn_scoreboard_simple(progress_ui=False)
     
-    if "team_advanced" not in st.session_state:
+    if "team_advanced" not in have:
         st.session_state.team_advanced = fetch_team_advanced_stats_simple()
     
-    if "team_opponent" not in st.session_state:
+    if "team_opponent" not in have:
         st.session_state.team_opponent = fetch_team_opponent_stats_simple()
     
-    if "odds" not in st.session_state:
+    if "odds" not in have:
         st.session_state.odds = fetch_odds_for_today_simple()
     
-    if "name_overrides" not in st.session_state:
+    if "name_overrides" not in have:
         st.session_state.name_overrides = load_name_overrides()
     
-    if "df_l5" not in st.session_state:
-        saved = load_pickle(L5_CACHE_FILE)
-        st.session_state.df_l5 = saved.get("df") if saved and isinstance(saved, dict) else pd.DataFrame()
+    if "df_l5" not in have:
+        st.session_state.df_l5 = get_l5_cached()
     
-    if "injuries_monitor" not in st.session_state or st.session_state.injuries_monitor is None:
+    if "injuries_monitor" not in have or st.session_state.injuries_monitor is None:
         st.session_state.injuries_monitor = init_injury_monitor_flexible()
     
-    if "injuries_data" not in st.session_state:
+    if "injuries_data" not in have:
         st.session_state.injuries_data = {}
     
-    if "momentum_data" not in st.session_state:
+    if "momentum_data" not in have:
         st.session_state.momentum_data = get_momentum_data()
     
     # Importar DvPAnalyzer somente agora (não tem dependência circular)
-    try:
-        from modules.dvp_module import DvPAnalyzer
-        if "dvp_analyzer" not in st.session_state:
+    if "dvp_analyzer" not in have:
+        try:
+            from modules.dvp_module import DvPAnalyzer
             st.session_state.dvp_analyzer = DvPAnalyzer()
-    except ImportError:
-        st.session_state.dvp_analyzer = None
+        except ImportError:
+            st.session_state.dvp_analyzer = None
     
     # Importar ProjectionEngine somente agora
-    try:
-        from modules.projection_engine import ProjectionEngine
-        if "projection_engine" not in st.session_state:
+    if "projection_engine" not in have:
+        try:
+            from modules.projection_engine import ProjectionEngine
             st.session_state.projection_engine = ProjectionEngine()
-    except ImportError:
-        st.session_state.projection_engine = None
+        except ImportError:
+            st.session_state.projection_engine = None
     
     # Carregar lesões se houver monitor
     im = st.session_state.injuries_monitor
@@ -216,131 +274,73 @@ def calculate_momentum_score(player_stats):
     except Exception:
         return 50.0
 
+def calculate_momentum_scores(df):
+    """
+    Versão vetorizada de calculate_momentum_score para todas as linhas do L5.
+    Retorna a lista de scores ou None quando alguma coluna usada não é numérica
+    (ou está duplicada); nesse caso vale o cálculo linha a linha.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n = len(df)
+    if 'PTS_AVG' not in df.columns:
+        return [50.0] * n
+    if not df.columns.is_unique:
+        return None
+
+    def _col(name, default):
+        if name not in df.columns:
+            return np.full(n, default)
+        col = df[name]
+        if not pd.api.types.is_numeric_dtype(col):
+            return None
+        return col.to_numpy(dtype=float)
+
+    min_avg = _col('MIN_AVG', 0.0)
+    pra_avg = _col('PRA_AVG', 0.0)
+    min_cv = _col('MIN_CV', 1.0)
+    if min_avg is None or pra_avg is None or min_cv is None:
+        return None
+
+    # NaN falha todas as comparações, como no cálculo escalar
+    score = np.full(n, 50.0)
+    score += np.where(min_avg >= 30, 10, np.where(min_avg >= 20, 5, 0))
+    score += np.where(pra_avg >= 25, 15, np.where(pra_avg >= 15, 5, np.where(pra_avg < 5, -10, 0)))
+    score += np.where(min_cv < 0.3, 10, np.where(min_cv > 0.7, -10, 0))
+    return np.clip(score, 0.0, 100.0).round(1).tolist()
+
 def get_momentum_data():
     """Retorna dados de momentum baseados em cache ou cálculo em tempo real"""
-    cached = load_json(MOMENTUM_CACHE_FILE)
+    cached = load_fast_cache(MOMENTUM_FAST_CACHE_FILE)
     if cached:
         return cached
     
-    saved = load_pickle(L5_CACHE_FILE)
-    df_l5 = saved.get("df") if saved and isinstance(saved, dict) else pd.DataFrame()
+    df_l5 = get_l5_cached()
     
     momentum_data = {}
     if not df_l5.empty:
-        for _, row in df_l5.iterrows():
-            player_id = row.get("PLAYER_ID")
-            player_name = row.get("PLAYER")
+        scores = calculate_momentum_scores(df_l5)
+        if scores is None:
+            # Colunas não numéricas: cálculo linha a linha
+            scores = [calculate_momentum_score(row.to_dict()) for _, row in df_l5.iterrows()]
+        columns = [
+            df_l5[col].tolist() if col in df_l5.columns else [None] * len(df_l5)
+            for col in ("PLAYER_ID", "PLAYER", "TEAM", "MIN_AVG", "PRA_AVG")
+        ]
+        for player_id, player_name, team, min_avg, pra_avg, momentum_score in zip(*columns, scores):
             if player_id and player_name:
-                momentum_score = calculate_momentum_score(row.to_dict())
                 momentum_data[player_name] = {
                     "score": momentum_score,
-                    "team": row.get("TEAM"),
-                    "min_avg": row.get("MIN_AVG"),
-                    "pra_avg": row.get("PRA_AVG")
+                    "team": team,
+                    "min_avg": min_avg,
+                    "pra_avg": pra_avg
                 }
     
-    save_json(MOMENTUM_CACHE_FILE, momentum_data)
+    # Cache recalculável a partir do L5: não precisa da escrita atômica
+    save_fast_cache(MOMENTUM_FAST_CACHE_FILE, momentum_data, durable=False)
     return momentum_data
 
-# ============================================================================
-# VALIDAÇÃO DE PIPELINE
-# ============================================================================
-
-def validate_pipeline_integrity(required_components=None):
-    """
-    Valida se os dados necessários para o pipeline estão disponíveis.
-    """
-    import streamlit as st
-    
-    if required_components is None:
-        required_components = ['l5', 'scoreboard']
-    
-    checks = {
-        'l5': {
-            'name': 'Dados L5 (últimos 5 jogos)',
-            'critical': True,
-            'status': False,
-            'message': ''
-        },
-        'scoreboard': {
-            'name': 'Scoreboard do dia',
-            'critical': True,
-            'status': False,
-            'message': ''
-        },
-        'odds': {
-            'name': 'Odds das casas',
-            'critical': False,
-            'status': False,
-            'message': ''
-        },
-        'dvp': {
-            'name': 'Dados Defense vs Position',
-            'critical': False,
-            'status': False,
-            'message': ''
-        },
-        'injuries': {
-            'name': 'Dados de lesões',
-            'critical': False,
-            'status': False,
-            'message': ''
-        }
-    }
-    
-    # Validar L5
-    if 'l5' in required_components:
-        df_l5 = st.session_state.get('df_l5')
-        if df_l5 is not None and hasattr(df_l5, 'shape') and not df_l5.empty:
-            checks['l5']['status'] = True
-            checks['l5']['message'] = f'Carregados {len(df_l5)} jogadores'
-        else:
-            checks['l5']['message'] = 'Dados L5 não disponíveis'
-    
-    # Validar scoreboard
-    if 'scoreboard' in required_components:
-        scoreboard = st.session_state.get('scoreboard')
-        if scoreboard and len(scoreboard) > 0:
-            checks['scoreboard']['status'] = True
-            checks['scoreboard']['message'] = f'{len(scoreboard)} jogos hoje'
-        else:
-            checks['scoreboard']['message'] = 'Nenhum jogo encontrado para hoje'
-    
-    # Validar odds
-    if 'odds' in required_components:
-        odds = st.session_state.get('odds')
-        if odds and len(odds) > 0:
-            checks['odds']['status'] = True
-            checks['odds']['message'] = f'{len(odds)} jogos com odds'
-        else:
-            checks['odds']['message'] = 'Odds não disponíveis'
-    
-    # Validar DvP
-    if 'dvp' in required_components:
-        dvp_analyzer = st.session_state.get('dvp_analyzer')
-        if dvp_analyzer and hasattr(dvp_analyzer, 'defense_data') and dvp_analyzer.defense_data:
-            checks['dvp']['status'] = True
-            checks['dvp']['message'] = f'Dados de {len(dvp_analyzer.defense_data)} times'
-        else:
-            checks['dvp']['message'] = 'Dados DvP não disponíveis'
-    
-    # Validar lesões
-    if 'injuries' in required_components:
-        injuries = st.session_state.get('injuries_data')
-        if injuries and len(injuries) > 0:
-            checks['injuries']['status'] = True
-            checks['injuries']['message'] = f'Lesões carregadas'
-        else:
-            checks['injuries']['message'] = 'Dados de lesões não disponíveis'
-    
-    # Determinar se todos os componentes críticos estão ok
-    all_critical_ok = all(
-        check['status'] for key, check in checks.items() 
-        if key in required_components and check['critical']
-    )
-    
-    return all_critical_ok, checks
-
 # ============================================================================
 # CLASSES UTILITÁRIAS
 # ============================================================================
@@ -368,10 +368,19 @@ class SafetyUtils:
         try:
             if value is None:
                 return default
+            # Caminho rápido pelo tipo exato (float/int são a maioria das chamadas)
+            value_type = type(value)
+            if value_type is float:
+                return value
+            if value_type is int:
+                return float(value)
             if isinstance(value, (int, float)):
                 return float(value)
             if isinstance(value, str):
-                cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
+                if value.isascii():
+                    cleaned = _NUMCLEAN_RE.sub("", value)
+                else:  # isdigit() aceita dígitos unicode que a classe 0-9 não cobre
+                    cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
                 return float(cleaned) if cleaned else default
             return float(value)
         except:
@@ -383,14 +392,15 @@ def safe_get(dictionary, key, default=None):
 
 def calculate_percentiles(values, percentiles=[90, 95]):
     """Calcula percentis de uma lista de valores"""
+    import numpy as np
+
     if not values:
         return {}
     
-    results = {}
-    for p in percentiles:
-        results[f'p{p}'] = np.percentile(values, p)
-    
-    return results
+    # Um único np.percentile com o vetor de percentis: ordena os valores uma vez só
+    percentiles = list(percentiles)
+    values_at = np.percentile(values, percentiles) if percentiles else []
+    return {f'p{p}': v for p, v in zip(percentiles, values_at)}
 
 def exponential_backoff(attempt, max_delay=60):
     """Calcula delay para retry com backoff exponencial"""
@@ -15,8 +15,7 @@ def show_dashboard():
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        saved_l5 = load_pickle(L5_CACHE_FILE)
-        df_cached = saved_l5.get("df") if saved_l5 and isinstance(saved_l5, dict) else pd.DataFrame()
+        df_cached = get_l5_cached()
         st.metric("Jogadores L5", len(df_cached))
     
     with col2:
@@ -28,11 +27,7 @@ def show_dashboard():
         st.metric("Confrontos com Odds", len(odds))
     
     with col4:
-        injuries_count = 0
-        if st.session_state.injuries_data:
-            for team_injuries in st.session_state.injuries_data.values():
-                injuries_count += len(team_injuries)
-        st.metric("Lesionados", injuries_count)
+        st.metric("Lesionados", get_injuries_total())
     
     with col5:
         dvp_analyzer = st.session_state.get("dvp_analyzer")
@@ -72,34 +67,14 @@ def show_dashboard():
     
     # Jogos do dia
     st.subheader("🎯 Confrontos de Hoje")
-    games = st.session_state.scoreboard or []
-    odds = st.session_state.odds or {}
+    scoreboard_odds = get_scoreboard_odds()
     
-    if games:
-        for i, game in enumerate(games):
+    if scoreboard_odds:
+        for i, (game, spread, total, blowout_risk) in enumerate(scoreboard_odds):
             away = game.get("away")
             home = game.get("home")
             status = game.get("status", "Não iniciado")
             
-            away_full = TEAM_ABBR_TO_ODDS.get(away, away)
-            home_full = TEAM_ABBR_TO_ODDS.get(home, home)
-            
-            spread = None
-            total = None
-            if away_full and home_full:
-                key_full = f"{away_full}@{home_full}"
-                game_odds = odds.get(key_full, {})
-                spread = game_odds.get("spread")
-                total = game_odds.get("total")
-            
-            blowout_risk = False
-            if spread:
-                try:
-                    if abs(float(spread)) >= 10:
-                        blowout_risk = True
-                except:
-                    pass
-            
             if blowout_risk:
                 st.markdown(f'<div class="blowout-card">', unsafe_allow_html=True)
                 st.markdown(f"### ⚠️ {away} @ {home} (RISCO DE BLOWOUT)")
@@ -130,19 +105,21 @@ def show_dashboard():
     st.subheader("📈 Estatísticas Rápidas")
     if not df_cached.empty:
         col_s1, col_s2, col_s3 = st.columns(3)
+        tops = {col: top[['PLAYER', col]]
+                for col, top in top_k_rows(df_cached, ['PTS_AVG', 'REB_AVG', 'AST_AVG'], k=5).items()}
         
         with col_s1:
-            top_scorers = df_cached.nlargest(5, 'PTS_AVG')[['PLAYER', 'PTS_AVG']]
+            top_scorers = tops['PTS_AVG']
             st.write("**Top Scorers (L5):**")
             st.dataframe(top_scorers.style.format({'PTS_AVG': '{:.1f}'}), use_container_width=True)
         
         with col_s2:
-            top_rebounders = df_cached.nlargest(5, 'REB_AVG')[['PLAYER', 'REB_AVG']]
+            top_rebounders = tops['REB_AVG']
             st.write("**Top Rebounders (L5):**")
             st.dataframe(top_rebounders.style.format({'REB_AVG': '{:.1f}'}), use_container_width=True)
         
         with col_s3:
-            top_assisters = df_cached.nlargest(5, 'AST_AVG')[['PLAYER', 'AST_AVG']]
+            top_assisters = tops['AST_AVG']
             st.write("**Top Assisters (L5):**")
             st.dataframe(top_assisters.style.format({'AST_AVG': '{:.1f}'}), use_container_width=True)
     
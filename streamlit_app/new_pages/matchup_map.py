@@ -2,6 +2,16 @@
 Página do Mapa de Matchups
 """
 
+import streamlit as st
+import pandas as pd
+
+# Barras de edge das melhores oportunidades, desenhadas pelo front numa tabela só
+EDGE_TABLE_CONFIG = {
+    'name': st.column_config.TextColumn("Jogador"),
+    'opponent': st.column_config.TextColumn("Adversário"),
+    'edge': st.column_config.ProgressColumn("Edge", min_value=0, max_value=100, format="%d%%"),
+}
+
 def show_matchup_map():
     st.header("🗺️ Mapa de Matchups do Dia")
     
@@ -24,6 +34,7 @@ def show_matchup_map():
     for stat in stats:
         with st.expander(f"🎯 {stat}"):
             best_players = find_best_for_stat(stat)
-            for player in best_players[:3]:
-                st.write(f"**{player['name']}** vs {player['opponent']}")
-                st.progress(player['edge'] / 100)
\ No newline at end of file
+            if best_players:
+                top = pd.DataFrame(best_players[:3], columns=['name', 'opponent', 'edge'])
+                st.dataframe(top, hide_index=True, use_container_width=True,
+                             column_config=EDGE_TABLE_CONFIG)
\ No newline at end of file
@@ -1,6 +1,18 @@
+import heapq
+
+import streamlit as st
+
 # Adicionar import
 from modules.new_modules.correlation_filters import TrixieCorrelationValidator
 
+@st.cache_resource(show_spinner=False)
+def get_trixie_validator():
+    """
+    Validator compartilhado entre reruns e sessões: ele não guarda estado por
+    jogo (só as tabelas de posição), então uma instância serve para todos
+    """
+    return TrixieCorrelationValidator()
+
 # Modificar função de geração
 def generate_smart_trixies(team_players_ctx, game_ctx):
     """
@@ -10,7 +22,7 @@ def generate_smart_trixies(team_players_ctx, game_ctx):
     candidate_trixies = build_trixies_for_game_main(team_players_ctx, game_ctx)
     
     # Validator
-    validator = TrixieCorrelationValidator()
+    validator = get_trixie_validator()
     enhanced_trixies = []
     
     for trixie in candidate_trixies:
@@ -34,6 +46,5 @@ def generate_smart_trixies(team_players_ctx, game_ctx):
             trixie["filtered_out"] = True
             trixie["violations"] = violations
     
-    # Ordenar por score aprimorado
-    enhanced_trixies.sort(key=lambda x: x["score"], reverse=True)
-    return enhanced_trixies[:10]
\ No newline at end of file
+    # Top 10 por score aprimorado (mesma ordem estável do sort completo)
+    return heapq.nlargest(10, enhanced_trixies, key=lambda x: x["score"])
\ No newline at end of file
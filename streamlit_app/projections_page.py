@@ -7,9 +7,23 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Numba é opcional: sem ele volatilidade/confiança ficam no np.select
+try:
+    import numba as nb
+    _NUMBA_AVAILABLE = True
+except Exception:
+    nb = None
+    _NUMBA_AVAILABLE = False
+
 # Importar módulos existentes
 from modules.cache_manager import load_cache, save_cache
-from modules.utils import safe_get
+from modules.utils import safe_get, top_k_rows
+
+# Colunas do df_l5 usadas por calculate_simple_projections
+PROJECTION_INPUT_COLUMNS = ['PLAYER', 'TEAM', 'POSITION', 'PTS', 'REB', 'AST', 'MIN', 'GP']
+
+# Colunas de filtro guardadas como category na cópia local da página (isin/unique sobre códigos)
+PROJECTION_CATEGORY_COLUMNS = ('TEAM', 'POSITION')
 
 def show_projections_page():
     """
@@ -29,14 +43,14 @@ def show_projections_page():
         # Filtros
         st.subheader("Filtros")
         
-        teams = sorted(st.session_state.df_l5['TEAM'].unique())
+        df_projection = get_projection_frame(st.session_state.df_l5)
+        teams, positions = get_filter_options(df_projection)
         selected_teams = st.multiselect(
             "Times",
             teams,
             default=teams[:3] if len(teams) > 3 else teams
         )
         
-        positions = sorted(st.session_state.df_l5['POSITION'].unique())
         selected_positions = st.multiselect(
             "Posições",
             positions,
@@ -73,16 +87,13 @@ def show_projections_page():
             st.metric("Qualidade", f"{color} {quality}%")
     
     # Filtrar dados
-    df_filtered = st.session_state.df_l5.copy()
-    
-    if selected_teams:
-        df_filtered = df_filtered[df_filtered['TEAM'].isin(selected_teams)]
-    
-    if selected_positions:
-        df_filtered = df_filtered[df_filtered['POSITION'].isin(selected_positions)]
+    df_filtered = filter_projection_input(df_projection, selected_teams, selected_positions)
     
-    # Calcular projeções (simplificado por enquanto)
-    projections = calculate_simple_projections(df_filtered, season_weight)
+    # Calcular projeções (simplificado por enquanto); reruns com os mesmos
+    # filtros/dados saem do cache, o botão força o recálculo
+    if recalc:
+        cached_simple_projections.clear()
+    projections = cached_simple_projections(df_filtered, season_weight)
     
     # Exibir tabela de projeções
     show_projections_table(projections)
@@ -90,52 +101,99 @@ def show_projections_page():
     # Gráficos de comparação
     show_projection_charts(projections)
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_projection_frame(df_l5):
+    """
+    Cópia do df_l5 própria desta página: só PROJECTION_INPUT_COLUMNS, com
+    TEAM/POSITION em category. A chave do cache_data é o conteúdo do df_l5,
+    então alterações in-place também invalidam; o df_l5 compartilhado com as
+    outras páginas não é tocado
+    """
+    columns = [col for col in PROJECTION_INPUT_COLUMNS if col in df_l5.columns]
+    return df_l5[columns].astype({col: 'category' for col in PROJECTION_CATEGORY_COLUMNS
+                                  if col in columns})
+
+def get_filter_options(df):
+    """Listas ordenadas de times e posições da cópia da página para os multiselects"""
+    return sorted(df['TEAM'].unique()), sorted(df['POSITION'].unique())
+
+def filter_projection_input(df, selected_teams, selected_positions):
+    """
+    Recorte do df_l5 que entra nas projeções, materializado uma vez só:
+    filtros de time/posição combinados numa máscara e apenas as colunas
+    lidas por calculate_simple_projections (também encolhe a chave do cache_data)
+    """
+    columns = [col for col in PROJECTION_INPUT_COLUMNS if col in df.columns]
+    mask = np.ones(len(df), dtype=bool)
+    
+    if selected_teams:
+        mask &= df['TEAM'].isin(selected_teams).to_numpy()
+    
+    if selected_positions:
+        mask &= df['POSITION'].isin(selected_positions).to_numpy()
+    
+    return df.loc[mask, columns]
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def cached_simple_projections(df, season_weight=0.7):
+    """
+    calculate_simple_projections com cache do Streamlit: a chave é o conteúdo
+    do DataFrame filtrado + season_weight, então mexer em widgets que não mudam
+    o filtro não recalcula nada.
+    """
+    return calculate_simple_projections(df, season_weight)
+
 def calculate_simple_projections(df, season_weight=0.7):
     """
-    Calcula projeções simples baseadas nos dados L5
+    Calcula projeções simples baseadas nos dados L5, coluna a coluna
+    (mesmos defaults do cálculo por jogador quando a coluna não existe)
     """
-    projections = []
+    if len(df) == 0:
+        return pd.DataFrame()
     
-    for _, row in df.iterrows():
-        player_data = row.to_dict()
-        
-        # Dados dos últimos 5 jogos (já temos)
-        pts_L5 = safe_get(player_data, 'PTS', 0.0)
-        reb_L5 = safe_get(player_data, 'REB', 0.0)
-        ast_L5 = safe_get(player_data, 'AST', 0.0)
-        min_L5 = safe_get(player_data, 'MIN', 0.0)
-        
-        # Para esta versão inicial, usamos apenas L5
-        # Em versões futuras, buscaríamos dados da temporada
-        
-        # Projeção simples (L5 * fator de ajuste)
-        projection_factor = 1.0  # Fator neutro inicialmente
+    index = pd.RangeIndex(len(df))
+    
+    def column(name, default):
+        if name in df.columns:
+            return df[name].reset_index(drop=True)
+        return pd.Series(default, index=index)
+    
+    # Dados dos últimos 5 jogos (já temos)
+    pts_L5 = column('PTS', 0.0)
+    reb_L5 = column('REB', 0.0)
+    ast_L5 = column('AST', 0.0)
+    min_L5 = column('MIN', 0.0)
+    pra_L5 = pts_L5 + reb_L5 + ast_L5
+    
+    # Para esta versão inicial, usamos apenas L5
+    # Em versões futuras, buscaríamos dados da temporada
+    
+    # Projeção simples (L5 * fator de ajuste)
+    projection_factor = 1.0  # Fator neutro inicialmente
+    
+    volatility, confidence = calculate_volatility_confidence_vec(column('GP', 5), min_L5)
+    
+    return pd.DataFrame({
+        'PLAYER': column('PLAYER', ''),
+        'TEAM': column('TEAM', ''),
+        'POSITION': column('POSITION', ''),
+        'MIN_L5': min_L5,
+        'PTS_L5': pts_L5,
+        'REB_L5': reb_L5,
+        'AST_L5': ast_L5,
+        'PRA_L5': pra_L5,
         
-        proj = {
-            'PLAYER': safe_get(player_data, 'PLAYER', ''),
-            'TEAM': safe_get(player_data, 'TEAM', ''),
-            'POSITION': safe_get(player_data, 'POSITION', ''),
-            'MIN_L5': min_L5,
-            'PTS_L5': pts_L5,
-            'REB_L5': reb_L5,
-            'AST_L5': ast_L5,
-            'PRA_L5': pts_L5 + reb_L5 + ast_L5,
-            
-            # Projeções (inicialmente iguais ao L5)
-            'MIN_PROJ': min_L5 * projection_factor,
-            'PTS_PROJ': pts_L5 * projection_factor,
-            'REB_PROJ': reb_L5 * projection_factor,
-            'AST_PROJ': ast_L5 * projection_factor,
-            'PRA_PROJ': (pts_L5 + reb_L5 + ast_L5) * projection_factor,
-            
-            # Volatilidade (simplificada)
-            'VOLATILITY': calculate_volatility(player_data),
-            'CONFIDENCE': calculate_confidence(player_data)
-        }
+        # Projeções (inicialmente iguais ao L5)
+        'MIN_PROJ': min_L5 * projection_factor,
+        'PTS_PROJ': pts_L5 * projection_factor,
+        'REB_PROJ': reb_L5 * projection_factor,
+        'AST_PROJ': ast_L5 * projection_factor,
+        'PRA_PROJ': pra_L5 * projection_factor,
         
-        projections.append(proj)
-    
-    return pd.DataFrame(projections)
+        # Volatilidade (simplificada)
+        'VOLATILITY': volatility,
+        'CONFIDENCE': confidence
+    })
 
 def calculate_volatility(player_data):
     """
@@ -165,6 +223,64 @@ def calculate_confidence(player_data):
     else:
         return 0.3  # Muito baixa confiança
 
+def calculate_volatility_vec(games_played):
+    """Versão vetorizada de calculate_volatility sobre a coluna GP"""
+    games_played = np.asarray(games_played)
+    return np.select([games_played >= 5, games_played >= 3], [0.3, 0.6], default=0.8)
+
+def calculate_confidence_vec(min_L5):
+    """Versão vetorizada de calculate_confidence sobre a coluna MIN"""
+    min_L5 = np.asarray(min_L5)
+    return np.select([min_L5 >= 30, min_L5 >= 20, min_L5 >= 10], [0.9, 0.7, 0.5], default=0.3)
+
+def _volatility_confidence_kernel(games_played, min_L5, volatility, confidence):
+    """Volatilidade e confiança numa passada só (mesmas faixas das versões escalares)"""
+    for i in range(games_played.shape[0]):
+        gp = games_played[i]
+        if gp >= 5:
+            volatility[i] = 0.3
+        elif gp >= 3:
+            volatility[i] = 0.6
+        else:
+            volatility[i] = 0.8
+        minutes = min_L5[i]
+        if minutes >= 30:
+            confidence[i] = 0.9
+        elif minutes >= 20:
+            confidence[i] = 0.7
+        elif minutes >= 10:
+            confidence[i] = 0.5
+        else:
+            confidence[i] = 0.3
+
+@st.cache_resource(show_spinner=False)
+def get_volatility_confidence_kernel():
+    """
+    Compila o kernel como gufunc numba uma vez por processo: o cache_resource
+    sobrevive aos reruns do script, que recompilariam tudo no nível do módulo
+    """
+    return nb.guvectorize(
+        [(nb.float64[:], nb.float64[:], nb.float64[:], nb.float64[:])],
+        "(n),(n)->(n),(n)", nopython=True
+    )(_volatility_confidence_kernel)
+
+def calculate_volatility_confidence_vec(games_played, min_L5):
+    """
+    VOLATILITY (sobre GP) e CONFIDENCE (sobre MIN) de uma vez: kernel numba
+    quando as colunas são numéricas, senão as versões com np.select
+    """
+    if _NUMBA_AVAILABLE:
+        try:
+            gp_arr = np.asarray(games_played, dtype=np.float64)
+            min_arr = np.asarray(min_L5, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+        else:
+            # NaN cai no "else" das faixas, como no np.select; só silencia o aviso
+            with np.errstate(invalid='ignore'):
+                return get_volatility_confidence_kernel()(gp_arr, min_arr)
+    return calculate_volatility_vec(games_played), calculate_confidence_vec(min_L5)
+
 def show_projections_table(df_projections):
     """
     Exibe tabela de projeções com formatação
@@ -218,7 +334,7 @@ def show_projections_table(df_projections):
     )
     
     # Opção de download
-    csv = df_display.to_csv(index=False).encode('utf-8')
+    csv = projections_csv_bytes(df_display)
     st.download_button(
         label="📥 Download CSV",
         data=csv,
@@ -226,49 +342,66 @@ def show_projections_table(df_projections):
         mime="text/csv"
     )
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def projections_csv_bytes(df):
+    """CSV (utf-8) do download; reruns com a mesma tabela reaproveitam os bytes"""
+    return df.to_csv(index=False).encode('utf-8')
+
+def projection_delta_table(top, proj_col, l5_col):
+    """
+    Top N já ordenado como tabela única: jogador, projeção e variação vs L5
+    (coluna ausente vale 0 / '', como no acesso por linha)
+    """
+    l5 = top[l5_col] if l5_col in top.columns else 0
+    return pd.DataFrame({
+        'Jogador': top['PLAYER'] if 'PLAYER' in top.columns else '',
+        'Projeção': top[proj_col],
+        'Δ vs L5': top[proj_col] - l5,
+    })
+
+# Formatação das tabelas de Top 10 (mesmo formato dos antigos st.metric)
+DELTA_TABLE_CONFIG = {
+    'Projeção': st.column_config.NumberColumn(format="%.1f"),
+    'Δ vs L5': st.column_config.NumberColumn(format="%+.1f"),
+}
+
 def show_projection_charts(df_projections):
     """
     Exibe gráficos comparativos
     """
     st.subheader("📊 Análise Comparativa")
     
+    # Top 10 de PTS e PRA numa conversão só do DataFrame
+    tops = top_k_rows(df_projections, [col for col in ('PTS_PROJ', 'PRA_PROJ')
+                                       if col in df_projections.columns])
+    
     # Gráfico 1: Top 10 PTS Proj
-    if 'PTS_PROJ' in df_projections.columns:
-        top_scorers = df_projections.nlargest(10, 'PTS_PROJ')
+    if 'PTS_PROJ' in tops:
+        top_scorers = tops['PTS_PROJ']
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("**Top 10 Projeção de Pontos**")
-            for _, row in top_scorers.iterrows():
-                player_name = safe_get(row, 'PLAYER', '')
-                pts_proj = safe_get(row, 'PTS_PROJ', 0)
-                pts_l5 = safe_get(row, 'PTS_L5', 0)
-                
-                delta = pts_proj - pts_l5
-                st.metric(
-                    player_name,
-                    f"{pts_proj:.1f}",
-                    delta=f"{delta:+.1f}"
-                )
+            st.dataframe(
+                projection_delta_table(top_scorers, 'PTS_PROJ', 'PTS_L5'),
+                hide_index=True,
+                use_container_width=True,
+                column_config=DELTA_TABLE_CONFIG
+            )
     
     # Gráfico 2: Top 10 PRA Proj
-    if 'PRA_PROJ' in df_projections.columns:
-        top_pra = df_projections.nlargest(10, 'PRA_PROJ')
+    if 'PRA_PROJ' in tops:
+        top_pra = tops['PRA_PROJ']
         
         with col2:
             st.markdown("**Top 10 Projeção PRA**")
-            for _, row in top_pra.iterrows():
-                player_name = safe_get(row, 'PLAYER', '')
-                pra_proj = safe_get(row, 'PRA_PROJ', 0)
-                pra_l5 = safe_get(row, 'PRA_L5', 0)
-                
-                delta = pra_proj - pra_l5
-                st.metric(
-                    player_name,
-                    f"{pra_proj:.1f}",
-                    delta=f"{delta:+.1f}"
-                )
+            st.dataframe(
+                projection_delta_table(top_pra, 'PRA_PROJ', 'PRA_L5'),
+                hide_index=True,
+                use_container_width=True,
+                column_config=DELTA_TABLE_CONFIG
+            )
 
 if __name__ == "__main__":
     show_projections_page()
\ No newline at end of file